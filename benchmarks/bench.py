@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2026 Jelmer Vernooĳ <jelmer@jelmer.uk>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA 02110-1301 USA
+
+"""Benchmarks for the setuptools-gettext hot paths.
+
+Synthetic catalog trees are generated in a temporary directory, so results
+are reproducible for a given set of options. Run with --help for the
+available options, e.g.:
+
+    python benchmarks/bench.py --languages 50 --domains 3 --messages 500
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import warnings
+from contextlib import contextmanager
+from tempfile import TemporaryDirectory
+from typing import Callable, Dict, Iterator, List, Optional
+
+from setuptools import Distribution
+
+import setuptools_gettext
+from setuptools_gettext import (
+    build_mo,
+    find_source_files,
+    install_mo,
+    load_pyproject_config,
+)
+from setuptools_gettext.catalog import clear_catalog_index, discover_catalogs
+
+LAYOUTS = ("flat", "standard")
+COMPILERS = ("msgfmt", "translate-toolkit", "builtin")
+INSTALL_LAYOUTS = ("share", "package")
+
+PACKAGE = "app"
+DOMAIN = "app"
+
+
+def language_codes(count: int) -> List[str]:
+    """Return count distinct language codes, deterministically."""
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return [
+        letters[i // len(letters) % len(letters)] + letters[i % len(letters)]
+        for i in range(count)
+    ]
+
+
+def write_catalog(path: str, lang: str, messages: int) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            'msgid ""\nmsgstr ""\n'
+            '"Content-Type: text/plain; charset=UTF-8\\n"\n'
+            f'"Language: {lang}\\n"\n'
+            '"Plural-Forms: nplurals=2; plural=(n != 1);\\n"\n\n'
+        )
+        for i in range(messages):
+            if i % 10 == 9:
+                f.write(
+                    f"#: {PACKAGE}/module{i % 7}.py:{i}\n"
+                    f'msgid "{i} file"\nmsgid_plural "{i} files"\n'
+                    f'msgstr[0] "{lang} {i} file"\n'
+                    f'msgstr[1] "{lang} {i} files"\n\n'
+                )
+            else:
+                f.write(
+                    f"#: {PACKAGE}/module{i % 7}.py:{i}\n"
+                    f'msgid "Message number {i}"\n'
+                    f'msgstr "{lang}: message number {i}"\n\n'
+                )
+
+
+def generate_tree(
+    root: str, layout: str, languages: int, domains: int, messages: int
+) -> str:
+    """Generate a synthetic project and return its catalog source dir.
+
+    The flat layout has a single domain, ``po/<lang>.po``; the standard
+    layout has ``<package>/locale/<lang>/LC_MESSAGES/<domain>.po`` for
+    every domain.
+    """
+    for i in range(7):
+        path = os.path.join(root, PACKAGE, f"module{i}.py")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("from gettext import gettext as _\n\nMSG = _('x')\n")
+    if layout == "flat":
+        source_dir = os.path.join(root, "po")
+        for lang in language_codes(languages):
+            write_catalog(
+                os.path.join(source_dir, f"{lang}.po"), lang, messages
+            )
+        write_catalog(os.path.join(source_dir, f"{DOMAIN}.pot"), "", 0)
+    else:
+        source_dir = os.path.join(root, PACKAGE, "locale")
+        for lang in language_codes(languages):
+            for d in range(domains):
+                write_catalog(
+                    os.path.join(
+                        source_dir, lang, "LC_MESSAGES", f"domain{d}.po"
+                    ),
+                    lang,
+                    messages,
+                )
+    return source_dir
+
+
+def available_compilers() -> List[str]:
+    compilers = ["builtin"]
+    if setuptools_gettext.has_msgfmt():
+        compilers.insert(0, "msgfmt")
+    if setuptools_gettext.has_translate_toolkit():
+        compilers.insert(-1, "translate-toolkit")
+    return compilers
+
+
+@contextmanager
+def chdir(path: str) -> Iterator[None]:
+    orig = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(orig)
+
+
+def make_distribution(
+    source_dir: str, build_dir: str, **cfg: object
+) -> Distribution:
+    dist = Distribution(attrs={"name": DOMAIN, "packages": [PACKAGE]})
+    load_pyproject_config(
+        dist, {"source_dir": source_dir, "build_dir": build_dir, **cfg}
+    )
+    return dist
+
+
+def run_build(
+    source_dir: str, build_dir: str, compiler: str, jobs: int = 1
+) -> None:
+    dist = make_distribution(
+        source_dir, build_dir, compiler=compiler, jobs=jobs
+    )
+    cmd = build_mo(dist)
+    cmd.initialize_options()
+    cmd.force = True
+    cmd.finalize_options()
+    cmd.run()
+
+
+def run_install(build_dir: str, install_dir: str, install_layout: str) -> None:
+    dist = make_distribution(
+        build_dir, build_dir, install_layout=install_layout
+    )
+    cmd = install_mo(dist)
+    cmd.initialize_options()
+    cmd.install_dir = install_dir
+    cmd.root = None
+    cmd.force = True
+    cmd.finalize_options()
+    cmd.run()
+
+
+def measure(
+    func: Callable[[], object],
+    repeat: int,
+    setup: Optional[Callable[[], object]] = None,
+) -> Dict[str, float]:
+    """Time func repeat times, calling setup (untimed) before each run."""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "max": max(timings),
+    }
+
+
+def run_benchmarks(args: argparse.Namespace) -> List[Dict[str, object]]:
+    results: List[Dict[str, object]] = []
+
+    def add(name: str, layout: str, timings: Dict[str, float]) -> None:
+        results.append({"benchmark": name, "layout": layout, **timings})
+        print(
+            f"{name:<36} {layout:<9} "
+            f"min {timings['min'] * 1000:10.2f} ms  "
+            f"median {timings['median'] * 1000:10.2f} ms",
+            flush=True,
+        )
+
+    compilers = args.compilers or available_compilers()
+    for layout in args.layouts:
+        with TemporaryDirectory() as td, chdir(td):
+            source_dir = generate_tree(
+                td, layout, args.languages, args.domains, args.messages
+            )
+            add(
+                "discover_catalogs (cold)",
+                layout,
+                measure(
+                    lambda: discover_catalogs(source_dir),
+                    args.repeat,
+                    setup=clear_catalog_index,
+                ),
+            )
+            add(
+                "discover_catalogs (cached)",
+                layout,
+                measure(lambda: discover_catalogs(source_dir), args.repeat),
+            )
+            add(
+                "find_source_files (cold)",
+                layout,
+                measure(
+                    lambda: find_source_files(source_dir),
+                    args.repeat,
+                    setup=clear_catalog_index,
+                ),
+            )
+
+            # distutils' mkpath remembers the directories it created, so
+            # every run gets fresh build and install directories.
+            runs = itertools.count()
+            build_dirs = []
+
+            def build(compiler: str) -> None:
+                build_dirs.append(
+                    os.path.join(td, PACKAGE, f"build-{next(runs)}")
+                )
+                run_build(source_dir, build_dirs[-1], compiler, args.jobs)
+
+            for compiler in compilers:
+                add(
+                    f"build_mo ({compiler})"
+                    if args.jobs == 1
+                    else f"build_mo ({compiler}, {args.jobs} jobs)",
+                    layout,
+                    measure(
+                        lambda compiler=compiler: build(compiler),
+                        args.repeat,
+                        setup=clear_catalog_index,
+                    ),
+                )
+
+            for install_layout in INSTALL_LAYOUTS:
+                add(
+                    f"install_mo ({install_layout})",
+                    layout,
+                    measure(
+                        lambda install_layout=install_layout: run_install(
+                            build_dirs[-1],
+                            os.path.join(td, f"install-{next(runs)}"),
+                            install_layout,
+                        ),
+                        args.repeat,
+                    ),
+                )
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--languages", type=int, default=20, help="number of languages"
+    )
+    parser.add_argument(
+        "--domains",
+        type=int,
+        default=2,
+        help="number of domains per language (standard layout only)",
+    )
+    parser.add_argument(
+        "--messages", type=int, default=200, help="messages per catalog"
+    )
+    parser.add_argument(
+        "--layout",
+        dest="layouts",
+        action="append",
+        choices=LAYOUTS,
+        help="catalog layout to benchmark (default: all)",
+    )
+    parser.add_argument(
+        "--compiler",
+        dest="compilers",
+        action="append",
+        choices=COMPILERS,
+        help="compiler to benchmark (default: all available)",
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=1, help="build_mo jobs (0 for all CPUs)"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="number of timed runs"
+    )
+    parser.add_argument("--json", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+    args.layouts = args.layouts or list(LAYOUTS)
+
+    logging.disable(logging.INFO)
+    # install_mo pulls in the deprecated install command for its defaults.
+    warnings.simplefilter("ignore")
+    results = run_benchmarks(args)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "python": sys.version.split()[0],
+                    "languages": args.languages,
+                    "domains": args.domains,
+                    "messages": args.messages,
+                    "jobs": args.jobs,
+                    "repeat": args.repeat,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
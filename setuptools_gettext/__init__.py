@@ -20,38 +20,91 @@
 
 """build_mo command for setup.py."""
 
+import functools
 import logging
 import os
+import subprocess
 import sys
-from typing import Dict, List, Optional, Tuple
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
 
 from setuptools import Command
-from setuptools.dist import Distribution
-from setuptools.errors import OptionError
-from setuptools.modified import newer
+from setuptools.errors import ExecError, FileError, OptionError
 
 from .catalog import (
     LC_MESSAGES,
     Catalog,
+    catalog_index,
+    clear_catalog_index,
     discover_catalogs,
     has_standard_catalogs,
-    mo_basename,
     parse_lang,
 )
+from .compile import (
+    # The programmatic build API, for use without a setuptools distribution.
+    CompileResult,  # noqa: F401
+    compile_catalog,
+    compile_catalogs,  # noqa: F401
+    compile_catalogs_async,  # noqa: F401
+    compile_options,
+    compiler_identity,
+    mo_path,
+    msgfmt_args,
+)
 from .install_layout import (
     DEFAULT_INSTALL_LAYOUT,
+    DEFAULT_INSTALL_MODE,
+    _get_package_dir,
     add_package_data_for_build_dir,
     normalize_install_layout,
+    normalize_install_mode,
     package_install_dir,
     package_locale_info,
 )
+from .jobs import (
+    DEFAULT_JOBS,
+    call_in,
+    normalize_jobs,
+    run_jobs,
+    worker_processes,
+)
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+    from setuptools.dist import Distribution
+
+    from .extract import ExtractionCache
+    from .report import CommandReport
+
+# Only modules needed by the finalize_distribution_options hook are imported
+# eagerly, since the hook runs for every setuptools build in an environment
+# where this plugin is installed. Everything else is imported where it is
+# used.
 
 __version__ = (0, 1, 18)
 DEFAULT_SOURCE_DIR = "po"
 DEFAULT_BUILD_DIR = "locale"
 DEFAULT_LANGUAGE = "en"
 DEFAULT_COMPILER = "auto"
-VALID_COMPILERS = ("auto", "msgfmt", "translate-toolkit")
+VALID_COMPILERS = ("auto", "msgfmt", "translate-toolkit", "builtin")
+DEFAULT_EXTRACTOR = "auto"
+VALID_EXTRACTORS = ("auto", "xgettext", "builtin")
+# Options passed to xgettext for every source file. These affect the
+# extracted messages, so they are part of the extraction cache key.
+XGETTEXT_OPTIONS: Dict[str, object] = {
+    "from_code": "UTF-8",
+    "add_comments": "i18n:",
+}
+XGETTEXT_ARGS = [
+    f"--from-code={XGETTEXT_OPTIONS['from_code']}",
+    "--sort-by-file",
+    f"--add-comments={XGETTEXT_OPTIONS['add_comments']}",
+]
+
+GETTEXT_TOOLS = ("msgfmt", "msginit", "xgettext")
 
 
 def has_translate_toolkit() -> bool:
@@ -66,29 +119,113 @@ def has_msgfmt() -> bool:
     return find_executable("msgfmt") is not None
 
 
+def _tool_path(dist: "Distribution", name: str) -> Optional[str]:
+    """Return the path of a gettext tool, preferring a pinned path."""
+    pinned = getattr(dist, "gettext_tool_paths", {}).get(name)
+    if pinned:
+        return pinned
+    return find_executable(name)
+
+
+@functools.lru_cache(maxsize=None)
+def _tool_version(executable: str) -> str:
+    try:
+        output = subprocess.run(
+            [executable, "--version"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return output.splitlines()[0].strip() if output else "unknown"
+
+
 def _detect_default_source_dir(dirname: str = "") -> str:
     po_dir = os.path.join(dirname, DEFAULT_SOURCE_DIR)
-    if os.path.isdir(po_dir):
+    if catalog_index(po_dir).exists:
         return DEFAULT_SOURCE_DIR
 
     locale_dir = os.path.join(dirname, DEFAULT_BUILD_DIR)
-    if os.path.isdir(locale_dir) and has_standard_catalogs(locale_dir):
+    if has_standard_catalogs(locale_dir):
         return DEFAULT_BUILD_DIR
 
     return DEFAULT_SOURCE_DIR
 
 
-def _resolve_source_dir(dist: Distribution) -> str:
-    if getattr(dist, "gettext_source_dir_configured", False):
-        return dist.gettext_source_dir  # type: ignore
+@dataclass
+class GettextState:
+    """Gettext information shared by all commands of a distribution.
 
+    The has_gettext predicate and the build_mo, clean_mo and install_mo
+    commands all need the source directory, its catalogs or the files in
+    the build directory; this keeps them from resolving and scanning
+    those again in every command. The state is reset whenever the
+    configuration is loaded.
+    """
+
+    source_dir: Optional[str] = None
+    catalogs: Dict[Tuple[str, Optional[Tuple[str, ...]]], List[Catalog]] = (
+        field(default_factory=dict)
+    )
+    built_files: Dict[str, List[str]] = field(default_factory=dict)
+
+    def discover_catalogs(
+        self,
+        source_dir: str,
+        lang: Optional[List[str]] = None,
+        refresh: bool = False,
+    ) -> List[Catalog]:
+        key = (source_dir, None if lang is None else tuple(lang))
+        if refresh or key not in self.catalogs:
+            self.catalogs[key] = discover_catalogs(source_dir, lang)
+        return list(self.catalogs[key])
+
+    def gather_built_files(self, build_dir: str) -> List[str]:
+        key = os.path.abspath(build_dir)
+        if key not in self.built_files:
+            self.built_files[key] = gather_built_files(build_dir)
+        return list(self.built_files[key])
+
+    def forget_built_files(self, build_dir: str) -> None:
+        """Forget the files in build_dir, after they have changed."""
+        self.built_files.pop(os.path.abspath(build_dir), None)
+
+
+def gettext_state(dist: "Distribution") -> GettextState:
+    """Return the gettext state of dist, creating it if necessary."""
+    state = getattr(dist, "gettext_state", None)
+    if state is None:
+        state = dist.gettext_state = GettextState()  # type: ignore
+    return state
+
+
+def _resolve_source_dir(dist: "Distribution") -> str:
+    state = gettext_state(dist)
+    if state.source_dir is not None:
+        return state.source_dir
     source_dir = dist.gettext_source_dir  # type: ignore
-    if source_dir == DEFAULT_SOURCE_DIR and not os.path.isdir(source_dir):
+    if (
+        not getattr(dist, "gettext_source_dir_configured", False)
+        and source_dir == DEFAULT_SOURCE_DIR
+        and not catalog_index(source_dir).exists
+    ):
         source_dir = _detect_default_source_dir()
         dist.gettext_source_dir = source_dir  # type: ignore
+    state.source_dir = source_dir
     return source_dir
 
 
+def _command_report(command: Command) -> "CommandReport":
+    from .report import REPORT_ENV, CommandReport
+
+    return CommandReport(
+        command.get_command_name(),
+        os.environ.get(REPORT_ENV)
+        or getattr(command.distribution, "gettext_report", None),
+    )
+
+
 def _insert_sub_command(command_class, name, predicate, before=None) -> None:
     sub_commands = [
         sub_command
@@ -151,10 +288,36 @@ class build_mo(Command):
         ("force", "f", "Force creation of mo files"),
         ("translate-toolkit", "t", "Use translate-toolkit"),
         ("msgfmt", "m", "Use msgfmt program"),
+        ("builtin", "b", "Use the builtin compiler"),
         ("lang=", None, "Comma-separated list of languages to process"),
+        ("jobs=", "j", "Number of catalogs to compile in parallel"),
+        ("validate", None, "Check the structure of compiled mo files"),
+        ("check", "c", "Check catalogs for format and header problems"),
+        ("watch", "w", "Keep running and recompile catalogs as they change"),
+        (
+            "watch-interval=",
+            None,
+            "Seconds between checks for changes in watch mode",
+        ),
+        ("use-fuzzy", None, "Include fuzzy translations in mo files"),
+        (
+            "optimize",
+            None,
+            "Deduplicate strings in mo files (builtin compiler only)",
+        ),
     ]
 
-    boolean_options = ["force", "translate-toolkit", "msgfmt"]
+    boolean_options = [
+        "force",
+        "translate-toolkit",
+        "msgfmt",
+        "builtin",
+        "validate",
+        "check",
+        "watch",
+        "use-fuzzy",
+        "optimize",
+    ]
 
     def initialize_options(self):
         self.build_dir = None
@@ -163,9 +326,22 @@ class build_mo(Command):
         self.force = None
         self.msgfmt = None
         self.translate_toolkit = None
+        self.builtin = None
         self.lang = None
+        self.jobs = None
+        self.shared_cache = None
+        self.validate = None
+        self.check = None
+        self._check_failed = threading.Event()
+        self.watch = None
+        self.watch_interval = None
+        self.use_fuzzy = None
+        self.optimize = None
+        self._msgfmt_path = None
+        self._processes = None
         self.catalogs = []
         self.outfiles = []
+        self.report = None
 
     def finalize_options(self):
         self.set_undefined_options("build", ("force", "force"))
@@ -188,7 +364,11 @@ class build_mo(Command):
             == "package"
         ):
             add_package_data_for_build_dir(self.distribution, self.build_dir)
-        if self.msgfmt is None and self.translate_toolkit is None:
+        if (
+            self.msgfmt is None
+            and self.translate_toolkit is None
+            and self.builtin is None
+        ):
             compiler = getattr(
                 self.distribution, "gettext_compiler", DEFAULT_COMPILER
             )
@@ -196,29 +376,87 @@ class build_mo(Command):
                 self.msgfmt = True
             elif compiler == "translate-toolkit":
                 self.translate_toolkit = True
-        if self.lang is None:
-            self.catalogs = discover_catalogs(self.source_dir)
-        else:
-            self.catalogs = discover_catalogs(
-                self.source_dir, parse_lang(self.lang)
+            elif compiler == "builtin":
+                self.builtin = True
+        if self.jobs is None:
+            self.jobs = getattr(
+                self.distribution, "gettext_jobs", DEFAULT_JOBS
+            )
+        try:
+            self.jobs = normalize_jobs(self.jobs)
+        except ValueError as e:
+            raise OptionError(str(e)) from e
+        if self.validate is None:
+            self.validate = getattr(
+                self.distribution, "gettext_validate", False
+            )
+        if self.check is None:
+            self.check = getattr(self.distribution, "gettext_check", False)
+        if self.use_fuzzy is None:
+            self.use_fuzzy = getattr(
+                self.distribution, "gettext_use_fuzzy", False
+            )
+        if self.optimize is None:
+            self.optimize = getattr(
+                self.distribution, "gettext_optimize", False
+            )
+        from .cache import CACHE_DIR_ENV
+
+        cache_dir = os.environ.get(CACHE_DIR_ENV) or getattr(
+            self.distribution, "gettext_cache_dir", None
+        )
+        if cache_dir:
+            from .cache import (
+                CACHE_SIZE_ENV,
+                DEFAULT_CACHE_SIZE,
+                SharedCache,
+                parse_size,
+            )
+
+            try:
+                cache_size = parse_size(
+                    os.environ.get(CACHE_SIZE_ENV)
+                    or getattr(self.distribution, "gettext_cache_size", None)
+                    or DEFAULT_CACHE_SIZE
+                )
+            except ValueError as e:
+                raise OptionError(str(e)) from e
+            self.shared_cache = SharedCache(
+                os.path.expanduser(cache_dir), cache_size
             )
+        if self.watch_interval is None:
+            from .watch import DEFAULT_WATCH_INTERVAL
+
+            self.watch_interval = DEFAULT_WATCH_INTERVAL
+        try:
+            self.watch_interval = float(self.watch_interval)
+        except ValueError as e:
+            raise OptionError(
+                f"Unsupported watch interval {self.watch_interval!r}"
+            ) from e
+        self.report = _command_report(self)
+        self._languages = None if self.lang is None else parse_lang(self.lang)
+        with self.report.phase("discover"):
+            self._discover_catalogs()
         self.lang = sorted({catalog.lang for catalog in self.catalogs})
+
+    def _discover_catalogs(self, refresh: bool = False) -> None:
+        self.catalogs = gettext_state(self.distribution).discover_catalogs(
+            self.source_dir, self._languages, refresh=refresh
+        )
         self._check_duplicate_outputs()
 
     def get_inputs(self):
         return [catalog.po for catalog in self.catalogs]
 
     def _mo_path(self, catalog: Catalog) -> str:
-        domain = catalog.domain
-        if catalog.uses_output_base or self.output_base_explicit:
-            assert self.output_base is not None
-            domain = self.output_base
         assert self.build_dir is not None
-        return os.path.join(
+        assert self.output_base is not None
+        return mo_path(
             self.build_dir,
-            catalog.lang,
-            LC_MESSAGES,
-            mo_basename(domain),
+            catalog,
+            self.output_base,
+            self.output_base_explicit,
         )
 
     def _check_duplicate_outputs(self) -> None:
@@ -234,22 +472,28 @@ class build_mo(Command):
 
     def run(self):
         """Run msgfmt for each language."""
-        if not self.catalogs:
+        if not self.catalogs and not self.watch:
             return
 
-        if self.msgfmt and self.translate_toolkit:
-            logging.error("Cannot use both msgfmt and translate-toolkit!")
+        compilers = [self.msgfmt, self.translate_toolkit, self.builtin]
+        if sum(bool(compiler) for compiler in compilers) > 1:
+            logging.error(
+                "Cannot use more than one of msgfmt, translate-toolkit "
+                "and builtin!"
+            )
             return
-        elif not self.msgfmt and not self.translate_toolkit:
-            if has_msgfmt():
+        elif not any(compilers):
+            if self.optimize:
+                self.builtin = True
+            elif self._has_msgfmt():
                 self.msgfmt = True
             elif has_translate_toolkit():
                 self.translate_toolkit = True
             else:
-                logging.warning("No gettext tools found!")
-                return
+                logging.info("No gettext tools found, using builtin compiler")
+                self.builtin = True
 
-        if self.msgfmt and not has_msgfmt():
+        if self.msgfmt and not self._has_msgfmt():
             logging.warning("GNU gettext msgfmt utility not found!")
             logging.warning("Skip compiling po files.")
             return
@@ -265,7 +509,8 @@ class build_mo(Command):
             catalog.lang == default_lang and catalog.uses_output_base
             for catalog in self.catalogs
         ):
-            if find_executable("msginit") is None:
+            msginit = _tool_path(self.distribution, "msginit")
+            if msginit is None:
                 logging.warning("GNU gettext msginit utility not found!")
                 logging.warning("Skip creating English PO file.")
             else:
@@ -274,7 +519,7 @@ class build_mo(Command):
                 en_po = default_lang + ".po"
                 self.spawn(
                     [
-                        "msginit",
+                        msginit,
                         "--no-translator",
                         "-l",
                         default_lang,
@@ -285,25 +530,269 @@ class build_mo(Command):
                     ]
                 )
 
-        for catalog in self.catalogs:
-            dir_ = os.path.join(self.build_dir, catalog.lang, LC_MESSAGES)
-            self.mkpath(dir_)
-            mo = self._mo_path(catalog)
-            if self.force or newer(catalog.po, mo):
-                logging.info(f"Compile: {catalog.po} -> {mo}")
-                self.compile_mo(catalog.po, mo)
-                self.outfiles.append(mo)
+        if self.optimize and not self.builtin:
+            logging.warning(
+                "Optimized mo output requires the builtin compiler; "
+                "writing standard mo files."
+            )
 
-    def compile_mo(self, po: str, mo: str):
         if self.msgfmt:
-            self.spawn(["msgfmt", "-o", mo, po])
+            # msgfmt writes one MO file per process, so it can't be batched;
+            # at least look it up only once rather than for every catalog.
+            self._msgfmt_path = _tool_path(self.distribution, "msgfmt")
+
+        assert self.report is not None
+        try:
+            if self.watch:
+                self._watch()
+            else:
+                self._compile_catalogs()
+        finally:
+            self.report.write()
+
+    def _watch(self) -> None:
+        """Compile catalogs, then recompile them whenever they change.
+
+        Runs until interrupted. Build failures are logged rather than
+        raised, so that fixing the catalog resumes the loop.
+        """
+        from .watch import CatalogWatcher
+
+        assert self.watch_interval is not None
+        watcher = CatalogWatcher(self.source_dir, self.watch_interval)
+        logging.warning(
+            f"Watching {self.source_dir} for changes; press Ctrl-C to stop."
+        )
+        changed: Optional[Set[str]] = None
+        try:
+            changes = iter(watcher)
+            while True:
+                try:
+                    if changed is None:
+                        self._compile_catalogs()
+                    else:
+                        self._discover_catalogs(refresh=True)
+                        self._compile_catalogs(
+                            [
+                                catalog
+                                for catalog in self.catalogs
+                                if os.path.abspath(catalog.po) in changed
+                            ]
+                        )
+                except (ExecError, FileError, OptionError) as e:
+                    logging.error(str(e))
+                changed = next(changes)
+        except KeyboardInterrupt:
+            pass
+
+    def _compile_catalogs(
+        self, catalogs: Optional[List[Catalog]] = None
+    ) -> None:
+        """Compile catalogs (by default, all of them) if out of date."""
+        from setuptools.modified import newer
+
+        from .cache import BuildManifest, cache_key, file_digest
+
+        assert self.report is not None
+        assert self.build_dir is not None
+        manifest = BuildManifest.load(self.build_dir)
+        compiler = self._compiler_identity()
+        self.report.info["compiler"] = compiler
+        options = self._compile_options()
+        pending: List[Tuple[str, str, Optional[str]]] = []
+        keys = {}
+        with self.report.phase("check"):
+            for catalog in self.catalogs if catalogs is None else catalogs:
+                dir_ = os.path.join(self.build_dir, catalog.lang, LC_MESSAGES)
+                if not self.dry_run:
+                    self.mkpath(dir_)
+                mo = self._mo_path(catalog)
+                try:
+                    digest = file_digest(catalog.po)
+                except OSError as e:
+                    raise FileError(f"cannot read {catalog.po}: {e}") from e
+                keys[mo] = cache_key(digest, compiler, options)
+                current = manifest.is_current(mo, keys[mo])
+                if current is None:
+                    # Not built by us before; fall back to comparing mtimes,
+                    # and record the output so clean_mo knows about it too.
+                    current = not newer(catalog.po, mo)
+                    if current:
+                        manifest.record(mo, catalog.po, keys[mo])
+                if self.force or not current:
+                    pending.append((catalog.po, mo, keys[mo]))
+                else:
+                    self.report.record(
+                        source=catalog.po, output=mo, status="up-to-date"
+                    )
+                    if self.check:
+                        # Checked in the compile pool, but not rebuilt.
+                        pending.append((catalog.po, mo, None))
+
+        from .check import CatalogCheckError
+
+        failures = []
+        self._check_failed.clear()
+        # Only msgfmt runs outside the interpreter; the builtin engines,
+        # translate-toolkit and the checks need processes to use more CPUs.
+        cpu_bound = self.check or self.validate or not self.msgfmt
+        with self.report.phase("compile"), worker_processes(
+            self.jobs if cpu_bound else 1, len(pending)
+        ) as processes:
+            self._processes = processes
+            try:
+                results = run_jobs(self._compile_job, pending, self.jobs)
+            finally:
+                self._processes = None
+        for result in results:
+            po, mo, _key = result.item
+            if result.error is None:
+                if result.value:
+                    self.outfiles.append(mo)
+                    manifest.record(mo, po, keys[mo])
+            elif isinstance(result.error, CatalogCheckError):
+                failures.append(str(result.error))
+                self.report.record(
+                    source=po,
+                    output=mo,
+                    status="check-failed",
+                    problems=result.error.problems,
+                )
+            else:
+                failures.append(f"{po}: {result.error}")
+                self.report.record(
+                    source=po,
+                    output=mo,
+                    status="failed",
+                    error=str(result.error),
+                )
+        if not self.dry_run:
+            manifest.save()
+        if self.outfiles:
+            gettext_state(self.distribution).forget_built_files(self.build_dir)
+        if self.shared_cache is not None and pending and not self.dry_run:
+            with self.report.phase("evict"):
+                self.shared_cache.evict()
+        if failures:
+            raise ExecError(
+                f"Failed to compile {len(failures)} gettext catalog(s):\n"
+                + "\n".join(failures)
+            )
+
+    def _compiler(self) -> str:
+        if self.msgfmt:
+            return "msgfmt"
         elif self.translate_toolkit:
-            from translate.tools.pocompile import convertmo
+            return "translate-toolkit"
+        return "builtin"
+
+    def _compiler_identity(self) -> str:
+        return compiler_identity(self._compiler(), self._msgfmt_path)
 
-            with open(po, "rb") as pofile, open(mo, "wb") as mofile:
-                convertmo(pofile, mofile, None)
+    def _compile_options(self) -> Dict[str, object]:
+        """Return the options that affect the contents of compiled files."""
+        return compile_options(
+            self._compiler(), bool(self.use_fuzzy), bool(self.optimize)
+        )
+
+    def _compile_job(self, job: Tuple[str, str, Optional[str]]) -> bool:
+        """Check and compile a single catalog.
+
+        A key of None means the output is up to date and the catalog only
+        needs checking. Returns whether the output was written.
+        """
+        from .cache import unshare_file
+        from .report import file_size
+
+        po, mo, key = job
+        assert self.report is not None
+        if self.check:
+            self._check_catalog(po)
+        if key is None:
+            return False
+        if self._check_failed.is_set():
+            # The build fails anyway; don't spend time compiling.
+            self.report.record(source=po, output=mo, status="skipped")
+            return False
+        start = time.perf_counter()
+        if self.dry_run:
+            # Only say what would happen, without touching the cache.
+            logging.info(f"Compile: {po} -> {mo}")
+            status = "compiled"
+        elif self.shared_cache is not None and self.shared_cache.fetch(
+            key, mo
+        ):
+            logging.info(f"Cached: {po} -> {mo}")
+            status = "cached"
         else:
+            unshare_file(mo)
+            logging.info(f"Compile: {po} -> {mo}")
+            self.compile_mo(po, mo)
+            if self.validate:
+                self._validate_mo(mo)
+            if self.shared_cache is not None and os.path.isfile(mo):
+                self.shared_cache.store(key, mo)
+            status = "compiled"
+        self.report.record(
+            source=po,
+            output=mo,
+            status=status,
+            seconds=time.perf_counter() - start,
+            bytes_in=file_size(po),
+            bytes_out=file_size(mo),
+        )
+        return True
+
+    def _check_catalog(self, po: str) -> None:
+        from .check import CatalogCheckError, check_catalog
+
+        try:
+            problems = call_in(
+                self._processes, check_catalog, po, bool(self.use_fuzzy)
+            )
+        except ValueError as e:
+            problems = [str(e)]
+        if problems:
+            self._check_failed.set()
+            raise CatalogCheckError(problems)
+
+    def _validate_mo(self, mo: str) -> None:
+        from .mo import MOFormatError, validate_mo
+
+        try:
+            call_in(self._processes, validate_mo, mo)
+        except (OSError, MOFormatError) as e:
+            # Don't leave a broken file behind that looks up to date.
+            if os.path.exists(mo):
+                os.unlink(mo)
+            raise ExecError(f"invalid output: {e}") from e
+
+    def compile_mo(self, po: str, mo: str):
+        if not (self.msgfmt or self.translate_toolkit or self.builtin):
             raise AssertionError("No gettext tools found!")
+        if self.dry_run:
+            # Current setuptools no longer makes spawn honour dry_run.
+            return
+        if self.msgfmt:
+            self.spawn(
+                msgfmt_args(po, mo, self._msgfmt_path, bool(self.use_fuzzy))
+            )
+        else:
+            call_in(
+                self._processes,
+                compile_catalog,
+                po,
+                mo,
+                self._compiler(),
+                self._msgfmt_path,
+                bool(self.use_fuzzy),
+                bool(self.optimize),
+            )
+
+    def _has_msgfmt(self) -> bool:
+        if getattr(self.distribution, "gettext_tool_paths", {}).get("msgfmt"):
+            return True
+        return has_msgfmt()
 
     def get_outputs(self):
         return self.outfiles
@@ -312,7 +801,12 @@ class build_mo(Command):
 class clean_mo(Command):
     description = "clean .mo files"
 
-    user_options = [("build-dir=", "d", "Directory to build locale files")]
+    user_options = [
+        ("build-dir=", "d", "Directory to build locale files"),
+        ("dry-run", "n", "Only show which files would be removed"),
+    ]
+
+    boolean_options = ["dry-run"]
 
     def initialize_options(self):
         self.build_dir = None
@@ -325,18 +819,74 @@ class clean_mo(Command):
             )
 
     def run(self):
+        """Remove the files build_mo wrote, and directories left empty.
+
+        The build manifest says which files those are. Build directories
+        without one (e.g. from older versions) fall back to removing all
+        ``<lang>/LC_MESSAGES/*.mo`` files.
+        """
         if not os.path.isdir(self.build_dir):
             return
-        for root, dirs, files in os.walk(self.build_dir):
-            for file_ in files:
-                if file_.endswith(".mo"):
-                    os.unlink(os.path.join(root, file_))
+        from .cache import BuildManifest
+
+        manifest = BuildManifest.load(self.build_dir)
+        if os.path.exists(manifest.path):
+            outputs = manifest.output_paths()
+        else:
+            outputs = gather_built_files(self.build_dir)
+        dirs = set()
+        for mo in outputs:
+            if os.path.lexists(mo):
+                logging.info(f"removing {mo}")
+                if not self.dry_run:
+                    os.unlink(mo)
+            manifest.discard(mo)
+            dirs.add(os.path.dirname(mo))
+        if self.dry_run:
+            return
+        manifest.save()
+        self._remove_empty_dirs(dirs)
+        gettext_state(self.distribution).forget_built_files(self.build_dir)
+
+    def _remove_empty_dirs(self, dirs: Set[str]) -> None:
+        root = os.path.abspath(self.build_dir)
+        # Deepest first, so LC_MESSAGES goes before its language directory.
+        for path in sorted(dirs, key=lambda d: d.count(os.sep), reverse=True):
+            path = os.path.abspath(path)
+            while path.startswith(root + os.sep):
+                try:
+                    os.rmdir(path)
+                except OSError:
+                    break
+                logging.info(f"removing {path}")
+                path = os.path.dirname(path)
 
 
 def gather_built_files(build_dir) -> List[str]:
-    import glob
-
-    return glob.glob(build_dir + "/*/LC_MESSAGES/*.mo")
+    """Return the ``<lang>/LC_MESSAGES/*.mo`` files in build_dir, sorted."""
+    built: List[str] = []
+    try:
+        langs = sorted(os.scandir(build_dir), key=lambda e: e.name)
+    except (FileNotFoundError, NotADirectoryError):
+        return built
+    for lang in langs:
+        if lang.name.startswith(".") or not lang.is_dir():
+            continue
+        try:
+            entries = os.scandir(os.path.join(lang.path, LC_MESSAGES))
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        with entries:
+            built.extend(
+                sorted(
+                    entry.path
+                    for entry in entries
+                    if entry.name.endswith(".mo")
+                    and not entry.name.startswith(".")
+                    and entry.is_file()
+                )
+            )
+    return built
 
 
 class install_mo(Command):
@@ -355,9 +905,19 @@ class install_mo(Command):
             "install everything relative to this alternate root directory",
         ),
         ("force", "f", "force installation (overwrite existing files)"),
+        (
+            "install-mode=",
+            None,
+            "how to install files: copy, hardlink, symlink or reflink",
+        ),
+        (
+            "sync",
+            None,
+            "only install changed files and remove stale ones",
+        ),
     ]
 
-    boolean_options = ["force"]
+    boolean_options = ["force", "sync"]
 
     build_dir: Optional[str]
 
@@ -370,6 +930,9 @@ class install_mo(Command):
         self.package_locale: Optional[Tuple[str, str, str]] = None
         self.root = None
         self.force = 0
+        self.install_mode: Optional[str] = None
+        self.sync: Optional[bool] = None
+        self.report: Optional[CommandReport] = None
 
     def finalize_options(self) -> None:
         if self.build_dir is None:
@@ -392,12 +955,46 @@ class install_mo(Command):
             ("root", "root"),
             ("force", "force"),
         )
+        if self.install_mode is None:
+            self.install_mode = getattr(
+                self.distribution,
+                "gettext_install_mode",
+                DEFAULT_INSTALL_MODE,
+            )
+        try:
+            self.install_mode = normalize_install_mode(self.install_mode)
+        except ValueError as e:
+            raise OptionError(str(e)) from e
+        if self.sync is None:
+            self.sync = getattr(
+                self.distribution, "gettext_install_sync", False
+            )
+        self.report = _command_report(self)
+        self.report.info["install_mode"] = self.install_mode
+        # Scan the build directory afresh for each install command, and
+        # share the result between get_inputs, run and get_outputs.
+        gettext_state(self.distribution).forget_built_files(self.build_dir)
 
     def run(self) -> None:
+        assert self.report is not None
+        try:
+            with self.report.phase("install"):
+                self._install_files()
+            if self.sync:
+                with self.report.phase("remove-stale"):
+                    self._remove_stale_files()
+        finally:
+            self.report.write()
+
+    def _install_files(self) -> None:
+        from .report import file_size
+
         assert self.install_dir is not None
+        assert self.report is not None
         self.mkpath(self.install_dir)
         assert self.build_dir is not None
-        for filepath in gather_built_files(self.build_dir):
+        state = gettext_state(self.distribution)
+        for filepath in state.gather_built_files(self.build_dir):
             langfile = os.path.relpath(filepath, self.build_dir)
             if self.install_layout == "package":
                 assert self.package_locale is not None
@@ -420,11 +1017,81 @@ class install_mo(Command):
 
             # Copy files, adding them to the list of output files.
             data = convert_path(filepath)
-            (out, _) = self.copy_file(data, dir)
+            start = time.perf_counter()
+            if self.sync:
+                out, copied = self._sync_file(data, dir)
+            else:
+                out, copied = self._install_file(data, dir)
             self.outfiles.append(out)
+            self.report.record(
+                source=data,
+                output=out,
+                status="installed" if copied else "unchanged",
+                seconds=time.perf_counter() - start,
+                bytes_out=file_size(out),
+            )
+
+    def _sync_file(self, src: str, dir: str) -> Tuple[str, bool]:
+        from .cache import files_identical
+
+        out = os.path.join(dir, os.path.basename(src))
+        if os.path.lexists(out):
+            if files_identical(src, out):
+                logging.debug(f"not copying {src} (unchanged)")
+                return (out, False)
+            if not self.dry_run:
+                os.unlink(out)
+        return self._install_file(src, dir)
+
+    def _remove_stale_files(self) -> None:
+        from .cache import InstallManifest
+
+        assert self.build_dir is not None
+        assert self.install_dir is not None
+        manifest = InstallManifest.load(self.build_dir)
+        key = os.path.abspath(self.install_dir)
+        current = [os.path.abspath(out) for out in self.outfiles]
+        for path in manifest.installs.get(key, []):
+            if path not in current and os.path.lexists(path):
+                logging.info(f"removing stale {path}")
+                if not self.dry_run:
+                    os.unlink(path)
+                assert self.report is not None
+                self.report.record(output=path, status="removed")
+        if not self.dry_run:
+            manifest.installs[key] = current
+            manifest.save()
+
+    def _install_file(self, src: str, dir: str) -> Tuple[str, bool]:
+        if self.install_mode == "reflink" and not self.dry_run:
+            from .install_layout import reflink_file
+
+            out = os.path.join(dir, os.path.basename(src))
+            if (
+                self.force
+                or not os.path.exists(out)
+                or os.path.getmtime(src) > os.path.getmtime(out)
+            ) and reflink_file(src, out):
+                logging.info(f"reflinking {src} -> {dir}")
+                return (out, True)
+        elif self.install_mode == "symlink":
+            src = os.path.abspath(src)
+            out = os.path.join(dir, os.path.basename(src))
+            if os.path.lexists(out) and not (
+                os.path.exists(out) and os.path.samefile(src, out)
+            ):
+                if not self.dry_run:
+                    os.unlink(out)
+            (out, copied) = self.copy_file(src, dir, link="sym")
+            return (out, bool(copied))
+        link = "hard" if self.install_mode == "hardlink" else None
+        (out, copied) = self.copy_file(src, dir, link=link)
+        return (out, bool(copied))
 
     def get_inputs(self):
-        return gather_built_files(self.build_dir)
+        return gettext_state(self.distribution).gather_built_files(
+            self.build_dir
+        )
 
     def get_outputs(self):
         return self.outfiles
@@ -433,76 +1100,276 @@ class install_mo(Command):
 class update_pot(Command):
     description: str = "update the .pot file"
 
-    user_options: List[Tuple[str, str, str]] = []  # type: ignore
+    user_options = [
+        ("force", "f", "re-extract all source files"),
+        ("jobs=", "j", "Number of source files to extract in parallel"),
+        (
+            "extractor=",
+            None,
+            "message extractor to use: auto, xgettext or builtin",
+        ),
+    ]
+
+    boolean_options = ["force"]
 
     def initialize_options(self) -> None:
-        pass
+        self.build_base: Optional[str] = None
+        self.force = None
+        self.jobs: Optional[int] = None
+        self.extractor: Optional[str] = None
+        self.include: List[str] = []
+        self.exclude: List[str] = []
+        self.report: Optional[CommandReport] = None
+        self._processes: Optional[Executor] = None
 
     def finalize_options(self) -> None:
-        pass
+        self.set_undefined_options("build", ("build_base", "build_base"))
+        self.include = getattr(
+            self.distribution, "gettext_extract_include", None
+        ) or _default_extract_include(self.distribution)
+        self.exclude = list(
+            getattr(self.distribution, "gettext_extract_exclude", [])
+        )
+        if self.build_base and not os.path.isabs(self.build_base):
+            # Never extract from our own build output.
+            self.exclude.append(
+                "/"
+                + os.path.normpath(self.build_base).replace(os.sep, "/")
+                + "/"
+            )
+        jobs = self.jobs
+        if jobs is None:
+            jobs = getattr(self.distribution, "gettext_jobs", DEFAULT_JOBS)
+        try:
+            self.jobs = normalize_jobs(jobs)
+            self.extractor = _normalize_extractor(
+                self.extractor
+                or getattr(
+                    self.distribution, "gettext_extractor", DEFAULT_EXTRACTOR
+                )
+            )
+        except ValueError as e:
+            raise OptionError(str(e)) from e
+        self.report = _command_report(self)
 
     def run(self) -> None:
-        # TODO(jelmer): Support pygettext3 as well
-        xgettext = find_executable("xgettext")
+        assert self.report is not None
+        try:
+            self._extract()
+        finally:
+            self.report.write()
+
+    def _extract(self) -> None:
+        from .cache import cache_key, file_digest
+        from .extract import (
+            BUILTIN_EXTRACTOR_VERSION,
+            EXTRACT_CACHE_DIR,
+            ExtractionCache,
+            find_sources,
+            merge_entries,
+            pot_header,
+            shard_files,
+            write_pot,
+        )
+        from .report import file_size
+
+        assert self.report is not None
+        assert self.build_base is not None
+        assert self.jobs is not None
+        xgettext = None
+        if self.extractor != "builtin":
+            xgettext = _tool_path(self.distribution, "xgettext")
+            if xgettext is None and self.extractor == "xgettext":
+                logging.error("GNU gettext xgettext utility not found!")
+                return
         if xgettext is None:
-            logging.error("GNU gettext xgettext utility not found!")
-            return
-        args = [xgettext]
-        args.extend(
-            [
-                "--package-name",
-                self.distribution.get_name(),
-                "--from-code",
-                "UTF-8",
-                "--sort-by-file",
-                "--add-comments=i18n:",
-                "-d",
-                self.distribution.get_name(),
-                "-p",
-                self.distribution.gettext_source_dir,  # type: ignore
-                "-o",
-                f"{self.distribution.get_name()}.pot",
+            identity = f"builtin {BUILTIN_EXTRACTOR_VERSION}"
+        else:
+            identity = f"xgettext {_tool_version(xgettext)}"
+        self.report.info["extractor"] = identity
+
+        with self.report.phase("collect"):
+            input_files = find_sources(
+                include=self.include, exclude=self.exclude
+            )
+        self.report.info["input_files"] = len(input_files)
+
+        cache = ExtractionCache.load(
+            os.path.join(self.build_base, EXTRACT_CACHE_DIR)
+        )
+        keys = {}
+        fragments = {}
+        pending = []
+        with self.report.phase("check"):
+            for path in input_files:
+                try:
+                    digest = file_digest(path)
+                except OSError as e:
+                    raise FileError(f"cannot read {path}: {e}") from e
+                keys[path] = cache_key(digest, identity, XGETTEXT_OPTIONS)
+                entries = None if self.force else cache.get(keys[path])
+                if entries is None:
+                    pending.append(path)
+                else:
+                    fragments[path] = entries
+                    self.report.record(source=path, status="cached")
+
+        failures = []
+        shards: List[Tuple[Optional[str], List[str], ExtractionCache]]
+        if xgettext is None:
+            shards = [(None, [path], cache) for path in pending]
+        else:
+            shards = [
+                (xgettext, shard, cache)
+                for shard in shard_files(pending, self.jobs)
             ]
+        with self.report.phase("extract"), worker_processes(
+            self.jobs if xgettext is None else 1, len(pending)
+        ) as processes:
+            self._processes = processes
+            try:
+                while shards:
+                    retry = []
+                    for result in run_jobs(
+                        self._extract_files, shards, self.jobs
+                    ):
+                        _xgettext, paths, _cache = result.item
+                        if result.error is not None and len(paths) > 1:
+                            # Find out which of the files xgettext choked on.
+                            retry.extend(paths)
+                            continue
+                        if result.error is not None:
+                            failures.append(f"{paths[0]}: {result.error}")
+                            self.report.record(
+                                source=paths[0],
+                                status="failed",
+                                error=str(result.error),
+                            )
+                            continue
+                        extracted, ambiguous = result.value
+                        retry.extend(ambiguous)
+                        for path, entries in extracted.items():
+                            fragments[path] = entries
+                            if not self.dry_run:
+                                cache.put(keys[path], entries)
+                            self.report.record(
+                                source=path,
+                                status="extracted",
+                                messages=len(entries),
+                            )
+                    shards = [(xgettext, [path], cache) for path in retry]
+            finally:
+                self._processes = None
+        if failures:
+            raise ExecError(
+                f"Failed to extract messages from {len(failures)} file(s):\n"
+                + "\n".join(failures)
+            )
+
+        with self.report.phase("merge"):
+            # Merge in byte order of the paths, like xgettext --sort-by-file
+            # (a directory sorts after files that share its prefix).
+            entries = merge_entries(
+                (path, fragments[path])
+                for path in sorted(input_files, key=os.fsencode)
+            )
+        name = self.distribution.get_name()
+        source_dir = self.distribution.gettext_source_dir  # type: ignore
+        pot = os.path.join(source_dir, f"{name}.pot")
+        if self.dry_run:
+            return
+        self.mkpath(source_dir)
+        header = pot_header(name, self.distribution.get_contact(), entries)
+        with self.report.phase("write"):
+            written = write_pot(pot, header, entries)
+        if written:
+            logging.info(f"writing {pot}")
+            clear_catalog_index()
+        else:
+            logging.info(f"not writing {pot} (unchanged)")
+        cache.save(keys)
+        self.report.record(
+            output=pot,
+            status="written" if written else "unchanged",
+            bytes_out=file_size(pot),
         )
 
-        input_files = []
-        for root, _dirs, files in os.walk("."):
-            for file_ in files:
-                if file_.endswith(".py"):
-                    input_files.append(os.path.join(root, file_))
-        args.extend(input_files)
+    def _extract_files(
+        self, job: Tuple[Optional[str], List[str], "ExtractionCache"]
+    ) -> Tuple[Dict[str, list], List[str]]:
+        from .extract import extract_python, split_entries
+        from .po import iter_po
 
-        pot_path = os.path.join(
-            self.distribution.gettext_source_dir,  # type: ignore
-            self.distribution.get_name(),  # type: ignore
+        xgettext, paths, cache = job
+        if xgettext is None:
+            return {
+                path: call_in(self._processes, extract_python, path)
+                for path in paths
+            }, []
+        os.makedirs(cache.path, exist_ok=True)
+        tmp = os.path.join(
+            cache.path, f"{os.getpid()}.{threading.get_ident()}.pot"
         )
-        if os.path.exists(pot_path):
-            args.append("--join")
-        if self.distribution.get_contact():
-            args += ["--msgid-bugs-address", self.distribution.get_contact()]
-
-        self.spawn(args)
+        self.spawn([xgettext, *XGETTEXT_ARGS, "-o", tmp, *paths])
+        try:
+            entries = list(iter_po(tmp))
+        except FileNotFoundError:
+            # xgettext does not write anything if there are no messages
+            entries = []
+        else:
+            os.unlink(tmp)
+        return split_entries(entries, paths)
 
 
 def has_gettext(command) -> bool:
     source_dir = _resolve_source_dir(command.distribution)
-    return os.path.isdir(source_dir)
+    return catalog_index(source_dir).exists
+
+
+_pyproject_cache: Dict[str, Tuple[Tuple[int, int], dict]] = {}
 
 
 def _load_pyproject_toml(path: str = "pyproject.toml") -> dict:
+    """Load the [tool.setuptools-gettext] table from a pyproject.toml file.
+
+    Results are cached per process, keyed by the resolved path and the
+    file's modification time and size.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    key = os.path.realpath(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _pyproject_cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
     if sys.version_info[:2] >= (3, 11):
         from tomllib import load as toml_load
     else:
         from tomli import load as toml_load
     try:
         with open(path, "rb") as f:
-            return toml_load(f).get("tool", {}).get("setuptools-gettext") or {}
+            cfg = toml_load(f).get("tool", {}).get("setuptools-gettext") or {}
     except FileNotFoundError:
         return {}
+    _pyproject_cache[key] = (stamp, cfg)
+    return cfg
+
+
+def clear_pyproject_cache() -> None:
+    """Forget all cached pyproject.toml configuration."""
+    _pyproject_cache.clear()
 
 
-def pyprojecttoml_config(dist: Distribution) -> None:
-    load_pyproject_config(dist, _load_pyproject_toml())
+def pyprojecttoml_config(dist: "Distribution") -> None:
+    cfg = _load_pyproject_toml()
+    load_pyproject_config(dist, cfg)
+    source_dir = dist.gettext_source_dir  # type: ignore
+    if not cfg and not catalog_index(source_dir).exists:
+        # Nothing to build; avoid loading the build, clean and install
+        # command classes for projects that don't use gettext.
+        return
 
     build = dist.get_command_class("build")
     _insert_sub_command(build, "build_mo", has_gettext, before="build_py")
@@ -512,7 +1379,8 @@ def pyprojecttoml_config(dist: Distribution) -> None:
     _insert_sub_command(install, "install_mo", has_gettext)
 
 
-def load_pyproject_config(dist: Distribution, cfg) -> None:
+def load_pyproject_config(dist: "Distribution", cfg) -> None:
+    dist.gettext_state = GettextState()  # type: ignore
     dist.gettext_source_dir_configured = (  # type: ignore
         bool(cfg.get("source_dir"))
     )
@@ -531,6 +1399,85 @@ def load_pyproject_config(dist: Distribution, cfg) -> None:
     dist.gettext_install_layout = normalize_install_layout(  # type: ignore
         cfg.get("install_layout", DEFAULT_INSTALL_LAYOUT)
     )
+    dist.gettext_install_mode = normalize_install_mode(  # type: ignore
+        cfg.get("install_mode", DEFAULT_INSTALL_MODE)
+    )
+    dist.gettext_install_sync = bool(  # type: ignore
+        cfg.get("install_sync", False)
+    )
+    dist.gettext_report = cfg.get("report")  # type: ignore
+    dist.gettext_jobs = normalize_jobs(  # type: ignore
+        cfg.get("jobs", DEFAULT_JOBS)
+    )
+    dist.gettext_tool_paths = {  # type: ignore
+        tool: os.path.expanduser(cfg[f"{tool}_path"])
+        for tool in GETTEXT_TOOLS
+        if cfg.get(f"{tool}_path")
+    }
+    dist.gettext_validate = bool(cfg.get("validate", False))  # type: ignore
+    dist.gettext_check = bool(cfg.get("check", False))  # type: ignore
+    dist.gettext_use_fuzzy = bool(cfg.get("use_fuzzy", False))  # type: ignore
+    dist.gettext_optimize = bool(cfg.get("optimize", False))  # type: ignore
+    dist.gettext_extractor = _normalize_extractor(  # type: ignore
+        cfg.get("extractor", DEFAULT_EXTRACTOR)
+    )
+    dist.gettext_extract_include = _glob_list(  # type: ignore
+        cfg, "extract_include"
+    )
+    dist.gettext_extract_exclude = (  # type: ignore
+        _glob_list(cfg, "extract_exclude") or []
+    )
+    dist.gettext_cache_dir = cfg.get("cache_dir")  # type: ignore
+    cache_size = cfg.get("cache_size")
+    if cache_size is not None:
+        from .cache import parse_size
+
+        cache_size = parse_size(cache_size)
+    dist.gettext_cache_size = cache_size  # type: ignore
+
+
+def _normalize_extractor(extractor) -> str:
+    if extractor is None:
+        return DEFAULT_EXTRACTOR
+    if isinstance(extractor, str):
+        extractor = extractor.strip().lower()
+    if extractor not in VALID_EXTRACTORS:
+        raise ValueError(
+            "Unsupported setuptools-gettext extractor "
+            f"{extractor!r}; expected one of: {', '.join(VALID_EXTRACTORS)}"
+        )
+    return extractor
+
+
+def _glob_list(cfg, key: str) -> Optional[List[str]]:
+    value = cfg.get(key)
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(
+        isinstance(item, str) for item in value
+    ):
+        raise ValueError(
+            f"Unsupported setuptools-gettext {key} {value!r}; "
+            "expected a list of glob patterns"
+        )
+    return value
+
+
+def _default_extract_include(dist: "Distribution") -> List[str]:
+    """Globs matching the Python sources of the distribution."""
+    include = []
+    for package in getattr(dist, "packages", None) or []:
+        package_dir = _get_package_dir(dist, package).replace(os.sep, "/")
+        include.append(f"{package_dir}/*.py" if package_dir else "*.py")
+    for module in getattr(dist, "py_modules", None) or []:
+        package, _, name = module.rpartition(".")
+        package_dir = _get_package_dir(dist, package).replace(os.sep, "/")
+        include.append(
+            f"{package_dir}/{name}.py" if package_dir else f"{name}.py"
+        )
+    return include or ["**/*.py"]
 
 
 def _normalize_compiler(compiler) -> str:
@@ -567,18 +1514,34 @@ def find_source_files(dirname: str = "") -> List[str]:
     source_dir_path = (
         os.path.join(dirname, source_dir) if dirname else source_dir
     )
-    if not os.path.isdir(source_dir_path):
-        return []
-
-    found = []
-    for root, _dirs, files in os.walk(source_dir_path):
-        for name in files:
-            if name.endswith((".po", ".pot")):
-                found.append(os.path.join(root, name))
-    return found
+    return list(catalog_index(source_dir_path).source_files)
+
+
+_executable_cache: Dict[Tuple[str, str, str], Optional[str]] = {}
 
 
 def find_executable(executable):
+    """Find an executable on PATH.
+
+    Results are cached per process, keyed by the name, PATH and the
+    current directory.
+    """
+    path = os.environ.get("PATH", os.defpath)
+    key = (executable, path, os.getcwd())
+    try:
+        return _executable_cache[key]
+    except KeyError:
+        pass
+    found = _find_executable(executable, path)
+    _executable_cache[key] = found
+    return found
+
+
+def clear_executable_cache() -> None:
+    _executable_cache.clear()
+
+
+def _find_executable(executable: str, path: str) -> Optional[str]:
     _, ext = os.path.splitext(executable)
     if sys.platform == "win32" and ext != ".exe":
         executable = executable + ".exe"
@@ -586,8 +1549,6 @@ def find_executable(executable):
     if os.path.isfile(executable):
         return executable
 
-    path = os.environ.get("PATH", os.defpath)
-
     # PATH='' doesn't match, whereas PATH=':' looks in the current directory
     if not path:
         return None
@@ -0,0 +1,290 @@
+#
+# Copyright (C) 2026 Jelmer Vernooĳ <jelmer@jelmer.uk>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA 02110-1301 USA
+
+"""Content based caching of compiled gettext catalogs."""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+MANIFEST_NAME = ".setuptools-gettext-cache.json"
+INSTALL_MANIFEST_NAME = ".setuptools-gettext-install.json"
+MANIFEST_VERSION = 1
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_key(digest: str, compiler: str, options: Dict[str, object]) -> str:
+    """Combine a source digest with everything else affecting the output."""
+    data = json.dumps([digest, compiler, options], sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def files_identical(a: str, b: str) -> bool:
+    """Check whether two files have the same contents."""
+    try:
+        if os.path.samefile(a, b):
+            return True
+        if os.path.getsize(a) != os.path.getsize(b):
+            return False
+    except OSError:
+        return False
+    return file_digest(a) == file_digest(b)
+
+
+def unshare_file(path: str) -> None:
+    """Remove path if it has other hard links, so rewriting leaves them alone.
+
+    Outputs fetched from the shared cache or installed with hard links share
+    their inode with another file; compilers truncate and write in place.
+    """
+    try:
+        if os.stat(path).st_nlink > 1:
+            os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return None
+    return data
+
+
+def _write_json(path: str, data: dict) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+@dataclass
+class BuildManifest:
+    """Record of the catalogs build_mo compiled into a build directory.
+
+    Entries are keyed by the path of the MO file relative to the build
+    directory, so that the manifest stays valid if the tree is moved or
+    restored from a CI cache with different modification times.
+    """
+
+    build_dir: str
+    outputs: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    dirty: bool = False
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.build_dir, MANIFEST_NAME)
+
+    @classmethod
+    def load(cls, build_dir: str) -> "BuildManifest":
+        manifest = cls(build_dir)
+        data = _read_json(manifest.path)
+        if data is not None and isinstance(data.get("outputs"), dict):
+            manifest.outputs = data["outputs"]
+        return manifest
+
+    def _name(self, mo: str) -> str:
+        return os.path.relpath(mo, self.build_dir).replace(os.sep, "/")
+
+    def get(self, mo: str) -> Optional[Dict[str, str]]:
+        return self.outputs.get(self._name(mo))
+
+    def is_current(self, mo: str, key: str) -> Optional[bool]:
+        """Check whether mo was built from the inputs identified by key.
+
+        Returns None if the manifest has no record of mo.
+        """
+        entry = self.get(mo)
+        if entry is None:
+            return None
+        return entry.get("key") == key and os.path.exists(mo)
+
+    def record(self, mo: str, po: str, key: str) -> None:
+        self.outputs[self._name(mo)] = {"key": key, "source": po}
+        self.dirty = True
+
+    def discard(self, mo: str) -> None:
+        if self.outputs.pop(self._name(mo), None) is not None:
+            self.dirty = True
+
+    def output_paths(self) -> List[str]:
+        """Return the paths of all recorded outputs, sorted."""
+        return [
+            os.path.join(self.build_dir, *name.split("/"))
+            for name in sorted(self.outputs)
+        ]
+
+    def save(self) -> None:
+        """Write the manifest, or remove it once it records nothing."""
+        if not self.dirty:
+            return
+        if self.outputs:
+            _write_json(
+                self.path,
+                {"version": MANIFEST_VERSION, "outputs": self.outputs},
+            )
+        elif os.path.exists(self.path):
+            os.unlink(self.path)
+        self.dirty = False
+
+
+@dataclass
+class InstallManifest:
+    """Record of the files install_mo installed, per install directory.
+
+    This is stored next to the build manifest and allows install_mo to
+    remove catalogs it installed earlier but that are no longer built.
+    """
+
+    build_dir: str
+    installs: Dict[str, List[str]] = field(default_factory=dict)
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.build_dir, INSTALL_MANIFEST_NAME)
+
+    @classmethod
+    def load(cls, build_dir: str) -> "InstallManifest":
+        manifest = cls(build_dir)
+        data = _read_json(manifest.path)
+        if data is not None and isinstance(data.get("installs"), dict):
+            manifest.installs = data["installs"]
+        return manifest
+
+    def save(self) -> None:
+        _write_json(
+            self.path,
+            {"version": MANIFEST_VERSION, "installs": self.installs},
+        )
+
+
+CACHE_DIR_ENV = "SETUPTOOLS_GETTEXT_CACHE_DIR"
+CACHE_SIZE_ENV = "SETUPTOOLS_GETTEXT_CACHE_SIZE"
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024
+
+_SIZE_SUFFIXES = {"k": 1024, "m": 1024**2, "g": 1024**3}
+
+
+def parse_size(size) -> int:
+    """Parse a size in bytes, optionally with a K, M or G suffix."""
+    if isinstance(size, int) and not isinstance(size, bool):
+        value = size
+    elif isinstance(size, str) and size.strip():
+        text = size.strip().lower().rstrip("b")
+        multiplier = _SIZE_SUFFIXES.get(text[-1:], 1)
+        if multiplier != 1:
+            text = text[:-1]
+        try:
+            value = int(float(text) * multiplier)
+        except ValueError:
+            value = -1
+    else:
+        value = -1
+    if value < 0:
+        raise ValueError(
+            f"Unsupported setuptools-gettext cache_size {size!r}; "
+            "expected a number of bytes, optionally with a K, M or G suffix"
+        )
+    return value
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+@dataclass
+class SharedCache:
+    """Compiled MO files shared between builds, like ccache.
+
+    Entries are stored by cache key, so identical sources compiled with the
+    same compiler are only compiled once across projects. The least
+    recently used entries are evicted once the cache exceeds max_size.
+    """
+
+    path: str
+    max_size: int = DEFAULT_CACHE_SIZE
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], f"{key}.mo")
+
+    def fetch(self, key: str, mo: str) -> bool:
+        entry = self._entry(key)
+        try:
+            _link_or_copy(entry, mo)
+        except FileNotFoundError:
+            return False
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return True
+
+    def store(self, key: str, mo: str) -> None:
+        entry = self._entry(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(mo, tmp)
+        os.replace(tmp, entry)
+
+    def evict(self) -> None:
+        entries = []
+        total = 0
+        try:
+            subdirs = list(os.scandir(self.path))
+        except FileNotFoundError:
+            return
+        for subdir in subdirs:
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if not entry.name.endswith(".mo"):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        entries.sort()
+        while total > self.max_size and entries:
+            _mtime, size, path = entries.pop(0)
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
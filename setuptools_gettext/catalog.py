@@ -20,12 +20,14 @@
 """Gettext catalog discovery helpers."""
 
 import os
-from dataclasses import dataclass
-from glob import glob
-from typing import List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
 
 LC_MESSAGES = "LC_MESSAGES"
 
+# Directories that never hold catalogs, but may be large.
+_SKIPPED_DIRS = frozenset(["__pycache__", "build", "dist", "node_modules"])
+
 
 @dataclass(frozen=True)
 class Catalog:
@@ -35,99 +37,144 @@ class Catalog:
     uses_output_base: bool
 
 
+@dataclass
+class CatalogIndex:
+    """Gettext source files found in a single walk of a source directory.
+
+    Attributes:
+        exists: Whether the source directory exists.
+        flat: Maps languages to flat ``<lang>.po`` catalogs.
+        standard: Maps languages to the ``(domain, po)`` pairs of catalogs
+            in ``<lang>/LC_MESSAGES/<domain>.po``, sorted by path.
+        source_files: All ``.po`` and ``.pot`` files in the directory and
+            the ``<lang>`` and ``<lang>/LC_MESSAGES`` directories below it.
+        dirs: The directories walked, starting with the directory itself.
+    """
+
+    source_dir: str
+    exists: bool = False
+    flat: Dict[str, str] = field(default_factory=dict)
+    standard: Dict[str, List[Tuple[str, str]]] = field(default_factory=dict)
+    source_files: List[str] = field(default_factory=list)
+    dirs: List[str] = field(default_factory=list)
+
+    def _scan(self, path: str, parts: Tuple[str, ...]) -> None:
+        entries = sorted(os.scandir(path), key=lambda e: e.name)
+        self.dirs.append(path)
+        for entry in entries:
+            # Only walk as deep as <lang>/LC_MESSAGES, skipping hidden
+            # directories and build trees; follow symlinks like the glob
+            # patterns this replaces.
+            if entry.is_dir():
+                if len(parts) < 2 and not _skip_dir(entry.name):
+                    self._scan(entry.path, parts + (entry.name,))
+            elif entry.name.endswith((".po", ".pot")):
+                self._add(entry.path, parts, entry.name)
+
+    def _add(self, path: str, parts: Tuple[str, ...], name: str) -> None:
+        self.source_files.append(path)
+        if not name.endswith(".po") or name.startswith("."):
+            return
+        if not parts:
+            self.flat[name[:-3]] = path
+        elif len(parts) == 2 and parts[1] == LC_MESSAGES:
+            self.standard.setdefault(parts[0], []).append((name[:-3], path))
+
+
+def _skip_dir(name: str) -> bool:
+    return (
+        name.startswith(".")
+        or name in _SKIPPED_DIRS
+        or name.endswith(".egg-info")
+    )
+
+
+_catalog_indexes: Dict[Tuple[str, str], CatalogIndex] = {}
+
+
+def catalog_index(source_dir: Union[str, os.PathLike]) -> CatalogIndex:
+    """Return the (cached) catalog index for source_dir.
+
+    The directory is walked at most once per process; call
+    clear_catalog_index() after changing its contents.
+    """
+    path = os.fspath(source_dir)
+    key = (os.path.abspath(path), path)
+    index = _catalog_indexes.get(key)
+    if index is None:
+        index = CatalogIndex(path)
+        try:
+            index._scan(path, ())
+        except (FileNotFoundError, NotADirectoryError):
+            pass
+        else:
+            index.exists = True
+        _catalog_indexes[key] = index
+    return index
+
+
+def clear_catalog_index(
+    source_dir: Optional[Union[str, os.PathLike]] = None,
+) -> None:
+    """Forget the cached catalog index for source_dir, or for all dirs."""
+    if source_dir is None:
+        _catalog_indexes.clear()
+        return
+    path = os.path.abspath(os.fspath(source_dir))
+    for key in [key for key in _catalog_indexes if key[0] == path]:
+        del _catalog_indexes[key]
+
+
 def lang_from_dir(source_dir: os.PathLike) -> List[str]:
-    lang: List[str] = []
-    if not os.path.isdir(source_dir):
-        return lang
-    for i in os.listdir(source_dir):
-        if i.endswith(".po") and not i.startswith("."):
-            lang.append(i[:-3])
-    return lang
+    return list(catalog_index(source_dir).flat)
 
 
 def parse_lang(lang: str) -> List[str]:
     return [i.strip() for i in lang.split(",") if i.strip()]
 
 
-def _flat_catalogs_from_dir(source_dir: os.PathLike) -> List[Catalog]:
-    return [
-        Catalog(
-            lang=lang,
-            domain=lang,
-            po=os.path.join(source_dir, f"{lang}.po"),
-            uses_output_base=True,
-        )
-        for lang in lang_from_dir(source_dir)
-    ]
+def _flat_catalog(lang: str, po: str) -> Catalog:
+    return Catalog(lang=lang, domain=lang, po=po, uses_output_base=True)
 
 
-def _standard_catalogs_from_dir(source_dir: os.PathLike) -> List[Catalog]:
-    catalogs = []
-    pattern = os.path.join(source_dir, "*", LC_MESSAGES, "*.po")
-    for po in glob(pattern):
-        lang = os.path.basename(os.path.dirname(os.path.dirname(po)))
-        domain = os.path.splitext(os.path.basename(po))[0]
-        catalogs.append(
-            Catalog(
-                lang=lang,
-                domain=domain,
-                po=po,
-                uses_output_base=False,
-            )
-        )
-    return catalogs
+def _standard_catalogs(index: CatalogIndex, lang: str) -> List[Catalog]:
+    return [
+        Catalog(lang=lang, domain=domain, po=po, uses_output_base=False)
+        for domain, po in index.standard.get(lang, [])
+    ]
 
 
 def discover_catalogs(
-    source_dir: os.PathLike, lang: Optional[List[str]] = None
+    source_dir: Union[str, os.PathLike],
+    lang: Optional[List[str]] = None,
 ) -> List[Catalog]:
+    index = catalog_index(source_dir)
     if lang is None:
-        catalogs = _flat_catalogs_from_dir(source_dir)
-        catalogs.extend(_standard_catalogs_from_dir(source_dir))
+        catalogs = [
+            _flat_catalog(language, po) for language, po in index.flat.items()
+        ]
+        for language in index.standard:
+            catalogs.extend(_standard_catalogs(index, language))
         return sorted(catalogs, key=lambda catalog: catalog.po)
 
     catalogs = []
     for language in lang:
-        found = False
-        flat_po = os.path.join(source_dir, f"{language}.po")
-        if os.path.isfile(flat_po):
-            found = True
-            catalogs.append(
-                Catalog(
-                    lang=language,
-                    domain=language,
-                    po=flat_po,
-                    uses_output_base=True,
-                )
-            )
-
-        pattern = os.path.join(source_dir, language, LC_MESSAGES, "*.po")
-        for po in sorted(glob(pattern)):
-            found = True
-            catalogs.append(
-                Catalog(
-                    lang=language,
-                    domain=os.path.splitext(os.path.basename(po))[0],
-                    po=po,
-                    uses_output_base=False,
-                )
-            )
-
-        if not found:
+        standard = _standard_catalogs(index, language)
+        flat_po = index.flat.get(language)
+        if flat_po is not None or not standard:
             catalogs.append(
-                Catalog(
-                    lang=language,
-                    domain=language,
-                    po=flat_po,
-                    uses_output_base=True,
+                _flat_catalog(
+                    language,
+                    flat_po
+                    or os.path.join(os.fspath(source_dir), f"{language}.po"),
                 )
             )
+        catalogs.extend(standard)
     return catalogs
 
 
 def has_standard_catalogs(source_dir: str) -> bool:
-    pattern = os.path.join(source_dir, "*", LC_MESSAGES, "*.po")
-    return bool(glob(pattern))
+    return bool(catalog_index(source_dir).standard)
 
 
 def mo_basename(name: str) -> str:
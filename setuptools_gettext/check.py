@@ -0,0 +1,253 @@
+#
+# Copyright (C) 2026 Jelmer Vernooĳ <jelmer@jelmer.uk>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA 02110-1301 USA
+
+"""Consistency checks for PO catalogs, similar to ``msgfmt --check``."""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from .po import POEntry, iter_po
+
+# Header fields msgfmt --check-header requires, with the initial value
+# msginit/xgettext put there, if any.
+REQUIRED_HEADER_FIELDS = {
+    "Project-Id-Version": "PACKAGE VERSION",
+    "PO-Revision-Date": "YEAR-MO-DA",
+    "Last-Translator": "FULL NAME",
+    "Language-Team": "LANGUAGE",
+    "MIME-Version": None,
+    "Content-Type": "text/plain; charset=CHARSET",
+    "Content-Transfer-Encoding": "ENCODING",
+}
+
+_FORMAT_RES = {
+    "python-format": re.compile(
+        r"%(?:\((?P<name>[^)]*)\))?[#0 +-]*(?:\*|\d+)?(?:\.(?:\*|\d+))?"
+        r"[hlL]?(?P<conversion>[diouxXeEfFgGcrsa%])"
+    ),
+    "c-format": re.compile(
+        r"%(?:(?P<name>\d+)\$)?[-+ #0']*(?:\*|\d+)?(?:\.(?:\*|\d+))?"
+        r"(?:hh|h|ll|l|L|q|j|z|t)?(?P<conversion>[diouxXeEfFgGaAcspn%])"
+    ),
+}
+
+# Conversions that accept the same kind of argument.
+_ARGUMENT_TYPES = {
+    **dict.fromkeys("diouxX", "integer"),
+    **dict.fromkeys("eEfFgGaA", "float"),
+    **dict.fromkeys("sra", "string"),
+    "c": "character",
+    "p": "pointer",
+    "n": "count",
+}
+
+_NPLURALS_RE = re.compile(r"nplurals\s*=\s*(\d+)")
+_PLURAL_RE = re.compile(r"plural\s*=\s*([^;]+);?")
+
+
+class CatalogCheckError(ValueError):
+    """A catalog failed its consistency checks."""
+
+    def __init__(self, problems: List[str]) -> None:
+        """Create an error for problems, one "path:line: message" each."""
+        super().__init__("\n".join(problems))
+        self.problems = problems
+
+
+def _format_arguments(flag: str, s: str) -> Tuple[List[str], Dict[str, str]]:
+    """Return the positional and named argument types s consumes."""
+    positional: List[str] = []
+    named: Dict[str, str] = {}
+    for m in _FORMAT_RES[flag].finditer(s):
+        conversion = m.group("conversion")
+        if conversion == "%":
+            continue
+        kind = _ARGUMENT_TYPES.get(conversion, conversion)
+        if m.group("name") is not None:
+            named[m.group("name")] = kind
+        else:
+            positional.append(kind)
+    if flag == "c-format":
+        # Translations may reorder C arguments with %1$s; number the
+        # unnumbered ones so both forms compare equal.
+        for i, kind in enumerate(positional, 1):
+            named[str(i)] = kind
+        positional = []
+    return positional, named
+
+
+def _check_format(
+    flag: str, msgid: str, msgstr: str, allow_omissions: bool
+) -> Optional[str]:
+    """Compare the format directives of msgid and one translation.
+
+    Plural translations may leave out arguments (e.g. "one file" for
+    "%d files"), which is what allow_omissions is for.
+    """
+    id_positional, id_named = _format_arguments(flag, msgid)
+    str_positional, str_named = _format_arguments(flag, msgstr)
+    for name, kind in str_named.items():
+        if name not in id_named:
+            return f"argument {name!r} doesn't exist in msgid"
+        if id_named[name] != kind:
+            return f"format specifications for argument {name!r} differ"
+    if not allow_omissions:
+        for name in id_named:
+            if name not in str_named:
+                return f"argument {name!r} is missing in msgstr"
+    if str_positional != id_positional:
+        if (
+            allow_omissions
+            and str_positional == id_positional[: len(str_positional)]
+        ):
+            return None
+        if len(str_positional) != len(id_positional):
+            return (
+                f"number of format specifications in msgid and msgstr "
+                f"does not match ({len(id_positional)} != "
+                f"{len(str_positional)})"
+            )
+        return "format specifications in msgid and msgstr are not the same"
+    return None
+
+
+def _header_fields(entry: POEntry) -> Dict[str, str]:
+    fields = {}
+    text = entry.msgstr[0].decode("utf-8", "replace") if entry.msgstr else ""
+    for line in text.split("\n"):
+        name, sep, value = line.partition(":")
+        if sep:
+            fields[name.strip()] = value.strip()
+    return fields
+
+
+def _check_header(
+    path: str, entry: POEntry
+) -> Tuple[List[str], Optional[int]]:
+    """Check the header entry, returning problems and nplurals."""
+    problems = []
+    fields = _header_fields(entry)
+    if not entry.fuzzy:
+        for name, default in REQUIRED_HEADER_FIELDS.items():
+            value = fields.get(name)
+            if value is None:
+                problems.append(
+                    f"{path}:{entry.lineno}: header field {name!r} missing"
+                )
+            elif default is not None and value.startswith(default):
+                problems.append(
+                    f"{path}:{entry.lineno}: header field {name!r} still has "
+                    "the initial default value"
+                )
+    nplurals = None
+    plural_forms = fields.get("Plural-Forms")
+    if plural_forms is not None:
+        nplurals_match = _NPLURALS_RE.search(plural_forms)
+        plural_match = _PLURAL_RE.search(plural_forms)
+        if nplurals_match is None or plural_match is None:
+            problems.append(
+                f"{path}:{entry.lineno}: invalid Plural-Forms header "
+                f"{plural_forms!r}"
+            )
+        else:
+            import gettext
+
+            nplurals = int(nplurals_match.group(1))
+            try:
+                plural = gettext.c2py(plural_match.group(1).strip())
+            except ValueError:
+                problems.append(
+                    f"{path}:{entry.lineno}: invalid plural expression "
+                    f"{plural_match.group(1).strip()!r}"
+                )
+            else:
+                if nplurals < 1:
+                    problems.append(
+                        f"{path}:{entry.lineno}: nplurals must be positive"
+                    )
+                elif any(plural(n) >= nplurals for n in range(1000)):
+                    problems.append(
+                        f"{path}:{entry.lineno}: plural expression can "
+                        f"produce values not smaller than nplurals "
+                        f"({nplurals})"
+                    )
+    return problems, nplurals
+
+
+def check_catalog(path: str, use_fuzzy: bool = False) -> List[str]:
+    """Check the PO file at path, returning a list of problems.
+
+    The header, the number of plural forms and the format strings of
+    entries flagged python-format or c-format are checked. Only entries
+    that would be compiled are looked at, so untranslated and (unless
+    use_fuzzy is set) fuzzy entries are ignored. Each problem is a
+    "path:line: message" string.
+    """
+    problems: List[str] = []
+    header_seen = False
+    nplurals: Optional[int] = None
+    plural_line: Optional[int] = None
+    for entry in iter_po(path):
+        if entry.is_header:
+            header_seen = True
+            header_problems, nplurals = _check_header(path, entry)
+            problems.extend(header_problems)
+            continue
+        if not entry.msgstr or not entry.msgstr[0]:
+            continue
+        if entry.fuzzy and not use_fuzzy:
+            continue
+        if entry.msgid_plural is not None:
+            if plural_line is None:
+                plural_line = entry.lineno
+            if nplurals is not None and len(entry.msgstr) != nplurals:
+                problems.append(
+                    f"{path}:{entry.lineno}: nplurals is {nplurals}, but "
+                    f"the message has {len(entry.msgstr)} plural forms"
+                )
+        for flag in _FORMAT_RES:
+            if flag not in entry.flags:
+                continue
+            msgid = entry.msgid.decode("utf-8", "replace")
+            for i, msgstr in enumerate(entry.msgstr):
+                original = msgid
+                if entry.msgid_plural is not None and i > 0:
+                    original = entry.msgid_plural.decode("utf-8", "replace")
+                problem = _check_format(
+                    flag,
+                    original,
+                    msgstr.decode("utf-8", "replace"),
+                    allow_omissions=entry.msgid_plural is not None,
+                )
+                if problem is not None:
+                    label = (
+                        "msgstr"
+                        if entry.msgid_plural is None
+                        else f"msgstr[{i}]"
+                    )
+                    problems.append(
+                        f"{path}:{entry.lineno}: {flag}: {label}: {problem}"
+                    )
+    if not header_seen:
+        problems.append(f"{path}: header entry missing")
+    elif plural_line is not None and nplurals is None:
+        problems.append(
+            f"{path}:{plural_line}: message catalog has plural form "
+            "translations, but lacks a Plural-Forms header"
+        )
+    return problems
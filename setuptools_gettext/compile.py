@@ -0,0 +1,364 @@
+#
+# Copyright (C) 2026 Jelmer Vernooĳ <jelmer@jelmer.uk>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA 02110-1301 USA
+
+"""Compiling catalogs without a setuptools distribution.
+
+build_mo uses the same engines, output paths and build manifest, so the
+two can be used on the same build directory interchangeably.
+"""
+
+import os
+import subprocess
+import time
+from dataclasses import dataclass
+from typing import (
+    AsyncIterator,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+from setuptools.errors import ExecError
+
+from .catalog import (
+    LC_MESSAGES,
+    Catalog,
+    clear_catalog_index,
+    discover_catalogs,
+    mo_basename,
+)
+from .jobs import DEFAULT_JOBS, call_in, iter_jobs, worker_processes
+
+DEFAULT_OUTPUT_BASE = "messages"
+
+
+@dataclass
+class CompileResult:
+    """Outcome of compiling a single catalog.
+
+    Attributes:
+        catalog: The catalog that was compiled.
+        mo: Path of the compiled file.
+        status: "compiled", "up-to-date" or "failed".
+        error: The exception that made compilation fail, if any.
+        seconds: Time spent compiling.
+    """
+
+    catalog: Catalog
+    mo: str
+    status: str
+    error: Optional[Exception] = None
+    seconds: float = 0.0
+
+
+def mo_path(
+    build_dir: str,
+    catalog: Catalog,
+    output_base: str = DEFAULT_OUTPUT_BASE,
+    override: bool = False,
+) -> str:
+    """Return the path catalog compiles to below build_dir.
+
+    Flat ``<lang>.po`` catalogs have no domain of their own and are named
+    after output_base; other catalogs keep their domain unless override
+    is set.
+    """
+    domain = catalog.domain
+    if catalog.uses_output_base or override:
+        domain = output_base
+    return os.path.join(
+        build_dir, catalog.lang, LC_MESSAGES, mo_basename(domain)
+    )
+
+
+def resolve_compiler(compiler: str = "auto", optimize: bool = False) -> str:
+    """Pick the compiler "auto" stands for in this environment."""
+    from . import has_msgfmt, has_translate_toolkit
+
+    if compiler != "auto":
+        return compiler
+    if optimize:
+        return "builtin"
+    if has_msgfmt():
+        return "msgfmt"
+    if has_translate_toolkit():
+        return "translate-toolkit"
+    return "builtin"
+
+
+def compiler_identity(compiler: str, msgfmt_path: Optional[str] = None) -> str:
+    """Identify the compiler and its version, for build manifest keys."""
+    from . import __version__, _tool_version
+
+    if compiler == "msgfmt":
+        return f"msgfmt {_tool_version(msgfmt_path or 'msgfmt')}"
+    elif compiler == "translate-toolkit":
+        from translate.__version__ import sver
+
+        return f"translate-toolkit {sver}"
+    return "builtin {}".format(".".join(map(str, __version__)))
+
+
+def compile_options(
+    compiler: str, use_fuzzy: bool = False, optimize: bool = False
+) -> Dict[str, object]:
+    """Return the options that affect the contents of compiled files."""
+    return {
+        "use_fuzzy": bool(use_fuzzy),
+        "optimize": bool(optimize and compiler == "builtin"),
+    }
+
+
+def run_msgfmt(args: List[str]) -> None:
+    """Run msgfmt directly, raising ExecError with its output on failure."""
+    proc = subprocess.run(
+        args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        close_fds=False,
+    )
+    if proc.returncode != 0:
+        raise ExecError(
+            proc.stderr.decode("utf-8", "replace").strip()
+            or f"msgfmt exited with status {proc.returncode}"
+        )
+
+
+def msgfmt_args(
+    po: str,
+    mo: str,
+    msgfmt_path: Optional[str] = None,
+    use_fuzzy: bool = False,
+) -> List[str]:
+    args = [msgfmt_path or "msgfmt", "-o", mo, po]
+    if use_fuzzy:
+        args.insert(1, "--use-fuzzy")
+    return args
+
+
+def compile_catalog(
+    po: str,
+    mo: str,
+    compiler: str,
+    msgfmt_path: Optional[str] = None,
+    use_fuzzy: bool = False,
+    optimize: bool = False,
+) -> None:
+    """Compile po to mo with the given (resolved) compiler."""
+    if compiler == "msgfmt":
+        run_msgfmt(msgfmt_args(po, mo, msgfmt_path, use_fuzzy))
+    elif compiler == "translate-toolkit":
+        from translate.tools.pocompile import convertmo
+
+        with open(po, "rb") as pofile, open(mo, "wb") as mofile:
+            convertmo(pofile, mofile, None, includefuzzy=use_fuzzy)
+    elif compiler == "builtin":
+        from .mo import compile_mo
+
+        compile_mo(po, mo, use_fuzzy=use_fuzzy, deduplicate=optimize)
+    else:
+        raise ValueError(f"Unsupported compiler {compiler!r}")
+
+
+def compile_catalogs(
+    source_dir: str,
+    build_dir: str,
+    *,
+    languages: Optional[Iterable[str]] = None,
+    compiler: str = "auto",
+    output_base: Optional[str] = None,
+    jobs: int = DEFAULT_JOBS,
+    force: bool = False,
+    use_fuzzy: bool = False,
+    optimize: bool = False,
+    msgfmt_path: Optional[str] = None,
+    rescan: bool = True,
+    processes: bool = True,
+) -> Generator[CompileResult, None, None]:
+    """Compile the catalogs in source_dir to MO files below build_dir.
+
+    This does what build_mo does, without a setuptools distribution or
+    command. Catalogs whose output is up to date according to the build
+    manifest are yielded first, then compiled catalogs as soon as each
+    finishes, so results do not come in catalog order. Failures are
+    yielded as results with an error rather than raised.
+
+    The source directory is scanned again on every call unless rescan is
+    false, so long-running callers see added and removed catalogs.
+
+    With more than one job, the pure Python compilers run in worker
+    processes unless processes is false; those are started from the
+    calling thread, which therefore shouldn't be running other threads.
+    """
+    from setuptools.modified import newer
+
+    from .cache import BuildManifest, cache_key, file_digest, unshare_file
+    from .jobs import normalize_jobs
+
+    if compiler not in ("auto", "msgfmt", "translate-toolkit", "builtin"):
+        raise ValueError(f"Unsupported compiler {compiler!r}")
+    compiler = resolve_compiler(compiler, optimize)
+    optimize = optimize and compiler == "builtin"
+    jobs = normalize_jobs(jobs)
+    if rescan:
+        clear_catalog_index(source_dir)
+    catalogs = discover_catalogs(
+        source_dir, None if languages is None else list(languages)
+    )
+    targets: Dict[str, Catalog] = {}
+    for catalog in catalogs:
+        mo = mo_path(
+            build_dir,
+            catalog,
+            output_base or DEFAULT_OUTPUT_BASE,
+            override=output_base is not None,
+        )
+        if mo in targets:
+            raise ValueError(
+                "Multiple gettext catalogs would compile to "
+                f"{mo}: {targets[mo].po} and {catalog.po}"
+            )
+        targets[mo] = catalog
+
+    manifest = BuildManifest.load(build_dir)
+    identity = compiler_identity(compiler, msgfmt_path)
+    options = compile_options(compiler, use_fuzzy, optimize)
+    pending: List[Tuple[Catalog, str, str]] = []
+    for mo, catalog in targets.items():
+        os.makedirs(os.path.dirname(mo), exist_ok=True)
+        try:
+            key = cache_key(file_digest(catalog.po), identity, options)
+        except OSError as e:
+            yield CompileResult(catalog, mo, "failed", error=e)
+            continue
+        current = manifest.is_current(mo, key)
+        if current is None:
+            current = not newer(catalog.po, mo)
+            if current:
+                manifest.record(mo, catalog.po, key)
+        if force or not current:
+            pending.append((catalog, mo, key))
+        else:
+            yield CompileResult(catalog, mo, "up-to-date")
+
+    def compile_job(job: Tuple[Catalog, str, str]) -> float:
+        catalog, mo, _key = job
+        start = time.perf_counter()
+        unshare_file(mo)
+        call_in(
+            pool,
+            compile_catalog,
+            catalog.po,
+            mo,
+            compiler,
+            msgfmt_path,
+            use_fuzzy,
+            optimize,
+        )
+        return time.perf_counter() - start
+
+    try:
+        with worker_processes(
+            1 if compiler == "msgfmt" or not processes else jobs,
+            len(pending),
+        ) as pool:
+            for result in iter_jobs(compile_job, pending, jobs):
+                catalog, mo, key = result.item
+                if result.error is None:
+                    manifest.record(mo, catalog.po, key)
+                    yield CompileResult(
+                        catalog, mo, "compiled", seconds=result.value
+                    )
+                else:
+                    yield CompileResult(
+                        catalog, mo, "failed", error=result.error
+                    )
+    finally:
+        manifest.save()
+
+
+async def compile_catalogs_async(
+    source_dir: str,
+    build_dir: str,
+    *,
+    languages: Optional[Iterable[str]] = None,
+    compiler: str = "auto",
+    output_base: Optional[str] = None,
+    jobs: int = DEFAULT_JOBS,
+    force: bool = False,
+    use_fuzzy: bool = False,
+    optimize: bool = False,
+    msgfmt_path: Optional[str] = None,
+    rescan: bool = True,
+) -> AsyncIterator[CompileResult]:
+    """Asynchronous version of compile_catalogs.
+
+    Compilation runs in worker threads, so the event loop is never
+    blocked; results are delivered as they complete. Unlike
+    compile_catalogs it does not use worker processes, which can't be
+    forked safely from a threaded program. Errors in the
+    arguments are raised once the iteration reaches them. If the caller
+    stops iterating early, catalogs that have not started compiling are
+    skipped; closing the iterator waits for the ones in progress.
+    """
+    import asyncio
+    import threading
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[Optional[CompileResult]] = asyncio.Queue()
+    stop = threading.Event()
+
+    def produce() -> None:
+        results = compile_catalogs(
+            source_dir,
+            build_dir,
+            languages=languages,
+            compiler=compiler,
+            output_base=output_base,
+            jobs=jobs,
+            force=force,
+            use_fuzzy=use_fuzzy,
+            optimize=optimize,
+            msgfmt_path=msgfmt_path,
+            rescan=rescan,
+            processes=False,
+        )
+        try:
+            for result in results:
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, result)
+        finally:
+            # Cancels the queued jobs and saves the build manifest.
+            results.close()
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    producer = loop.run_in_executor(None, produce)
+    try:
+        while True:
+            result = await queue.get()
+            if result is None:
+                break
+            yield result
+    finally:
+        stop.set()
+        await producer
@@ -0,0 +1,631 @@
+#
+# Copyright (C) 2026 Jelmer Vernooĳ <jelmer@jelmer.uk>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA 02110-1301 USA
+
+"""Incremental extraction of translatable messages for update_pot."""
+
+import ast
+import io
+import json
+import os
+import re
+import tokenize
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Pattern,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from .cache import MANIFEST_VERSION, _read_json, _write_json
+from .po import POEntry, format_po
+
+EXTRACT_CACHE_DIR = "setuptools-gettext-extract"
+INDEX_NAME = "index.json"
+
+# Directories that never contain sources worth extracting, in .gitignore
+# syntax.
+DEFAULT_EXTRACT_EXCLUDE = (
+    ".*/",
+    "__pycache__/",
+    "/build/",
+    "/dist/",
+    "node_modules/",
+    "venv/",
+    "*.egg-info/",
+)
+
+# Bump when changes to the builtin extractor affect its output, to
+# invalidate cached extraction results.
+BUILTIN_EXTRACTOR_VERSION = 1
+
+# The functions the builtin extractor recognizes, like xgettext's defaults
+# for Python, with the positions of their msgid, msgid_plural and msgctxt
+# arguments.
+PYTHON_KEYWORDS: Dict[str, Tuple[int, Optional[int], Optional[int]]] = {
+    "_": (0, None, None),
+    "gettext": (0, None, None),
+    "ugettext": (0, None, None),
+    "dgettext": (1, None, None),
+    "ngettext": (0, 1, None),
+    "ungettext": (0, 1, None),
+    "dngettext": (1, 2, None),
+    "pgettext": (1, None, 0),
+    "dpgettext": (2, None, 1),
+    "npgettext": (1, 2, 0),
+    "dnpgettext": (2, 3, 1),
+}
+
+COMMENT_TAG = "i18n:"
+
+_PYTHON_FORMAT_RE = re.compile(
+    r"%(?:\([^)]*\))?[#0 +-]*(?:\*|\d+)?(?:\.(?:\*|\d+))?[hlL]?"
+    r"([diouxXeEfFgGcrsa%])"
+)
+
+_POT_DATE_RE = re.compile(rb'^"POT-Creation-Date: [^"\n]*"$', re.MULTILINE)
+
+
+def _glob_regex(pattern: str) -> str:
+    """Translate a glob with ``**`` support to a regular expression."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        c = pattern[i]
+        end = pattern.find("]", i + 2) if c == "[" else -1
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif end != -1:
+            body = pattern[i + 1 : end].replace("\\", "\\\\")
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append(f"[{body}]")
+            i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def _literal_prefix(pattern: str) -> str:
+    parts = []
+    for part in pattern.split("/")[:-1]:
+        if any(c in part for c in "*?["):
+            break
+        parts.append(part)
+    return "/".join(parts)
+
+
+@dataclass
+class IgnoreRule:
+    regex: Pattern[str]
+    negate: bool = False
+    dir_only: bool = False
+
+
+def parse_ignore_patterns(
+    lines: Iterable[str], base: str = ""
+) -> List[IgnoreRule]:
+    """Parse patterns in .gitignore syntax.
+
+    base is the directory, relative to the top of the walk, that the
+    patterns are relative to.
+    """
+    rules = []
+    for line in lines:
+        line = line.rstrip("\r\n").rstrip(" ")
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        regex = _glob_regex(line.lstrip("/"))
+        if "/" not in line:
+            # Patterns without a slash match at any depth.
+            regex = "(?:.*/)?" + regex
+        if base:
+            regex = re.escape(base + "/") + regex
+        rules.append(IgnoreRule(re.compile(regex), negate, dir_only))
+    return rules
+
+
+def is_ignored(rules: List[IgnoreRule], path: str, is_dir: bool) -> bool:
+    """Check whether path is ignored; later rules take precedence."""
+    ignored = False
+    for rule in rules:
+        if rule.dir_only and not is_dir:
+            continue
+        if rule.regex.fullmatch(path):
+            ignored = not rule.negate
+    return ignored
+
+
+def find_sources(
+    root: str = os.curdir,
+    include: Sequence[str] = ("**/*.py",),
+    exclude: Sequence[str] = (),
+    gitignore: bool = True,
+) -> List[str]:
+    """Find the source files to extract messages from.
+
+    include holds globs (supporting ``**``) relative to root and exclude
+    holds patterns in .gitignore syntax, in addition to
+    DEFAULT_EXTRACT_EXCLUDE. Directories that are excluded, or that cannot
+    contain any included file, are not descended into. If gitignore is
+    true, .gitignore files found during the walk are honoured as well.
+    """
+    patterns = [p[2:] if p.startswith("./") else p for p in include]
+    includes = [re.compile(_glob_regex(p.lstrip("/"))) for p in patterns]
+    prefixes = [_literal_prefix(p.lstrip("/")) for p in patterns]
+    found = []
+
+    def wanted_dir(rel: str) -> bool:
+        return any(
+            not prefix
+            or prefix == rel
+            or prefix.startswith(rel + "/")
+            or rel.startswith(prefix + "/")
+            for prefix in prefixes
+        )
+
+    def walk(rel_dir: str, rules: List[IgnoreRule]) -> None:
+        path = os.path.join(root, *rel_dir.split("/")) if rel_dir else root
+        if gitignore:
+            try:
+                with open(
+                    os.path.join(path, ".gitignore"), encoding="utf-8"
+                ) as f:
+                    rules = rules + parse_ignore_patterns(f, rel_dir)
+            except (OSError, UnicodeDecodeError):
+                pass
+        try:
+            entries = sorted(os.scandir(path), key=lambda e: e.name)
+        except OSError:
+            return
+        for entry in entries:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if is_ignored(rules, rel, is_dir):
+                continue
+            if is_dir:
+                if wanted_dir(rel):
+                    walk(rel, rules)
+            elif any(regex.fullmatch(rel) for regex in includes):
+                found.append(os.path.join(root, *rel.split("/")))
+
+    walk(
+        "",
+        parse_ignore_patterns(DEFAULT_EXTRACT_EXCLUDE)
+        + parse_ignore_patterns(exclude),
+    )
+    return found
+
+
+def _is_python_format(s: str) -> bool:
+    directives = [m.group(1) for m in _PYTHON_FORMAT_RE.finditer(s)]
+    if "%" in _PYTHON_FORMAT_RE.sub("", s):
+        return False
+    return any(directive != "%" for directive in directives)
+
+
+def _comment_lines(source: str) -> Dict[int, str]:
+    """Return the comments that are on a line of their own, by line."""
+    comments = {}
+    lines = source.splitlines()
+    for token in tokenize.generate_tokens(io.StringIO(source).readline):
+        if token.type != tokenize.COMMENT:
+            continue
+        row, col = token.start
+        if not lines[row - 1][:col].strip():
+            comments[row] = token.string[1:].strip()
+    return comments
+
+
+def _tagged_comments(comments: Dict[int, str], lineno: int) -> List[str]:
+    """Find the i18n: comment block directly above lineno."""
+    block: List[str] = []
+    lineno -= 1
+    while lineno in comments:
+        block.insert(0, comments[lineno])
+        lineno -= 1
+    for i, comment in enumerate(block):
+        if comment.startswith(COMMENT_TAG):
+            return block[i:]
+    return []
+
+
+def _string_arg(args: List[ast.expr], index: Optional[int]) -> Optional[str]:
+    if index is None or index >= len(args):
+        return None
+    arg = args[index]
+    if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+        return arg.value
+    return None
+
+
+def extract_python(path: str) -> List[POEntry]:
+    """Extract translatable messages from a Python source file.
+
+    This recognizes calls to the functions in PYTHON_KEYWORDS with string
+    literal arguments, and i18n: comments directly above them. References
+    are line numbers, as in ExtractionCache fragments.
+    """
+    with tokenize.open(path) as f:
+        source = f.read()
+    tree = ast.parse(source, filename=path)
+    comments = _comment_lines(source)
+    calls = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        if isinstance(node.func, ast.Name):
+            name = node.func.id
+        elif isinstance(node.func, ast.Attribute):
+            name = node.func.attr
+        else:
+            continue
+        if name in PYTHON_KEYWORDS:
+            calls.append((node.lineno, node.col_offset, name, node))
+    calls.sort(key=lambda call: call[:2])
+
+    entries: Dict[Tuple[Optional[bytes], bytes], POEntry] = {}
+    for lineno, _col, name, node in calls:
+        msgid_index, plural_index, context_index = PYTHON_KEYWORDS[name]
+        msgid = _string_arg(node.args, msgid_index)
+        plural = _string_arg(node.args, plural_index)
+        context = _string_arg(node.args, context_index)
+        if (
+            msgid is None
+            or (plural_index is not None and plural is None)
+            or (context_index is not None and context is None)
+        ):
+            continue
+        line = str(node.args[msgid_index].lineno).encode("ascii")
+        key = (
+            None if context is None else context.encode("utf-8"),
+            msgid.encode("utf-8"),
+        )
+        entry = entries.get(key)
+        if entry is None:
+            entry = entries[key] = POEntry(
+                msgid=key[1],
+                msgctxt=key[0],
+                msgid_plural=(
+                    None if plural is None else plural.encode("utf-8")
+                ),
+            )
+        elif entry.msgid_plural is None and plural is not None:
+            entry.msgid_plural = plural.encode("utf-8")
+        entry.references.append(line)
+        if "python-format" not in entry.flags and any(
+            _is_python_format(s) for s in (msgid, plural) if s is not None
+        ):
+            entry.flags.append("python-format")
+        for comment in _tagged_comments(comments, lineno):
+            text = comment.encode("utf-8")
+            if text not in entry.extracted_comments:
+                entry.extracted_comments.append(text)
+    return list(entries.values())
+
+
+def _to_json(value: Optional[bytes]) -> Optional[str]:
+    # latin-1 round-trips arbitrary bytes.
+    return None if value is None else value.decode("latin-1")
+
+
+def _from_json(value: Optional[str]) -> Optional[bytes]:
+    return None if value is None else value.encode("latin-1")
+
+
+def _entry_to_json(entry: POEntry) -> dict:
+    return {
+        "msgctxt": _to_json(entry.msgctxt),
+        "msgid": _to_json(entry.msgid),
+        "msgid_plural": _to_json(entry.msgid_plural),
+        "flags": entry.flags,
+        "extracted_comments": [_to_json(c) for c in entry.extracted_comments],
+        "references": [_to_json(r) for r in entry.references],
+    }
+
+
+def _entry_from_json(data: dict) -> POEntry:
+    return POEntry(
+        msgid=_from_json(data["msgid"]) or b"",
+        msgctxt=_from_json(data["msgctxt"]),
+        msgid_plural=_from_json(data["msgid_plural"]),
+        flags=list(data["flags"]),
+        extracted_comments=[
+            _from_json(c) or b"" for c in data["extracted_comments"]
+        ],
+        references=[_from_json(r) or b"" for r in data["references"]],
+    )
+
+
+@dataclass
+class ExtractionCache:
+    """Messages extracted from each source file, keyed by content hash.
+
+    Each fragment holds the messages of a single source file, with
+    references reduced to line numbers so that fragments stay valid when a
+    file is moved. The index records which fragment each source file used
+    in the last run; fragments no longer referenced are removed on save.
+    """
+
+    path: str
+    index: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str) -> "ExtractionCache":
+        cache = cls(path)
+        data = _read_json(os.path.join(path, INDEX_NAME))
+        if data is not None and isinstance(data.get("sources"), dict):
+            cache.index = data["sources"]
+        return cache
+
+    def _fragment(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[List[POEntry]]:
+        try:
+            with open(self._fragment(key), encoding="utf-8") as f:
+                return [_entry_from_json(entry) for entry in json.load(f)]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def put(self, key: str, entries: List[POEntry]) -> None:
+        path = self._fragment(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump([_entry_to_json(entry) for entry in entries], f)
+        os.replace(tmp, path)
+
+    def save(self, index: Dict[str, str]) -> None:
+        """Record the fragments used for each source, pruning the rest."""
+        os.makedirs(self.path, exist_ok=True)
+        stale = set(self.index.values()) - set(index.values())
+        self.index = index
+        _write_json(
+            os.path.join(self.path, INDEX_NAME),
+            {"version": MANIFEST_VERSION, "sources": index},
+        )
+        for key in stale:
+            try:
+                os.unlink(self._fragment(key))
+            except FileNotFoundError:
+                pass
+
+
+# Paths passed to a single extractor process; stay well below command line
+# length limits (32k characters on Windows).
+MAX_SHARD_FILES = 100
+MAX_SHARD_CHARS = 16384
+
+
+def shard_files(paths: List[str], jobs: int) -> List[List[str]]:
+    """Split paths into chunks to extract concurrently.
+
+    With several jobs, there are a few chunks per worker, so that workers
+    stay busy when some files take longer than others.
+    """
+    if jobs > 1:
+        size = -(-len(paths) // (4 * jobs))
+    else:
+        size = len(paths)
+    size = max(1, min(MAX_SHARD_FILES, size))
+    shards: List[List[str]] = []
+    current: List[str] = []
+    chars = 0
+    for path in paths:
+        if current and (
+            len(current) >= size or chars + len(path) + 1 > MAX_SHARD_CHARS
+        ):
+            shards.append(current)
+            current, chars = [], 0
+        current.append(path)
+        chars += len(path) + 1
+    if current:
+        shards.append(current)
+    return shards
+
+
+def _line_number(line: bytes) -> int:
+    return int(line) if line.isdigit() else 0
+
+
+def split_entries(
+    entries: Iterable[POEntry], paths: List[str]
+) -> Tuple[Dict[str, List[POEntry]], List[str]]:
+    """Split the messages extracted from paths into per-file messages.
+
+    References are reduced to line numbers. Returns the messages per file,
+    and the files whose messages can not be told apart: extracted comments
+    of a message that occurs in several files may belong to any of them.
+    Those files should be extracted on their own.
+    """
+    by_file: Dict[str, List[POEntry]] = {path: [] for path in paths}
+    ambiguous: Set[str] = set()
+    for entry in entries:
+        if entry.is_header:
+            continue
+        lines: Dict[str, List[bytes]] = {}
+        for reference in entry.references:
+            path, _, line = reference.rpartition(b":")
+            # xgettext isolates unusual file names with U+2068 and U+2069.
+            name = path.replace(b"\xe2\x81\xa8", b"").replace(
+                b"\xe2\x81\xa9", b""
+            )
+            lines.setdefault(
+                paths[0] if len(paths) == 1 else os.fsdecode(name), []
+            ).append(line)
+        if not lines and len(paths) == 1:
+            lines[paths[0]] = []
+        if not lines or not lines.keys() <= by_file.keys():
+            # Unrecognized references; extract every file separately.
+            return {}, list(paths)
+        if len(lines) > 1 and entry.extracted_comments:
+            ambiguous.update(lines)
+        for source, path_lines in lines.items():
+            by_file[source].append(
+                POEntry(
+                    msgid=entry.msgid,
+                    msgctxt=entry.msgctxt,
+                    msgid_plural=entry.msgid_plural,
+                    flags=list(entry.flags),
+                    extracted_comments=list(entry.extracted_comments),
+                    references=path_lines,
+                )
+            )
+    for file_entries in by_file.values():
+        file_entries.sort(
+            key=lambda e: _line_number(e.references[0]) if e.references else 0
+        )
+    return (
+        {
+            path: file_entries
+            for path, file_entries in by_file.items()
+            if path not in ambiguous
+        },
+        sorted(ambiguous),
+    )
+
+
+def merge_entries(
+    fragments: Iterable[Tuple[str, List[POEntry]]],
+) -> List[POEntry]:
+    """Merge per-file messages into a single catalog.
+
+    fragments is an iterable of (path, entries) pairs, where the references
+    of the entries are line numbers in path. Messages are kept in the order
+    they are first seen; duplicates get the references, flags and comments
+    of all their occurrences.
+    """
+    merged: Dict[Tuple[Optional[bytes], bytes], POEntry] = {}
+    for path, entries in fragments:
+        prefix = os.fsencode(path) + b":"
+        for entry in entries:
+            references = [prefix + line for line in entry.references]
+            key = (entry.msgctxt, entry.msgid)
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = POEntry(
+                    msgid=entry.msgid,
+                    msgctxt=entry.msgctxt,
+                    msgid_plural=entry.msgid_plural,
+                    flags=list(entry.flags),
+                    extracted_comments=list(entry.extracted_comments),
+                    references=references,
+                )
+                continue
+            existing.references.extend(references)
+            if existing.msgid_plural is None:
+                existing.msgid_plural = entry.msgid_plural
+            existing.flags.extend(
+                flag for flag in entry.flags if flag not in existing.flags
+            )
+            existing.extracted_comments.extend(
+                comment
+                for comment in entry.extracted_comments
+                if comment not in existing.extracted_comments
+            )
+    return list(merged.values())
+
+
+def pot_header(
+    package: str, contact: Optional[str], entries: List[POEntry]
+) -> POEntry:
+    """Build a POT header entry like the one xgettext writes."""
+    is_ascii = all(
+        entry.msgid.isascii()
+        and (entry.msgid_plural or b"").isascii()
+        and (entry.msgctxt or b"").isascii()
+        for entry in entries
+    )
+    fields = [
+        f"Project-Id-Version: {package}",
+        f"Report-Msgid-Bugs-To: {contact or ''}",
+        "POT-Creation-Date: "
+        + datetime.now().astimezone().strftime("%Y-%m-%d %H:%M%z"),
+        "PO-Revision-Date: YEAR-MO-DA HO:MI+ZONE",
+        "Last-Translator: FULL NAME <EMAIL@ADDRESS>",
+        "Language-Team: LANGUAGE <LL@li.org>",
+        "Language: ",
+        "MIME-Version: 1.0",
+        "Content-Type: text/plain; charset="
+        + ("CHARSET" if is_ascii else "UTF-8"),
+        "Content-Transfer-Encoding: 8bit",
+    ]
+    if any(entry.msgid_plural is not None for entry in entries):
+        fields.append("Plural-Forms: nplurals=INTEGER; plural=EXPRESSION;")
+    return POEntry(
+        msgid=b"",
+        msgstr=["".join(f"{f}\n" for f in fields).encode("utf-8")],
+        flags=["fuzzy"],
+        comments=[
+            b"SOME DESCRIPTIVE TITLE.",
+            b"Copyright (C) YEAR THE PACKAGE'S COPYRIGHT HOLDER",
+            b"This file is distributed under the same license as the "
+            + package.encode("utf-8")
+            + b" package.",
+            b"FIRST AUTHOR <EMAIL@ADDRESS>, YEAR.",
+            b"",
+        ],
+    )
+
+
+def write_pot(path: str, header: POEntry, entries: List[POEntry]) -> bool:
+    """Write a POT file, unless only its creation date would change.
+
+    Returns whether the file was written.
+    """
+    content = format_po([header, *entries])
+    try:
+        with open(path, "rb") as f:
+            existing = f.read()
+    except FileNotFoundError:
+        existing = None
+    if existing is not None and _POT_DATE_RE.sub(
+        b"", existing
+    ) == _POT_DATE_RE.sub(b"", content):
+        return False
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(content)
+    os.replace(tmp, path)
+    return True
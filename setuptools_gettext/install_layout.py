@@ -19,15 +19,24 @@
 """Install layout helpers for compiled gettext catalogs."""
 
 import os
-from typing import List, Tuple
+import shutil
+import sys
+from typing import TYPE_CHECKING, List, Tuple
 
-from setuptools.dist import Distribution
 from setuptools.errors import OptionError
 
 from .catalog import LC_MESSAGES
 
+if TYPE_CHECKING:
+    from setuptools.dist import Distribution
+
 DEFAULT_INSTALL_LAYOUT = "share"
 VALID_INSTALL_LAYOUTS = ("share", "package")
+DEFAULT_INSTALL_MODE = "copy"
+VALID_INSTALL_MODES = ("copy", "hardlink", "symlink", "reflink")
+
+# From <linux/fs.h>
+_FICLONE = 0x40049409
 
 
 def normalize_install_layout(install_layout) -> str:
@@ -49,8 +58,62 @@ def normalize_install_layout(install_layout) -> str:
     return install_layout
 
 
+def normalize_install_mode(install_mode) -> str:
+    if install_mode is None:
+        return DEFAULT_INSTALL_MODE
+    if not isinstance(install_mode, str):
+        raise ValueError(
+            "Unsupported setuptools-gettext install_mode "
+            f"{install_mode!r}; expected one of: "
+            f"{', '.join(VALID_INSTALL_MODES)}"
+        )
+    install_mode = install_mode.strip().lower()
+    if install_mode not in VALID_INSTALL_MODES:
+        raise ValueError(
+            "Unsupported setuptools-gettext install_mode "
+            f"{install_mode!r}; expected one of: "
+            f"{', '.join(VALID_INSTALL_MODES)}"
+        )
+    return install_mode
+
+
+def reflink_file(src: str, dst: str) -> bool:
+    """Clone src to dst, sharing data blocks on copy-on-write filesystems.
+
+    The clone is written to a temporary file next to dst and renamed over
+    it, so an existing dst that is a hard or symbolic link to src (e.g.
+    from an earlier hardlink or symlink install) never truncates src.
+
+    Returns False if cloning is not supported, in which case dst is left
+    as it was and the caller should fall back to copying.
+    """
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+    import tempfile
+
+    try:
+        fd, tmp = tempfile.mkstemp(
+            prefix=f".{os.path.basename(dst)}.", dir=os.path.dirname(dst)
+        )
+    except OSError:
+        return False
+    try:
+        with os.fdopen(fd, "wb") as target, open(src, "rb") as source:
+            fcntl.ioctl(target.fileno(), _FICLONE, source.fileno())
+        shutil.copystat(src, tmp)
+        os.replace(tmp, dst)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        return False
+    return True
+
+
 def package_locale_info(
-    dist: Distribution, build_dir: str
+    dist: "Distribution", build_dir: str
 ) -> Tuple[str, str, str]:
     matches = []
     for package in getattr(dist, "packages", None) or []:
@@ -78,7 +141,9 @@ def package_locale_info(
     return package, package_dir, relative
 
 
-def add_package_data_for_build_dir(dist: Distribution, build_dir: str) -> None:
+def add_package_data_for_build_dir(
+    dist: "Distribution", build_dir: str
+) -> None:
     package, _package_dir, relative_build_dir = package_locale_info(
         dist, build_dir
     )
@@ -102,7 +167,7 @@ def package_install_dir(
     return os.path.dirname(os.path.join(*parts))
 
 
-def _get_package_dir(dist: Distribution, package: str) -> str:
+def _get_package_dir(dist: "Distribution", package: str) -> str:
     path = package.split(".")
     package_dir = getattr(dist, "package_dir", None) or {}
     if not package_dir:
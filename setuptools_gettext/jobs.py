@@ -0,0 +1,179 @@
+#
+# Copyright (C) 2026 Jelmer Vernooĳ <jelmer@jelmer.uk>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA 02110-1301 USA
+
+"""Helpers for running gettext jobs concurrently."""
+
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+)
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+DEFAULT_JOBS = 1
+
+T = TypeVar("T")
+
+
+@dataclass
+class JobResult(Generic[T]):
+    item: T
+    value: Any = None
+    error: Optional[Exception] = None
+
+
+def normalize_jobs(jobs) -> int:
+    """Normalize a jobs setting to a positive number of workers.
+
+    ``0`` and ``"auto"`` select one worker per available CPU.
+    """
+    if jobs is None:
+        return DEFAULT_JOBS
+    if isinstance(jobs, str):
+        jobs = jobs.strip().lower()
+        if jobs == "auto":
+            jobs = 0
+    try:
+        if isinstance(jobs, bool):
+            raise TypeError(jobs)
+        jobs = int(jobs)
+    except (TypeError, ValueError):
+        raise ValueError(
+            f"Unsupported setuptools-gettext jobs {jobs!r}; "
+            "expected a non-negative integer or 'auto'"
+        ) from None
+    if jobs < 0:
+        raise ValueError(
+            f"Unsupported setuptools-gettext jobs {jobs!r}; "
+            "expected a non-negative integer or 'auto'"
+        )
+    if jobs == 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def _run_job(func: Callable[[T], Any], item: T) -> JobResult[T]:
+    try:
+        return JobResult(item, value=func(item))
+    except Exception as e:
+        return JobResult(item, error=e)
+
+
+def run_jobs(
+    func: Callable[[T], Any], items: Iterable[T], jobs: int = DEFAULT_JOBS
+) -> List[JobResult[T]]:
+    """Call func for every item, using up to jobs worker threads.
+
+    Results are returned in the order of items. Exceptions raised by func
+    are captured in the corresponding result rather than aborting the
+    remaining jobs, so that callers can report all failures at once.
+    """
+    items = list(items)
+    if jobs <= 1 or len(items) <= 1:
+        return [_run_job(func, item) for item in items]
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=min(jobs, len(items))) as executor:
+        return list(executor.map(lambda item: _run_job(func, item), items))
+
+
+def iter_jobs(
+    func: Callable[[T], Any], items: Iterable[T], jobs: int = DEFAULT_JOBS
+) -> Iterator[JobResult[T]]:
+    """Like run_jobs, but yield results as soon as each job finishes.
+
+    Results come in completion order rather than the order of items.
+    """
+    items = list(items)
+    if jobs <= 1 or len(items) <= 1:
+        for item in items:
+            yield _run_job(func, item)
+        return
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    with ThreadPoolExecutor(max_workers=min(jobs, len(items))) as executor:
+        futures = [executor.submit(_run_job, func, item) for item in items]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # Don't start queued jobs if the caller stops early.
+            for future in futures:
+                future.cancel()
+
+
+@contextmanager
+def worker_processes(jobs: int, items: int) -> Iterator[Optional["Executor"]]:
+    """Provide a pool of up to jobs processes for CPU-bound Python work.
+
+    The worker threads of run_jobs and iter_jobs only run concurrently
+    while they wait for subprocesses; the builtin engines are pure Python
+    and would serialize on the GIL, so they hand their work to this pool
+    with call_in. Yields None, meaning the work runs in the calling thread,
+    for a single job or item.
+
+    Workers are forked on Linux only, and all of them are started before
+    the pool is yielded, so call this before starting any threads. Other
+    platforms use their default start method, for which the functions
+    passed to call_in must be importable at module level.
+    """
+    if jobs <= 1 or items <= 1:
+        yield None
+        return
+    import multiprocessing
+    import sys
+    from concurrent.futures import ProcessPoolExecutor, wait
+
+    workers = min(jobs, items)
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(
+            "fork" if sys.platform.startswith("linux") else None
+        ),
+    )
+    try:
+        # Start every worker now rather than on demand: pools start
+        # another worker for each task submitted while none is idle.
+        wait([pool.submit(os.getpid) for _ in range(workers)])
+        yield pool
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def call_in(
+    pool: Optional["Executor"], func: Callable[..., T], *args: object
+) -> T:
+    """Call func(*args) in pool, or directly if pool is None.
+
+    func, its arguments and its result must be picklable when a pool is
+    used; exceptions are re-raised in the caller.
+    """
+    if pool is None:
+        return func(*args)
+    return pool.submit(func, *args).result()
@@ -0,0 +1,448 @@
+#
+# Copyright (C) 2026 Jelmer Vernooĳ <jelmer@jelmer.uk>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA 02110-1301 USA
+
+"""Builtin compiler and reader for GNU MO files."""
+
+import mmap
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .po import POEntry, iter_po
+
+MO_MAGIC = 0x950412DE
+MO_HEADER_SIZE = 28
+
+
+def hashpjw(key: bytes) -> int:
+    """Hash a message key the same way as GNU gettext."""
+    hval = 0
+    for c in key:
+        hval = ((hval << 4) + c) & 0xFFFFFFFF
+        g = hval & 0xF0000000
+        if g:
+            hval ^= g >> 24
+            hval ^= g
+    return hval
+
+
+def _is_prime(candidate: int) -> bool:
+    # A port of is_prime() from gettext's lib/hash.c. It is only meant for
+    # odd candidates of 10 and up, and calls 3 not prime; msgfmt relies on
+    # that, so keep it as is.
+    divn = 3
+    sq = divn * divn
+    while sq < candidate and candidate % divn != 0:
+        divn += 1
+        sq += 4 * divn
+        divn += 1
+    return candidate % divn != 0
+
+
+def _next_prime(seed: int) -> int:
+    # A port of next_prime() from gettext's lib/hash.c.
+    seed |= 1
+    while not _is_prime(seed):
+        seed += 2
+    return seed
+
+
+def hash_table_size(count: int) -> int:
+    """Return the hash table size GNU msgfmt uses for count messages."""
+    return max(_next_prime((count * 4) // 3), 3)
+
+
+def _uint32_array(size: int = 0) -> "array[int]":
+    # Offset tables are large for big catalogs; keep them compact.
+    return array("I" if array("I").itemsize == 4 else "L", bytes(4 * size))
+
+
+def _hash_table(keys: List[bytes]) -> "array[int]":
+    size = hash_table_size(len(keys))
+    table = _uint32_array(size)
+    for i, key in enumerate(keys):
+        # Lookups hash the (context and) singular msgid only.
+        hval = hashpjw(key.split(b"\0", 1)[0])
+        idx = hval % size
+        incr = 1 + (hval % (size - 2))
+        while table[idx]:
+            if idx >= size - incr:
+                idx -= size - incr
+            else:
+                idx += incr
+        table[idx] = i + 1
+    return table
+
+
+def entry_key(entry: POEntry) -> bytes:
+    key = entry.msgid
+    if entry.msgctxt is not None:
+        key = entry.msgctxt + b"\x04" + key
+    if entry.msgid_plural is not None:
+        key += b"\0" + entry.msgid_plural
+    return key
+
+
+def catalog_messages(
+    entries: Iterable[POEntry], use_fuzzy: bool = False
+) -> Dict[bytes, bytes]:
+    """Select the messages msgfmt would write to the MO file.
+
+    Untranslated and obsolete entries are dropped, as are fuzzy entries
+    other than the header unless use_fuzzy is set (like msgfmt's
+    --use-fuzzy).
+    """
+    messages: Dict[bytes, bytes] = {}
+    for entry in entries:
+        if entry.obsolete:
+            continue
+        if entry.fuzzy and not entry.is_header and not use_fuzzy:
+            continue
+        if not entry.msgstr or not entry.msgstr[0]:
+            continue
+        key = entry_key(entry)
+        if key in messages:
+            raise ValueError(f"duplicate message definition: {entry.msgid!r}")
+        messages[key] = b"\0".join(entry.msgstr)
+    return messages
+
+
+def generate_mo(
+    messages: Dict[bytes, bytes], deduplicate: bool = False
+) -> bytes:
+    """Generate the contents of a MO file, including a hash table.
+
+    By default the output is byte for byte what msgfmt writes. With
+    deduplicate, identical strings are stored once and share an offset,
+    which shrinks catalogs where many translations are repeated or equal
+    to their original.
+    """
+    return b"".join(_mo_chunks(messages, deduplicate))
+
+
+def _mo_chunks(
+    messages: Dict[bytes, bytes], deduplicate: bool = False
+) -> Iterator[bytes]:
+    keys = sorted(messages)
+    count = len(keys)
+    hash_table = _hash_table(keys)
+    originals_offset = MO_HEADER_SIZE
+    translations_offset = originals_offset + 8 * count
+    hash_offset = translations_offset + 8 * count
+    offset = hash_offset + 4 * len(hash_table)
+
+    # Strings in the order they are written, and the offsets of the ones
+    # already written when deduplicating.
+    strings: List[bytes] = []
+    offsets: Dict[bytes, int] = {}
+
+    def add(table: "array[int]", string: bytes) -> None:
+        nonlocal offset
+        if deduplicate:
+            existing = offsets.get(string)
+            if existing is not None:
+                table.extend((len(string), existing))
+                return
+            offsets[string] = offset
+        table.extend((len(string), offset))
+        strings.append(string)
+        offset += len(string) + 1
+
+    originals = _uint32_array()
+    for key in keys:
+        add(originals, key)
+    translations = _uint32_array()
+    for key in keys:
+        add(translations, messages[key])
+
+    yield struct.pack(
+        "<7I",
+        MO_MAGIC,
+        0,
+        count,
+        originals_offset,
+        translations_offset,
+        len(hash_table),
+        hash_offset,
+    )
+    for table in (originals, translations, hash_table):
+        if sys.byteorder == "big":
+            table.byteswap()
+        yield table.tobytes()
+    for string in strings:
+        yield string + b"\0"
+
+
+def compile_mo(
+    po: str, mo: str, use_fuzzy: bool = False, deduplicate: bool = False
+) -> None:
+    """Compile the PO file at po to a MO file at mo.
+
+    The PO file is streamed, so only the translated messages are kept in
+    memory, and the output is written without building it in memory first.
+    See catalog_messages and generate_mo for the options.
+    """
+    messages = catalog_messages(iter_po(po), use_fuzzy=use_fuzzy)
+    with open(mo, "wb") as f:
+        f.writelines(_mo_chunks(messages, deduplicate))
+
+
+class MOFormatError(ValueError):
+    """A MO file is truncated or malformed."""
+
+
+@dataclass
+class MOFile:
+    """Read-only, memory-mapped view of a GNU MO file.
+
+    Strings are returned as memoryviews into the mapping, without their
+    terminating NUL, so nothing is copied until the caller asks for bytes.
+    Views must not be used after the file is closed.
+    """
+
+    path: str
+    data: memoryview
+    byteorder: str
+    revision: int
+    count: int
+    originals_offset: int
+    translations_offset: int
+    hash_size: int
+    hash_offset: int
+    _map: Optional[mmap.mmap] = None
+
+    @classmethod
+    def open(cls, path: str) -> "MOFile":
+        with open(path, "rb") as f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                # Empty files cannot be mapped.
+                raise MOFormatError(f"{path}: file is too short") from e
+        data = memoryview(mapped)
+        try:
+            return cls._parse(path, data, mapped)
+        except MOFormatError:
+            data.release()
+            mapped.close()
+            raise
+
+    @classmethod
+    def _parse(
+        cls, path: str, data: memoryview, mapped: mmap.mmap
+    ) -> "MOFile":
+        if len(data) < MO_HEADER_SIZE:
+            raise MOFormatError(f"{path}: file is too short")
+        (magic,) = struct.unpack_from("<I", data)
+        if magic == MO_MAGIC:
+            byteorder = "<"
+        elif magic == struct.unpack(">I", struct.pack("<I", MO_MAGIC))[0]:
+            byteorder = ">"
+        else:
+            raise MOFormatError(f"{path}: bad magic number {magic:#010x}")
+        (
+            revision,
+            count,
+            originals_offset,
+            translations_offset,
+            hash_size,
+            hash_offset,
+        ) = struct.unpack_from(byteorder + "6I", data, 4)
+        if revision >> 16 > 1:
+            raise MOFormatError(f"{path}: unsupported revision {revision:#x}")
+        mo = cls(
+            path,
+            data,
+            byteorder,
+            revision,
+            count,
+            originals_offset,
+            translations_offset,
+            hash_size,
+            hash_offset,
+            _map=mapped,
+        )
+        mo._check_table(mo.originals_offset, 8 * mo.count, "originals")
+        mo._check_table(mo.translations_offset, 8 * mo.count, "translations")
+        mo._check_table(mo.hash_offset, 4 * mo.hash_size, "hash")
+        return mo
+
+    def close(self) -> None:
+        if self._map is None:
+            return
+        try:
+            self.data.release()
+            self._map.close()
+        except BufferError:
+            # Views handed out are still alive; the mapping is closed when
+            # they are garbage collected.
+            pass
+        self._map = None
+
+    def __enter__(self) -> "MOFile":
+        """Return the file itself; it is closed on exit."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the file."""
+        self.close()
+
+    def __len__(self) -> int:
+        """Return the number of messages, including the header."""
+        return self.count
+
+    def _check_table(self, offset: int, size: int, name: str) -> None:
+        if offset + size > len(self.data):
+            raise MOFormatError(
+                f"{self.path}: {name} table extends past end of file"
+            )
+
+    def _uint32(self, offset: int) -> int:
+        return struct.unpack_from(self.byteorder + "I", self.data, offset)[0]
+
+    def _string(self, table: int, index: int) -> memoryview:
+        length, offset = struct.unpack_from(
+            self.byteorder + "2I", self.data, table + 8 * index
+        )
+        if offset + length >= len(self.data):
+            raise MOFormatError(
+                f"{self.path}: string {index} extends past end of file"
+            )
+        return self.data[offset : offset + length]
+
+    def original(self, index: int) -> memoryview:
+        return self._string(self.originals_offset, index)
+
+    def translation(self, index: int) -> memoryview:
+        return self._string(self.translations_offset, index)
+
+    def __iter__(self) -> Iterator[Tuple[memoryview, memoryview]]:
+        """Iterate over (original, translation) pairs in file order.
+
+        Plural originals and translations contain NUL-separated forms,
+        and context is prefixed to the original with an EOT character.
+        """
+        for i in range(self.count):
+            yield self.original(i), self.translation(i)
+
+    def find(self, key: bytes) -> Optional[int]:
+        """Return the index of the message with the given lookup key.
+
+        The key is the (context and) singular msgid, as used by gettext.
+        The hash table is used when there is one; otherwise the sorted
+        originals are searched.
+        """
+        if self.hash_size > 2:
+            hval = hashpjw(key)
+            idx = hval % self.hash_size
+            incr = 1 + (hval % (self.hash_size - 2))
+            for _ in range(self.hash_size):
+                nstr = self._uint32(self.hash_offset + 4 * idx)
+                if nstr == 0:
+                    return None
+                if nstr > self.count:
+                    raise MOFormatError(
+                        f"{self.path}: hash table entry {idx} out of range"
+                    )
+                if self._lookup_key(nstr - 1) == key:
+                    return nstr - 1
+                if idx >= self.hash_size - incr:
+                    idx -= self.hash_size - incr
+                else:
+                    idx += incr
+            return None
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            original = bytes(self._lookup_key(mid))
+            if original == key:
+                return mid
+            elif original < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def _lookup_key(self, index: int) -> memoryview:
+        original = self.original(index)
+        end = bytes(original).find(b"\0")
+        return original if end == -1 else original[:end]
+
+    def lookup(
+        self, msgid: bytes, msgctxt: Optional[bytes] = None
+    ) -> Optional[memoryview]:
+        """Return the translation of msgid, or None if there is none."""
+        key = msgid if msgctxt is None else msgctxt + b"\x04" + msgid
+        index = self.find(key)
+        if index is None:
+            return None
+        return self.translation(index)
+
+    def header(self) -> Dict[str, str]:
+        """Return the fields of the catalog header entry."""
+        translation = self.lookup(b"")
+        if translation is None:
+            return {}
+        fields = {}
+        for line in bytes(translation).decode("utf-8", "replace").split("\n"):
+            name, sep, value = line.partition(":")
+            if sep:
+                fields[name.strip()] = value.strip()
+        return fields
+
+    def validate(self) -> None:
+        """Check the structure of the file, raising MOFormatError if bad.
+
+        Every string must lie within the file and be NUL-terminated, the
+        originals must be sorted and unique, and the hash table (if any)
+        must find every message.
+        """
+        previous: Optional[bytes] = None
+        for i in range(self.count):
+            for table in (self.originals_offset, self.translations_offset):
+                string = self._string(table, i)
+                end = self._uint32(table + 8 * i + 4) + len(string)
+                if self.data[end] != 0:
+                    raise MOFormatError(
+                        f"{self.path}: string {i} is not NUL-terminated"
+                    )
+            original = bytes(self.original(i))
+            if previous is not None and original <= previous:
+                raise MOFormatError(
+                    f"{self.path}: originals are not sorted at {i}"
+                )
+            previous = original
+        if self.hash_size:
+            if self.hash_size < 3:
+                raise MOFormatError(f"{self.path}: hash table is too small")
+            for i in range(self.count):
+                if self.find(bytes(self._lookup_key(i))) != i:
+                    raise MOFormatError(
+                        f"{self.path}: message {i} is not in the hash table"
+                    )
+
+
+def validate_mo(path: str) -> None:
+    """Check that the MO file at path is well-formed.
+
+    Raises MOFormatError if it is not, or OSError if it cannot be read.
+    """
+    with MOFile.open(path) as mo:
+        mo.validate()
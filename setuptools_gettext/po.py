@@ -0,0 +1,348 @@
+#
+# Copyright (C) 2026 Jelmer Vernooĳ <jelmer@jelmer.uk>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA 02110-1301 USA
+
+"""Minimal parser for gettext PO files.
+
+Strings are kept as bytes in the encoding of the PO file, which is what
+ends up in compiled MO files.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional
+
+_ESCAPES = {
+    b"n": b"\n",
+    b"t": b"\t",
+    b"r": b"\r",
+    b"a": b"\a",
+    b"b": b"\b",
+    b"f": b"\f",
+    b"v": b"\v",
+    b"\\": b"\\",
+    b'"': b'"',
+    b"'": b"'",
+    b"?": b"?",
+}
+
+_QUOTES = {
+    value: b"\\" + key
+    for key, value in _ESCAPES.items()
+    if key not in (b"'", b"?")
+}
+_UNSAFE_RE = re.compile(rb'[\\"\n\t\r\a\b\f\v]')
+_ESCAPE_RE = re.compile(rb"\\(x[0-9a-fA-F]{1,2}|[0-7]{1,3}|.)")
+_MSGSTR_INDEX_RE = re.compile(rb"msgstr\[(\d+)\]")
+
+
+class POSyntaxError(ValueError):
+    """Raised for malformed PO files."""
+
+
+@dataclass
+class POEntry:
+    msgid: bytes = b""
+    msgstr: List[bytes] = field(default_factory=list)
+    msgctxt: Optional[bytes] = None
+    msgid_plural: Optional[bytes] = None
+    flags: List[str] = field(default_factory=list)
+    obsolete: bool = False
+    comments: List[bytes] = field(default_factory=list)
+    extracted_comments: List[bytes] = field(default_factory=list)
+    references: List[bytes] = field(default_factory=list)
+    # Line of the msgctxt or msgid keyword, for diagnostics.
+    lineno: int = 0
+
+    @property
+    def fuzzy(self) -> bool:
+        return "fuzzy" in self.flags
+
+    @property
+    def is_header(self) -> bool:
+        return self.msgid == b"" and self.msgctxt is None
+
+
+def _unescape_match(m: "re.Match[bytes]") -> bytes:
+    escape = m.group(1)
+    if escape[:1] == b"x":
+        return bytes([int(escape[1:], 16)])
+    if escape[:1].isdigit():
+        return bytes([int(escape, 8) & 0xFF])
+    try:
+        return _ESCAPES[escape]
+    except KeyError:
+        raise ValueError(f"invalid escape sequence \\{escape.decode()}")
+
+
+def escape(s: bytes) -> bytes:
+    """Encode s for use in a quoted PO string."""
+    return _UNSAFE_RE.sub(lambda m: _QUOTES[m.group(0)], s)
+
+
+def unescape(s: bytes) -> bytes:
+    """Decode the contents of a quoted PO string."""
+    if b"\\" not in s:
+        return s
+    return _ESCAPE_RE.sub(_unescape_match, s)
+
+
+def _comment_text(text: bytes) -> bytes:
+    return text[1:] if text.startswith(b" ") else text
+
+
+class _Parser:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.entry = POEntry()
+        self.flags: List[str] = []
+        self.comments: List[bytes] = []
+        self.extracted_comments: List[bytes] = []
+        self.references: List[bytes] = []
+        self.obsolete = False
+        self.section: Optional[str] = None
+        self.plural_index = 0
+        self.lineno = 0
+
+    def error(self, message: str) -> POSyntaxError:
+        return POSyntaxError(f"{self.path}:{self.lineno}: {message}")
+
+    def finish(self) -> Optional[POEntry]:
+        entry = None
+        if self.section is not None:
+            if not self.entry.msgstr:
+                raise self.error("missing msgstr")
+            entry = self.entry
+            entry.flags = self.flags
+            entry.obsolete = self.obsolete
+            entry.comments = self.comments
+            entry.extracted_comments = self.extracted_comments
+            entry.references = self.references
+        elif self.entry.msgctxt is not None:
+            raise self.error("missing msgid")
+        self.entry = POEntry()
+        self.flags = []
+        self.comments = []
+        self.extracted_comments = []
+        self.references = []
+        self.section = None
+        return entry
+
+    def string(self, line: bytes) -> bytes:
+        if len(line) < 2 or line[:1] != b'"' or line[-1:] != b'"':
+            raise self.error("expected quoted string")
+        try:
+            return unescape(line[1:-1])
+        except ValueError as e:
+            raise self.error(str(e)) from None
+
+    def keyword(self, keyword: bytes, rest: bytes) -> Optional[POEntry]:
+        value = self.string(rest.strip())
+        done = None
+        if keyword == b"msgctxt":
+            if self.section == "msgstr":
+                done = self.finish()
+            self.entry.msgctxt = value
+            self.entry.lineno = self.lineno
+            self.section = None
+        elif keyword == b"msgid":
+            if self.section == "msgstr":
+                done = self.finish()
+            elif self.section is not None:
+                raise self.error("unexpected msgid")
+            self.entry.msgid = value
+            if self.entry.msgctxt is None:
+                self.entry.lineno = self.lineno
+            self.section = "msgid"
+        elif keyword == b"msgid_plural":
+            if self.section != "msgid":
+                raise self.error("unexpected msgid_plural")
+            self.entry.msgid_plural = value
+            self.section = "msgid_plural"
+        else:
+            if self.section is None:
+                raise self.error("msgstr without msgid")
+            m = _MSGSTR_INDEX_RE.fullmatch(keyword)
+            if m is not None:
+                if self.entry.msgid_plural is None:
+                    raise self.error("plural msgstr without msgid_plural")
+                self.plural_index = int(m.group(1))
+                if self.plural_index != len(self.entry.msgstr):
+                    raise self.error("plural msgstr out of order")
+            elif self.entry.msgid_plural is not None:
+                raise self.error("expected plural msgstr")
+            elif self.entry.msgstr:
+                raise self.error("duplicate msgstr")
+            else:
+                self.plural_index = 0
+            self.entry.msgstr.append(value)
+            self.section = "msgstr"
+        return done
+
+    def continuation(self, line: bytes) -> None:
+        value = self.string(line)
+        if self.section == "msgid":
+            self.entry.msgid += value
+        elif self.section == "msgid_plural":
+            assert self.entry.msgid_plural is not None
+            self.entry.msgid_plural += value
+        elif self.section == "msgstr":
+            self.entry.msgstr[self.plural_index] += value
+        elif self.section is None and self.entry.msgctxt is not None:
+            self.entry.msgctxt += value
+        else:
+            raise self.error("unexpected string")
+
+    def feed(self, line: bytes, obsolete: bool = False) -> Optional[POEntry]:
+        """Process a line, returning the entry it completed, if any."""
+        done = None
+        line = line.strip()
+        if obsolete != self.obsolete and line:
+            if self.section is not None or self.entry.msgctxt is not None:
+                done = self.finish()
+            self.obsolete = obsolete
+        if not line:
+            return self.finish()
+        elif line.startswith(b"#"):
+            if self.section == "msgstr":
+                done = self.finish()
+            if line.startswith(b"#,"):
+                self.flags.extend(
+                    flag.strip()
+                    for flag in line[2:].decode("ascii", "replace").split(",")
+                    if flag.strip()
+                )
+            elif line.startswith(b"#:"):
+                self.references.extend(line[2:].split())
+            elif line.startswith(b"#."):
+                self.extracted_comments.append(_comment_text(line[2:]))
+            elif line == b"#" or line.startswith(b"# "):
+                self.comments.append(_comment_text(line[1:]))
+        elif line.startswith(b'"'):
+            self.continuation(line)
+        else:
+            quote = line.find(b'"')
+            if quote == -1:
+                raise self.error("expected quoted string")
+            keyword, rest = line[:quote].strip(), line[quote:]
+            if keyword not in (b"msgctxt", b"msgid", b"msgid_plural") and (
+                not keyword.startswith(b"msgstr")
+            ):
+                raise self.error(f"unknown keyword {keyword!r}")
+            done = self.keyword(keyword, rest) or done
+        return done
+
+
+def iter_po(path: str, obsolete: bool = False) -> Iterator[POEntry]:
+    """Iterate over the entries of a PO file.
+
+    The file is read line by line and entries are yielded as soon as they
+    are complete, so memory use does not depend on the size of the
+    catalog. Obsolete (``#~``) entries are skipped unless obsolete is
+    true, in which case they are yielded with ``obsolete`` set.
+    """
+    parser = _Parser(path)
+    with open(path, "rb") as f:
+        for i, line in enumerate(f):
+            parser.lineno += 1
+            if i == 0 and line.startswith(b"\xef\xbb\xbf"):
+                line = line[3:]
+            if line.startswith(b"#~"):
+                if not obsolete:
+                    continue
+                line = line[2:]
+                if line.startswith(b"|"):
+                    # Previous msgid of an obsolete entry
+                    line = b"#" + line
+                entry = parser.feed(line, obsolete=True)
+            else:
+                entry = parser.feed(line)
+            if entry is not None:
+                yield entry
+    parser.lineno += 1
+    entry = parser.finish()
+    if entry is not None:
+        yield entry
+
+
+def parse_po(path: str) -> List[POEntry]:
+    """Parse a PO file, skipping obsolete entries."""
+    return list(iter_po(path))
+
+
+def _width(s: bytes) -> int:
+    return len(s.decode("utf-8", "replace"))
+
+
+def _wrap_line(line: bytes, width: int) -> List[bytes]:
+    # Break after spaces so that quoted lines fit in width columns; words
+    # that don't fit on a line of their own are not broken.
+    chunks: List[bytes] = []
+    for word in re.split(rb"(?<= )", escape(line)):
+        if chunks and _width(chunks[-1]) + _width(word) + 2 <= width:
+            chunks[-1] += word
+        elif word:
+            chunks.append(word)
+    return chunks
+
+
+def _format_string(keyword: bytes, value: bytes, width: int = 79) -> bytes:
+    # Like xgettext, put each line of a multi-line string on its own line,
+    # and wrap long lines; either starts the string on a line of its own.
+    lines = [line for line in re.split(rb"(?<=\n)", value) if line]
+    if len(lines) <= 1:
+        quoted = keyword + b' "' + escape(value) + b'"'
+        if _width(quoted) <= width:
+            return quoted + b"\n"
+    chunks = [chunk for line in lines for chunk in _wrap_line(line, width)]
+    return keyword + b' ""\n' + b"".join(b'"' + c + b'"\n' for c in chunks)
+
+
+def _wrap_references(references: List[bytes], width: int = 79) -> List[bytes]:
+    lines: List[bytes] = []
+    for reference in references:
+        if lines and len(lines[-1]) + 1 + len(reference) <= width:
+            lines[-1] += b" " + reference
+        else:
+            lines.append(b"#: " + reference)
+    return lines
+
+
+def format_entry(entry: POEntry) -> bytes:
+    """Serialize a (non-obsolete) entry in PO syntax."""
+    lines = [b"#" if not c else b"# " + c for c in entry.comments]
+    lines.extend(b"#. " + c for c in entry.extracted_comments)
+    lines.extend(_wrap_references(entry.references))
+    if entry.flags:
+        lines.append(b"#, " + ", ".join(entry.flags).encode("ascii"))
+    out = b"".join(line + b"\n" for line in lines)
+    if entry.msgctxt is not None:
+        out += _format_string(b"msgctxt", entry.msgctxt)
+    out += _format_string(b"msgid", entry.msgid)
+    if entry.msgid_plural is None:
+        msgstr = entry.msgstr[0] if entry.msgstr else b""
+        out += _format_string(b"msgstr", msgstr)
+    else:
+        out += _format_string(b"msgid_plural", entry.msgid_plural)
+        for i, msgstr in enumerate(entry.msgstr or [b"", b""]):
+            out += _format_string(f"msgstr[{i}]".encode("ascii"), msgstr)
+    return out
+
+
+def format_po(entries: Iterable[POEntry]) -> bytes:
+    """Serialize entries as the contents of a PO file."""
+    return b"\n".join(format_entry(entry) for entry in entries)
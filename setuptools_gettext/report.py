@@ -0,0 +1,102 @@
+#
+# Copyright (C) 2026 Jelmer Vernooĳ <jelmer@jelmer.uk>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA 02110-1301 USA
+
+"""Timing instrumentation for the gettext commands."""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+REPORT_ENV = "SETUPTOOLS_GETTEXT_REPORT"
+
+# Report files written by this process; the first report written to a path
+# replaces its contents, later ones are appended.
+_written_paths: Set[str] = set()
+
+
+def file_size(path: str) -> Optional[int]:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+@dataclass
+class CommandReport:
+    """Timings and per-file statistics for a single command run.
+
+    Reports are always collected, since that is cheap, but only written
+    when a report path is configured.
+    """
+
+    command: str
+    path: Optional[str] = None
+    info: Dict[str, Any] = field(default_factory=dict)
+    phases: Dict[str, float] = field(default_factory=dict)
+    files: List[Dict[str, object]] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def record(self, **fields: object) -> None:
+        with self._lock:
+            self.files.append(fields)
+
+    def as_dict(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for entry in self.files:
+            status = str(entry.get("status", "unknown"))
+            counts[status] = counts.get(status, 0) + 1
+        return {
+            "command": self.command,
+            **self.info,
+            "duration": time.perf_counter() - self.started,
+            "phases": self.phases,
+            "counts": counts,
+            "files": self.files,
+        }
+
+    def write(self) -> None:
+        if not self.path:
+            return
+        import json
+
+        path = os.path.abspath(self.path)
+        reports = []
+        if path in _written_paths:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    reports = json.load(f)
+            except (OSError, ValueError):
+                reports = []
+        reports.append(self.as_dict())
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+        _written_paths.add(path)
@@ -0,0 +1,115 @@
+#
+# Copyright (C) 2026 Jelmer Vernooĳ <jelmer@jelmer.uk>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA 02110-1301 USA
+
+"""Polling for changed catalogs, for build_mo --watch."""
+
+import os
+import time
+from typing import Callable, Dict, Iterator, Optional, Set, Tuple
+
+from .catalog import catalog_index, clear_catalog_index
+
+DEFAULT_WATCH_INTERVAL = 1.0
+DEFAULT_WATCH_DEBOUNCE = 0.3
+
+_Stat = Tuple[int, int]
+
+
+def _stat(path: str) -> Optional[_Stat]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class CatalogWatcher:
+    """Watch a catalog source directory by polling.
+
+    Only the catalogs and directories in the (cached) catalog index are
+    stat()ed on each poll. The directory is only walked again when one of
+    those directories changes, i.e. when catalogs or directories that may
+    hold them later are added or removed.
+    """
+
+    def __init__(
+        self,
+        source_dir: str,
+        interval: float = DEFAULT_WATCH_INTERVAL,
+        debounce: float = DEFAULT_WATCH_DEBOUNCE,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Watch source_dir, polling every interval seconds.
+
+        Changes are reported once nothing else has changed for debounce
+        seconds, so that saving several files (or one file in several
+        writes) triggers a single rebuild.
+        """
+        self.source_dir = source_dir
+        self.interval = interval
+        self.debounce = debounce
+        self.sleep = sleep
+        self.dirs: Dict[str, Optional[_Stat]] = {}
+        self.files: Dict[str, Optional[_Stat]] = {}
+        self._scan()
+
+    def _scan(self) -> None:
+        index = catalog_index(self.source_dir)
+        # The source directory itself may not exist yet.
+        dirs = [self.source_dir] + index.dirs
+        self.files = {
+            os.path.abspath(path): _stat(path) for path in index.source_files
+        }
+        self.dirs = {os.path.abspath(path): _stat(path) for path in dirs}
+
+    def poll(self) -> Set[str]:
+        """Return the (absolute) paths of catalogs changed since last poll.
+
+        Added and removed catalogs count as changed.
+        """
+        if any(_stat(path) != st for path, st in self.dirs.items()):
+            old = self.files
+            clear_catalog_index(self.source_dir)
+            self._scan()
+            return {
+                path
+                for path in set(old) | set(self.files)
+                if old.get(path) != self.files.get(path)
+            }
+        changed = set()
+        for path, st in self.files.items():
+            current = _stat(path)
+            if current != st:
+                self.files[path] = current
+                changed.add(path)
+        return changed
+
+    def __iter__(self) -> Iterator[Set[str]]:
+        """Yield batches of changed catalogs, forever."""
+        while True:
+            self.sleep(self.interval)
+            changed = self.poll()
+            if not changed:
+                continue
+            while True:
+                self.sleep(self.debounce)
+                more = self.poll()
+                if not more:
+                    break
+                changed |= more
+            yield changed
@@ -0,0 +1,85 @@
+import importlib.util
+import json
+import os
+from tempfile import TemporaryDirectory
+
+BENCH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "benchmarks", "bench.py"
+)
+
+
+def load_bench():
+    spec = importlib.util.spec_from_file_location("bench", BENCH)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_benchmarks_run(capsys):
+    bench = load_bench()
+    with TemporaryDirectory() as td:
+        output = os.path.join(td, "results.json")
+
+        assert (
+            bench.main(
+                [
+                    "--languages=2",
+                    "--domains=2",
+                    "--messages=3",
+                    "--repeat=1",
+                    "--compiler=builtin",
+                    f"--json={output}",
+                ]
+            )
+            == 0
+        )
+
+        with open(output) as f:
+            results = json.load(f)["results"]
+
+    assert {(r["benchmark"], r["layout"]) for r in results} == {
+        (name, layout)
+        for layout in ("flat", "standard")
+        for name in (
+            "discover_catalogs (cold)",
+            "discover_catalogs (cached)",
+            "find_source_files (cold)",
+            "build_mo (builtin)",
+            "install_mo (share)",
+            "install_mo (package)",
+        )
+    }
+    assert "build_mo (builtin)" in capsys.readouterr().out
+
+
+def test_benchmarks_build_jobs(capsys):
+    bench = load_bench()
+
+    assert (
+        bench.main(
+            [
+                "--languages=2",
+                "--messages=3",
+                "--repeat=1",
+                "--layout=flat",
+                "--compiler=builtin",
+                "--jobs=2",
+            ]
+        )
+        == 0
+    )
+
+    assert "build_mo (builtin, 2 jobs)" in capsys.readouterr().out
+
+
+def test_generate_tree_layouts():
+    bench = load_bench()
+    with TemporaryDirectory() as td:
+        flat = bench.generate_tree(os.path.join(td, "a"), "flat", 3, 2, 1)
+        standard = bench.generate_tree(
+            os.path.join(td, "b"), "standard", 3, 2, 1
+        )
+
+        assert len(bench.discover_catalogs(flat)) == 3
+        assert len(bench.discover_catalogs(standard)) == 6
@@ -0,0 +1,126 @@
+import os
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from setuptools_gettext.check import check_catalog
+
+HEADER = r"""msgid ""
+msgstr ""
+"Project-Id-Version: demo 1.0\n"
+"PO-Revision-Date: 2026-01-01 00:00+0000\n"
+"Last-Translator: Jan <jan@example.com>\n"
+"Language-Team: Dutch <nl@example.com>\n"
+"MIME-Version: 1.0\n"
+"Content-Type: text/plain; charset=UTF-8\n"
+"Content-Transfer-Encoding: 8bit\n"
+"Plural-Forms: nplurals=2; plural=(n != 1);\n"
+
+"""
+
+
+def check(content):
+    with TemporaryDirectory() as td:
+        po = os.path.join(td, "nl.po")
+        with open(po, "w", encoding="utf-8") as f:
+            f.write(content)
+        return [problem[len(td) + 1 :] for problem in check_catalog(po)]
+
+
+def test_check_catalog_valid():
+    assert (
+        check(
+            HEADER + "#, python-format\n"
+            'msgid "%(count)d of %(total)d"\n'
+            'msgstr "%(total)d: %(count)d"\n\n'
+            "#, python-format\n"
+            'msgid "%d file"\nmsgid_plural "%d files"\n'
+            'msgstr[0] "een bestand"\nmsgstr[1] "%d bestanden"\n\n'
+            "#, c-format\n"
+            'msgid "%s in %s"\nmsgstr "%2$s: %1$s"\n\n'
+            "#, python-format\n"
+            'msgid "Untranslated %s"\nmsgstr ""\n'
+        )
+        == []
+    )
+
+
+@pytest.mark.parametrize(
+    "entry,problem",
+    [
+        (
+            '#, python-format\nmsgid "%s files"\nmsgstr "%d bestanden"\n',
+            "nl.po:13: python-format: msgstr: format specifications in "
+            "msgid and msgstr are not the same",
+        ),
+        (
+            '#, python-format\nmsgid "%s and %s"\nmsgstr "%s"\n',
+            "nl.po:13: python-format: msgstr: number of format "
+            "specifications in msgid and msgstr does not match (2 != 1)",
+        ),
+        (
+            '#, python-format\nmsgid "%(name)s"\nmsgstr "%(naam)s"\n',
+            "nl.po:13: python-format: msgstr: argument 'naam' doesn't "
+            "exist in msgid",
+        ),
+        (
+            '#, c-format\nmsgid "%d%%"\nmsgstr "%s%%"\n',
+            "nl.po:13: c-format: msgstr: format specifications for "
+            "argument '1' differ",
+        ),
+        (
+            'msgid "file"\nmsgid_plural "files"\nmsgstr[0] "bestand"\n',
+            "nl.po:12: nplurals is 2, but the message has 1 plural forms",
+        ),
+    ],
+)
+def test_check_catalog_entry_problems(entry, problem):
+    assert check(HEADER + entry) == [problem]
+
+
+def test_check_catalog_ignores_fuzzy_entries():
+    assert (
+        check(HEADER + '#, fuzzy, python-format\nmsgid "%s"\nmsgstr "%d"\n')
+        == []
+    )
+
+
+def test_check_catalog_header_problems():
+    assert check(
+        'msgid ""\nmsgstr ""\n'
+        '"Project-Id-Version: PACKAGE VERSION\\n"\n'
+        '"Content-Type: text/plain; charset=CHARSET\\n"\n'
+        '"Plural-Forms: nplurals=1; plural=n != 1;\\n"\n'
+    ) == [
+        "nl.po:1: header field 'Project-Id-Version' still has the initial "
+        "default value",
+        "nl.po:1: header field 'PO-Revision-Date' missing",
+        "nl.po:1: header field 'Last-Translator' missing",
+        "nl.po:1: header field 'Language-Team' missing",
+        "nl.po:1: header field 'MIME-Version' missing",
+        "nl.po:1: header field 'Content-Type' still has the initial "
+        "default value",
+        "nl.po:1: header field 'Content-Transfer-Encoding' missing",
+        "nl.po:1: plural expression can produce values not smaller than "
+        "nplurals (1)",
+    ]
+
+
+def test_check_catalog_missing_plural_forms():
+    header = HEADER.replace(
+        '"Plural-Forms: nplurals=2; plural=(n != 1);\\n"\n', ""
+    )
+    assert check(
+        header + 'msgid "file"\nmsgid_plural "files"\nmsgstr[0] "bestand"\n'
+    ) == [
+        "nl.po:11: message catalog has plural form translations, but lacks "
+        "a Plural-Forms header"
+    ]
+
+
+def test_check_catalog_missing_header():
+    assert check('msgid "a"\nmsgstr "b"\n') == ["nl.po: header entry missing"]
+
+
+def test_check_catalog_example():
+    assert check_catalog(os.path.join("example", "po", "nl.po")) == []
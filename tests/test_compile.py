@@ -0,0 +1,198 @@
+import asyncio
+import gettext
+import os
+import time
+from tempfile import TemporaryDirectory
+
+import pytest
+
+import setuptools_gettext
+from setuptools_gettext import (
+    CompileResult,
+    compile_catalogs,
+    compile_catalogs_async,
+)
+
+
+def write_po(path, msgstr="Hallo"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f'msgid "Hello"\nmsgstr "{msgstr}"\n')
+
+
+def outcome(results, td):
+    return sorted(
+        (os.path.relpath(result.mo, td), result.status) for result in results
+    )
+
+
+def test_compile_catalogs():
+    with TemporaryDirectory() as td:
+        source = os.path.join(td, "po")
+        build = os.path.join(td, "build")
+        write_po(os.path.join(source, "de.po"))
+        write_po(os.path.join(source, "nl", "LC_MESSAGES", "app.po"))
+
+        results = list(
+            compile_catalogs(source, build, compiler="builtin", jobs=2)
+        )
+
+        assert outcome(results, build) == [
+            ("de/LC_MESSAGES/messages.mo", "compiled"),
+            ("nl/LC_MESSAGES/app.mo", "compiled"),
+        ]
+        with open(results[0].mo, "rb") as f:
+            assert gettext.GNUTranslations(f).gettext("Hello") == "Hallo"
+
+        write_po(os.path.join(source, "fr.po"), "Bonjour")
+        results = list(compile_catalogs(source, build, compiler="builtin"))
+
+        assert outcome(results, build) == [
+            ("de/LC_MESSAGES/messages.mo", "up-to-date"),
+            ("fr/LC_MESSAGES/messages.mo", "compiled"),
+            ("nl/LC_MESSAGES/app.mo", "up-to-date"),
+        ]
+
+
+def test_compile_catalogs_over_hard_link():
+    with TemporaryDirectory() as td:
+        source = os.path.join(td, "po")
+        build = os.path.join(td, "build")
+        write_po(os.path.join(source, "de.po"))
+        [result] = compile_catalogs(source, build, compiler="builtin")
+        shared = os.path.join(td, "shared.mo")
+        os.link(result.mo, shared)
+        with open(shared, "rb") as f:
+            before = f.read()
+
+        write_po(os.path.join(source, "de.po"), "Guten Tag")
+        [result] = compile_catalogs(source, build, compiler="builtin")
+
+        assert result.status == "compiled"
+        with open(shared, "rb") as f:
+            assert f.read() == before
+        with open(result.mo, "rb") as f:
+            assert gettext.GNUTranslations(f).gettext("Hello") == "Guten Tag"
+
+
+def test_compile_catalogs_output_base_and_languages():
+    with TemporaryDirectory() as td:
+        source = os.path.join(td, "po")
+        write_po(os.path.join(source, "de.po"))
+        write_po(os.path.join(source, "nl", "LC_MESSAGES", "app.po"))
+
+        results = list(
+            compile_catalogs(
+                source,
+                td,
+                compiler="builtin",
+                output_base="demo",
+                languages=["nl"],
+            )
+        )
+
+        assert outcome(results, td) == [("nl/LC_MESSAGES/demo.mo", "compiled")]
+
+
+def test_compile_catalogs_yields_failures():
+    with TemporaryDirectory() as td:
+        source = os.path.join(td, "po")
+        write_po(os.path.join(source, "de.po"))
+        with open(os.path.join(source, "fr.po"), "w") as f:
+            f.write("garbage\n")
+
+        results = {
+            result.catalog.lang: result
+            for result in compile_catalogs(source, td, compiler="builtin")
+        }
+
+        assert results["de"].status == "compiled"
+        assert results["fr"].status == "failed"
+        assert "fr.po:1" in str(results["fr"].error)
+
+
+def test_compile_catalogs_auto_compiler(monkeypatch):
+    monkeypatch.setattr(setuptools_gettext, "has_msgfmt", lambda: False)
+    monkeypatch.setattr(
+        setuptools_gettext, "has_translate_toolkit", lambda: False
+    )
+    with TemporaryDirectory() as td:
+        write_po(os.path.join(td, "po", "de.po"))
+
+        [result] = compile_catalogs(os.path.join(td, "po"), td)
+
+        assert result.status == "compiled"
+
+
+def test_compile_catalogs_rejects_unknown_compiler():
+    with pytest.raises(ValueError, match="compiler"):
+        list(compile_catalogs("po", "build", compiler="gcc"))
+
+
+async def collect(results):
+    return [result async for result in results]
+
+
+def test_compile_catalogs_async():
+    with TemporaryDirectory() as td:
+        source = os.path.join(td, "po")
+        for lang in ["de", "fr", "nl"]:
+            write_po(os.path.join(source, f"{lang}.po"))
+
+        results = asyncio.run(
+            collect(
+                compile_catalogs_async(source, td, compiler="builtin", jobs=2)
+            )
+        )
+
+        assert all(isinstance(result, CompileResult) for result in results)
+        assert sorted(result.catalog.lang for result in results) == [
+            "de",
+            "fr",
+            "nl",
+        ]
+        assert {result.status for result in results} == {"compiled"}
+
+        with pytest.raises(ValueError, match="compiler"):
+            asyncio.run(
+                collect(compile_catalogs_async(source, td, compiler="x"))
+            )
+
+
+def test_compile_catalogs_async_stops_early(monkeypatch):
+    compiled = []
+    compile_catalog = setuptools_gettext.compile.compile_catalog
+
+    def slow_compile_catalog(po, mo, *args: object) -> None:
+        time.sleep(0.05)
+        compile_catalog(po, mo, *args)
+        compiled.append(po)
+
+    monkeypatch.setattr(
+        setuptools_gettext.compile, "compile_catalog", slow_compile_catalog
+    )
+
+    async def first(source: str, td: str) -> CompileResult:
+        results = compile_catalogs_async(source, td, compiler="builtin")
+        async for result in results:
+            break
+        await results.aclose()
+        return result
+
+    with TemporaryDirectory() as td:
+        source = os.path.join(td, "po")
+        for i in range(16):
+            write_po(os.path.join(source, f"l{i:02d}.po"))
+
+        result = asyncio.run(first(source, td))
+
+        assert result.status == "compiled"
+        assert 1 <= len(compiled) <= 3
+        monkeypatch.undo()
+        # The manifest records what was compiled before stopping.
+        [rerun] = [
+            r
+            for r in compile_catalogs(source, td, compiler="builtin")
+            if r.mo == result.mo
+        ]
+        assert rerun.status == "up-to-date"
@@ -1,3 +1,4 @@
+import gettext
 import os
 import shutil
 from tempfile import TemporaryDirectory
@@ -64,7 +65,9 @@ def test_load_pyproject_config_default_compiler():
     assert getattr(dist, "gettext_install_layout") == "share"
 
 
-@pytest.mark.parametrize("compiler", ["auto", "msgfmt", "translate-toolkit"])
+@pytest.mark.parametrize(
+    "compiler", ["auto", "msgfmt", "translate-toolkit", "builtin"]
+)
 def test_load_pyproject_config_compiler(compiler):
     dist = Distribution()
 
@@ -115,6 +118,35 @@ def test_build_mo_uses_msgfmt_compiler_from_config():
     assert cmd.translate_toolkit is None
 
 
+def test_build_mo_uses_builtin_compiler_from_config():
+    with TemporaryDirectory() as td:
+        source_dir = os.path.join(td, "po")
+        shutil.copytree(os.path.join("example", "po"), source_dir)
+        build_dir = os.path.join(td, "locale")
+        dist = Distribution(attrs={"name": "hallowereld"})
+
+        load_pyproject_config(
+            dist,
+            {
+                "source_dir": source_dir,
+                "build_dir": build_dir,
+                "compiler": "builtin",
+            },
+        )
+        cmd = build_mo(dist)
+        cmd.initialize_options()
+        cmd.finalize_options()
+        cmd.run()
+
+        mo = os.path.join(build_dir, "nl", "LC_MESSAGES", "hallowereld.mo")
+        assert cmd.builtin is True
+        assert cmd.msgfmt is None
+        assert cmd.get_outputs() == [mo]
+        with open(mo, "rb") as f:
+            translations = gettext.GNUTranslations(f)
+        assert translations.gettext("Hello World!") == "Hallo Wereld!"
+
+
 def test_build_mo_uses_translate_toolkit_compiler_from_config():
     with TemporaryDirectory() as td:
         source_dir = os.path.join(td, "po")
@@ -208,3 +240,84 @@ def test_update_pot():
             os.chdir(old_cwd)
         with open(os.path.join(td, "example", "po", "hallowereld.pot")) as f:
             assert "Hello Example" in f.read()
+
+
+def test_update_pot_builtin_extractor():
+    with TemporaryDirectory() as td:
+        shutil.copytree("example", td + "/example")
+        p = os.path.join(td, "example", "hallowereld", "example.py")
+        with open(p, "w") as f:
+            f.write("from gettext import gettext as _\n")
+            f.write("# i18n: Greeting\n")
+            f.write('print(_("Hello Example"))\n')
+
+        dist = Distribution(
+            attrs={"name": "hallowereld", "packages": ["hallowereld"]}
+        )
+
+        load_pyproject_config(dist, {"extractor": "builtin"})
+
+        old_cwd = os.getcwd()
+        os.chdir(os.path.join(td, "example"))
+        try:
+            cmd = update_pot(dist)
+            cmd.initialize_options()
+            cmd.jobs = 2
+            cmd.finalize_options()
+            cmd.run()
+        finally:
+            os.chdir(old_cwd)
+        with open(os.path.join(td, "example", "po", "hallowereld.pot")) as f:
+            pot = f.read()
+        assert (
+            "#. i18n: Greeting\n"
+            "#: ./hallowereld/example.py:3\n"
+            'msgid "Hello Example"\n'
+            'msgstr ""\n'
+        ) in pot
+        assert 'msgid "Hello World!"' in pot
+
+
+@pytest.mark.parametrize(("jobs", "expected"), [(None, 1), (1, 1), ("3", 3)])
+def test_load_pyproject_config_jobs(jobs, expected):
+    dist = Distribution()
+
+    load_pyproject_config(dist, {} if jobs is None else {"jobs": jobs})
+
+    assert getattr(dist, "gettext_jobs") == expected
+
+
+def test_load_pyproject_config_auto_jobs():
+    dist = Distribution()
+
+    load_pyproject_config(dist, {"jobs": "auto"})
+
+    assert getattr(dist, "gettext_jobs") == (os.cpu_count() or 1)
+
+
+def test_load_pyproject_config_rejects_invalid_jobs():
+    dist = Distribution()
+
+    with pytest.raises(ValueError, match="Unsupported setuptools-gettext"):
+        load_pyproject_config(dist, {"jobs": -1})
+
+
+@pytest.mark.parametrize(
+    ("cache_size", "expected"), [(1024, 1024), ("64M", 64 * 1024 * 1024)]
+)
+def test_load_pyproject_config_cache(cache_size, expected):
+    dist = Distribution()
+
+    load_pyproject_config(
+        dist, {"cache_dir": "~/.cache/gettext", "cache_size": cache_size}
+    )
+
+    assert getattr(dist, "gettext_cache_dir") == "~/.cache/gettext"
+    assert getattr(dist, "gettext_cache_size") == expected
+
+
+def test_load_pyproject_config_rejects_invalid_cache_size():
+    dist = Distribution()
+
+    with pytest.raises(ValueError, match="Unsupported setuptools-gettext"):
+        load_pyproject_config(dist, {"cache_size": "lots"})
@@ -0,0 +1,337 @@
+import os
+from tempfile import TemporaryDirectory
+
+import pytest
+from setuptools import Distribution
+
+from setuptools_gettext import _default_extract_include, load_pyproject_config
+from setuptools_gettext.extract import (
+    extract_python,
+    find_sources,
+    is_ignored,
+    merge_entries,
+    parse_ignore_patterns,
+    shard_files,
+    split_entries,
+)
+from setuptools_gettext.po import POEntry, format_entry
+
+
+def make_tree(td, paths):
+    for path in paths:
+        path = os.path.join(td, *path.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write("")
+
+
+def relative(td, paths):
+    return [os.path.relpath(path, td).replace(os.sep, "/") for path in paths]
+
+
+def test_find_sources_prunes_default_directories():
+    with TemporaryDirectory() as td:
+        make_tree(
+            td,
+            [
+                "setup.py",
+                "pkg/__init__.py",
+                "pkg/build/helper.py",
+                "pkg/data.txt",
+                ".git/hooks/x.py",
+                ".tox/py3/lib/y.py",
+                "build/lib/pkg/__init__.py",
+                "dist/z.py",
+                "node_modules/w.py",
+                "venv/lib/v.py",
+                "pkg.egg-info/e.py",
+            ],
+        )
+
+        found = find_sources(td)
+
+    assert relative(td, found) == [
+        "pkg/__init__.py",
+        "pkg/build/helper.py",
+        "setup.py",
+    ]
+
+
+def test_find_sources_include_and_exclude(monkeypatch):
+    with TemporaryDirectory() as td:
+        make_tree(
+            td,
+            [
+                "pkg/a.py",
+                "pkg/tests/test_a.py",
+                "pkg/sub/b.py",
+                "other/c.py",
+                "d.py",
+            ],
+        )
+        visited = []
+        scandir = os.scandir
+
+        def tracking_scandir(path) -> object:
+            visited.append(os.path.relpath(path, td))
+            return scandir(path)
+
+        monkeypatch.setattr(os, "scandir", tracking_scandir)
+        found = find_sources(td, include=["pkg/**/*.py"], exclude=["tests/"])
+        monkeypatch.undo()
+
+    assert relative(td, found) == ["pkg/a.py", "pkg/sub/b.py"]
+    assert "other" not in visited
+    assert os.path.join("pkg", "tests") not in visited
+
+
+def test_find_sources_respects_gitignore():
+    with TemporaryDirectory() as td:
+        make_tree(
+            td,
+            [
+                "a.py",
+                "generated.py",
+                "pkg/b.py",
+                "pkg/gen/c.py",
+                "pkg/gen/keep.py",
+                "pkg/_version.py",
+            ],
+        )
+        with open(os.path.join(td, ".gitignore"), "w") as f:
+            f.write("# comment\ngenerated.py\n_version.py\n")
+        with open(os.path.join(td, "pkg", ".gitignore"), "w") as f:
+            f.write("/gen/*\n!/gen/keep.py\n")
+
+        assert relative(td, find_sources(td)) == [
+            "a.py",
+            "pkg/b.py",
+            "pkg/gen/keep.py",
+        ]
+        assert relative(td, find_sources(td, gitignore=False)) == [
+            "a.py",
+            "generated.py",
+            "pkg/_version.py",
+            "pkg/b.py",
+            "pkg/gen/c.py",
+            "pkg/gen/keep.py",
+        ]
+
+
+@pytest.mark.parametrize(
+    ("pattern", "path", "is_dir", "expected"),
+    [
+        ("*.py", "a/b.py", False, True),
+        ("/b.py", "a/b.py", False, False),
+        ("a/*.py", "a/b.py", False, True),
+        ("a/**/c.py", "a/b/d/c.py", False, True),
+        ("out/", "a/out", False, False),
+        ("out/", "a/out", True, True),
+        ("[!a]*.py", "b.py", False, True),
+        ("[!a]*.py", "a.py", False, False),
+    ],
+)
+def test_ignore_patterns(pattern, path, is_dir, expected):
+    rules = parse_ignore_patterns([pattern])
+
+    assert is_ignored(rules, path, is_dir) is expected
+
+
+def test_default_extract_include():
+    dist = Distribution(
+        attrs={
+            "name": "demo",
+            "packages": ["demo", "demo.sub"],
+            "package_dir": {"": "src"},
+            "py_modules": ["tool"],
+        }
+    )
+
+    assert _default_extract_include(dist) == [
+        "src/demo/*.py",
+        "src/demo/sub/*.py",
+        "src/tool.py",
+    ]
+    assert _default_extract_include(Distribution()) == ["**/*.py"]
+
+
+def test_load_pyproject_config_extract_globs():
+    dist = Distribution()
+    load_pyproject_config(
+        dist, {"extract_include": "app/**/*.py", "extract_exclude": ["x/"]}
+    )
+
+    assert getattr(dist, "gettext_extract_include") == ["app/**/*.py"]
+    assert getattr(dist, "gettext_extract_exclude") == ["x/"]
+
+    with pytest.raises(ValueError, match="extract_exclude"):
+        load_pyproject_config(dist, {"extract_exclude": [1]})
+
+
+def test_merge_entries():
+    fragments = [
+        (
+            "./a.py",
+            [
+                POEntry(msgid=b"Hello", references=[b"1"], flags=["x"]),
+                POEntry(msgid=b"Bye", references=[b"3"]),
+            ],
+        ),
+        (
+            "./b.py",
+            [
+                POEntry(
+                    msgid=b"Hello",
+                    references=[b"7"],
+                    flags=["x", "y"],
+                    extracted_comments=[b"i18n: greeting"],
+                )
+            ],
+        ),
+    ]
+
+    entries = merge_entries(fragments)
+
+    assert [entry.msgid for entry in entries] == [b"Hello", b"Bye"]
+    assert entries[0].references == [b"./a.py:1", b"./b.py:7"]
+    assert entries[0].flags == ["x", "y"]
+    assert entries[0].extracted_comments == [b"i18n: greeting"]
+
+
+def test_format_entry_wraps_long_strings():
+    entry = POEntry(
+        msgid=b"Lorem ipsum dolor sit amet, consectetur adipiscing elit, "
+        b"sed do eiusmod tempor incididunt ut labore et dolore magna "
+        b'aliqua.\nUt enim ad "minim" veniam.',
+        msgstr=[b"x" * 80],
+    )
+
+    # As written by xgettext.
+    assert format_entry(entry) == (
+        b'msgid ""\n'
+        b'"Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do '
+        b'eiusmod "\n'
+        b'"tempor incididunt ut labore et dolore magna aliqua.\\n"\n'
+        b'"Ut enim ad \\"minim\\" veniam."\n'
+        b'msgstr ""\n'
+        b'"' + b"x" * 80 + b'"\n'
+    )
+
+
+def test_shard_files():
+    paths = [f"./{i}.py" for i in range(10)]
+
+    assert shard_files(paths, 1) == [paths]
+    assert shard_files(paths, 2) == [paths[i : i + 2] for i in range(0, 10, 2)]
+    assert shard_files([], 4) == []
+    long = ["./" + "x" * 10000 + f"{i}.py" for i in range(3)]
+    assert shard_files(long, 1) == [[path] for path in long]
+
+
+def test_split_entries():
+    entries = [
+        POEntry(msgid=b"", msgstr=[b"header"]),
+        POEntry(msgid=b"B", references=[b"./b.py:9", b"./a.py:4"]),
+        POEntry(msgid=b"A", references=[b"./a.py:2"], flags=["x"]),
+    ]
+
+    by_file, ambiguous = split_entries(entries, ["./a.py", "./b.py", "./c.py"])
+
+    assert ambiguous == []
+    assert [(e.msgid, e.references) for e in by_file["./a.py"]] == [
+        (b"A", [b"2"]),
+        (b"B", [b"4"]),
+    ]
+    assert [(e.msgid, e.references) for e in by_file["./b.py"]] == [
+        (b"B", [b"9"])
+    ]
+    assert by_file["./c.py"] == []
+
+
+def test_split_entries_ambiguous_comments():
+    entries = [
+        POEntry(
+            msgid=b"B",
+            references=[b"./a.py:1", b"./b.py:1"],
+            extracted_comments=[b"i18n: from a"],
+        ),
+        POEntry(msgid=b"C", references=[b"./c.py:1"]),
+    ]
+
+    by_file, ambiguous = split_entries(entries, ["./a.py", "./b.py", "./c.py"])
+
+    assert ambiguous == ["./a.py", "./b.py"]
+    assert list(by_file) == ["./c.py"]
+
+    by_file, ambiguous = split_entries(
+        [POEntry(msgid=b"X", references=[b"./other.py:1"])],
+        ["./a.py", "./b.py"],
+    )
+    assert (by_file, ambiguous) == ({}, ["./a.py", "./b.py"])
+
+
+SOURCE = """# -*- coding: utf-8 -*-
+from gettext import gettext as _, ngettext, pgettext
+
+# A regular comment.
+# i18n: Shown on startup;
+# keep it short.
+print(_("Hello"))
+print(_(name))
+msg = translations.gettext(
+    "Multi"
+    "line"
+)
+
+# Not for translators.
+ngettext("%d file", "%d files", n)
+pgettext("menu", "Open")  # i18n: not extracted
+_(f"{x}")
+_("Hello")
+_("100%% sure %(name)s")
+_("Done: 50%")
+"""
+
+
+def test_extract_python():
+    with TemporaryDirectory() as td:
+        path = os.path.join(td, "mod.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(SOURCE)
+
+        entries = extract_python(path)
+
+    assert [
+        (e.msgctxt, e.msgid, e.msgid_plural, e.references) for e in entries
+    ] == [
+        (None, b"Hello", None, [b"7", b"18"]),
+        (None, b"Multiline", None, [b"10"]),
+        (None, b"%d file", b"%d files", [b"15"]),
+        (b"menu", b"Open", None, [b"16"]),
+        (None, b"100%% sure %(name)s", None, [b"19"]),
+        (None, b"Done: 50%", None, [b"20"]),
+    ]
+    assert entries[0].extracted_comments == [
+        b"i18n: Shown on startup;",
+        b"keep it short.",
+    ]
+    assert entries[2].extracted_comments == []
+    assert entries[3].extracted_comments == []
+    assert [e.flags for e in entries] == [
+        [],
+        [],
+        ["python-format"],
+        [],
+        ["python-format"],
+        [],
+    ]
+
+
+def test_extract_python_syntax_error():
+    with TemporaryDirectory() as td:
+        path = os.path.join(td, "mod.py")
+        with open(path, "w") as f:
+            f.write("_(\n")
+
+        with pytest.raises(SyntaxError):
+            extract_python(path)
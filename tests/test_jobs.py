@@ -0,0 +1,38 @@
+import multiprocessing
+import os
+
+import pytest
+
+from setuptools_gettext.jobs import call_in, iter_jobs, worker_processes
+
+
+def test_worker_processes_single_job_runs_inline():
+    with worker_processes(1, 10) as pool:
+        assert pool is None
+        assert call_in(pool, os.getpid) == os.getpid()
+    with worker_processes(4, 1) as pool:
+        assert pool is None
+
+
+def test_worker_processes_run_in_other_processes():
+    with worker_processes(2, 4) as pool:
+        assert pool is not None
+        pids = {
+            result.value
+            for result in iter_jobs(
+                lambda _item: call_in(pool, os.getpid), range(4), 2
+            )
+        }
+    assert os.getpid() not in pids
+
+
+def test_call_in_reraises_worker_errors():
+    with worker_processes(2, 2) as pool:
+        with pytest.raises(ValueError, match="invalid literal"):
+            call_in(pool, int, "x")
+
+
+def test_worker_processes_start_all_workers():
+    with worker_processes(3, 5) as pool:
+        assert pool is not None
+        assert len(multiprocessing.active_children()) == 3
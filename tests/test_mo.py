@@ -0,0 +1,308 @@
+import gettext
+import os
+import shutil
+import struct
+import subprocess
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from setuptools_gettext.mo import (
+    MOFile,
+    MOFormatError,
+    compile_mo,
+    generate_mo,
+    hash_table_size,
+    validate_mo,
+)
+from setuptools_gettext.po import POSyntaxError, iter_po, parse_po
+
+PO = r"""# Dutch translations.
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\n"
+"Plural-Forms: nplurals=2; plural=(n != 1);\n"
+
+#: app.py:1
+msgid "Hello"
+msgstr "Hallo"
+
+msgid "Multi"
+"line"
+msgstr "Meer\n"
+"regels\t\"x\""
+
+msgctxt "menu"
+msgid "File"
+msgstr "Bestand"
+
+msgid "%d file"
+msgid_plural "%d files"
+msgstr[0] "%d bestand"
+msgstr[1] "%d bestanden"
+
+#, fuzzy
+msgid "Fuzzy"
+msgstr "Vaag"
+
+msgid "Untranslated"
+msgstr ""
+
+#~ msgid "Obsolete"
+#~ msgstr "Verouderd"
+
+msgid "Caf\303\251"
+msgstr "Café"
+"""
+
+
+def write_po(td, content=PO):
+    po = os.path.join(td, "nl.po")
+    with open(po, "w", encoding="utf-8") as f:
+        f.write(content)
+    return po
+
+
+def test_parse_po():
+    with TemporaryDirectory() as td:
+        entries = parse_po(write_po(td))
+
+    assert [entry.msgid for entry in entries] == [
+        b"",
+        b"Hello",
+        b"Multiline",
+        b"File",
+        b"%d file",
+        b"Fuzzy",
+        b"Untranslated",
+        "Café".encode(),
+    ]
+    assert entries[2].msgstr == [b'Meer\nregels\t"x"']
+    assert entries[3].msgctxt == b"menu"
+    assert entries[4].msgid_plural == b"%d files"
+    assert entries[4].msgstr == [b"%d bestand", b"%d bestanden"]
+    assert entries[5].fuzzy
+
+
+def test_parse_po_syntax_error():
+    with TemporaryDirectory() as td:
+        po = write_po(td, 'msgid "foo"\nmsgstr bar\n')
+
+        with pytest.raises(POSyntaxError, match="nl.po:2"):
+            parse_po(po)
+
+
+def test_compile_mo_loads_with_gettext():
+    with TemporaryDirectory() as td:
+        mo = os.path.join(td, "nl.mo")
+        compile_mo(write_po(td), mo)
+
+        with open(mo, "rb") as f:
+            translations = gettext.GNUTranslations(f)
+
+    assert translations.gettext("Hello") == "Hallo"
+    assert translations.gettext("Multiline") == 'Meer\nregels\t"x"'
+    assert translations.pgettext("menu", "File") == "Bestand"
+    assert translations.ngettext("%d file", "%d files", 1) == "%d bestand"
+    assert translations.ngettext("%d file", "%d files", 2) == "%d bestanden"
+    assert translations.gettext("Café") == "Café"
+    assert translations.gettext("Fuzzy") == "Fuzzy"
+    assert translations.gettext("Untranslated") == "Untranslated"
+    assert translations.gettext("Obsolete") == "Obsolete"
+
+
+def test_compile_mo_use_fuzzy():
+    with TemporaryDirectory() as td:
+        mo = os.path.join(td, "nl.mo")
+        compile_mo(write_po(td), mo, use_fuzzy=True)
+
+        with open(mo, "rb") as f:
+            translations = gettext.GNUTranslations(f)
+
+    assert translations.gettext("Fuzzy") == "Vaag"
+    assert translations.gettext("Obsolete") == "Obsolete"
+
+
+def test_generate_mo_deduplicates_strings():
+    messages = {
+        b"": b"Language: en\n",
+        b"Open": b"Open",
+        b"Open file": b"Open",
+        b"Close": b"Close",
+    }
+    standard = generate_mo(messages)
+    optimized = generate_mo(messages, deduplicate=True)
+
+    assert len(optimized) == len(standard) - len(b"Open\0Open\0Close\0")
+    with TemporaryDirectory() as td:
+        mo = os.path.join(td, "en.mo")
+        with open(mo, "wb") as f:
+            f.write(optimized)
+        validate_mo(mo)
+        with open(mo, "rb") as f:
+            translations = gettext.GNUTranslations(f)
+        with MOFile.open(mo) as f:
+            assert {bytes(k): bytes(v) for k, v in f} == messages
+
+    assert translations.gettext("Open file") == "Open"
+    assert translations.gettext("Close") == "Close"
+
+
+def test_hash_table_size_matches_msgfmt():
+    assert hash_table_size(0) == 3
+    assert hash_table_size(1) == 3
+    assert hash_table_size(2) == 5
+    assert hash_table_size(3) == 5
+    assert hash_table_size(4) == 5
+    assert hash_table_size(5) == 7
+    assert hash_table_size(6) == 11
+    assert hash_table_size(7) == 11
+    assert hash_table_size(19) == 29
+    assert hash_table_size(66) == 89
+
+
+def test_compile_mo_matches_msgfmt():
+    msgfmt = shutil.which("msgfmt")
+    if msgfmt is None:
+        pytest.skip("msgfmt not available")
+    with TemporaryDirectory() as td:
+        po = write_po(td)
+        builtin_mo = os.path.join(td, "builtin.mo")
+        msgfmt_mo = os.path.join(td, "msgfmt.mo")
+        compile_mo(po, builtin_mo)
+        subprocess.check_call([msgfmt, "-o", msgfmt_mo, po])
+
+        with open(builtin_mo, "rb") as f, open(msgfmt_mo, "rb") as g:
+            assert f.read() == g.read()
+
+
+def test_iter_po_is_lazy():
+    with TemporaryDirectory() as td:
+        po = write_po(td, 'msgid "a"\nmsgstr "b"\n\nmsgid "c"\nmsgstr d\n')
+        entries = iter_po(po)
+
+        assert next(entries).msgid == b"a"
+        with pytest.raises(POSyntaxError, match="nl.po:5"):
+            next(entries)
+
+
+def test_iter_po_obsolete_entries():
+    with TemporaryDirectory() as td:
+        po = write_po(
+            td,
+            PO
+            + r"""msgid "Last"
+msgstr "Laatste"
+#~ msgctxt "menu"
+#~| msgid "Old"
+#~ msgid "%d dir"
+#~ msgid_plural "%d dirs"
+#~ msgstr[0] "%d map"
+#~ msgstr[1] "%d "
+#~ "mappen"
+""",
+        )
+
+        entries = list(iter_po(po, obsolete=True))
+        current = [entry.msgid for entry in parse_po(po)]
+
+    obsolete = [entry for entry in entries if entry.obsolete]
+    assert [entry.msgid for entry in obsolete] == [b"Obsolete", b"%d dir"]
+    assert obsolete[0].msgstr == [b"Verouderd"]
+    assert obsolete[1].msgctxt == b"menu"
+    assert obsolete[1].msgid_plural == b"%d dirs"
+    assert obsolete[1].msgstr == [b"%d map", b"%d mappen"]
+    assert entries[-2].msgid == b"Last"
+    assert not entries[-2].obsolete
+    assert current == [entry.msgid for entry in entries if not entry.obsolete]
+
+
+def test_mo_file_lookup():
+    with TemporaryDirectory() as td:
+        mo = os.path.join(td, "nl.mo")
+        compile_mo(write_po(td), mo)
+
+        with MOFile.open(mo) as f:
+            f.validate()
+            assert len(f) == 6
+            assert bytes(f.lookup(b"Hello")) == b"Hallo"
+            assert bytes(f.lookup(b"File", msgctxt=b"menu")) == b"Bestand"
+            assert f.lookup(b"File") is None
+            assert bytes(f.lookup(b"%d file")) == b"%d bestand\0%d bestanden"
+            assert f.lookup(b"Fuzzy") is None
+            assert f.header()["Plural-Forms"] == (
+                "nplurals=2; plural=(n != 1);"
+            )
+            originals = [bytes(original) for original, _ in f]
+            assert originals == sorted(originals)
+            assert b"%d file\0%d files" in originals
+
+
+def test_mo_file_without_hash_table():
+    with TemporaryDirectory() as td:
+        mo = os.path.join(td, "nl.mo")
+        data = bytearray(generate_mo({b"a": b"A", b"b\0bs": b"B\0Bs"}))
+        # Zero the hash table size, as some other compilers do.
+        struct.pack_into("<I", data, 20, 0)
+        with open(mo, "wb") as f:
+            f.write(data)
+
+        with MOFile.open(mo) as f:
+            f.validate()
+            assert bytes(f.lookup(b"a")) == b"A"
+            assert bytes(f.lookup(b"b")) == b"B\0Bs"
+            assert f.lookup(b"c") is None
+
+
+def test_mo_file_big_endian():
+    with TemporaryDirectory() as td:
+        mo = os.path.join(td, "nl.mo")
+        data = generate_mo({b"": b"Language: nl\n", b"a": b"A"})
+        words = struct.unpack_from("<7I", data)
+        count, hash_size = words[2], words[5]
+        tables = struct.unpack_from(f"<{4 * count + hash_size}I", data, 28)
+        with open(mo, "wb") as f:
+            f.write(struct.pack(f">{7 + len(tables)}I", *words, *tables))
+            f.write(data[28 + 4 * len(tables) :])
+
+        with MOFile.open(mo) as f:
+            assert f.byteorder == ">"
+            f.validate()
+            assert bytes(f.lookup(b"a")) == b"A"
+            assert f.header() == {"Language": "nl"}
+
+
+@pytest.mark.parametrize(
+    "corrupt,message",
+    [
+        (lambda data: data[:10], "too short"),
+        (lambda data: b"\0" * 4 + data[4:], "bad magic"),
+        (lambda data: data[:40], "extends past end"),
+        (lambda data: data[:-1], "past end of file|NUL-terminated"),
+        (lambda data: data[:-1] + b"x", "NUL-terminated"),
+        (lambda data: b"", "too short"),
+    ],
+)
+def test_validate_mo_detects_corruption(corrupt, message):
+    with TemporaryDirectory() as td:
+        mo = os.path.join(td, "nl.mo")
+        data = generate_mo({b"a": b"A", b"b": b"B"})
+        with open(mo, "wb") as f:
+            f.write(corrupt(data))
+
+        with pytest.raises(MOFormatError, match=message):
+            validate_mo(mo)
+
+
+def test_validate_mo_detects_unsorted_originals():
+    with TemporaryDirectory() as td:
+        mo = os.path.join(td, "nl.mo")
+        data = bytearray(generate_mo({b"a": b"A", b"b": b"B"}))
+        # Swap the two original strings in place.
+        end = data.index(b"a\0b\0")
+        data[end : end + 4] = b"b\0a\0"
+        with open(mo, "wb") as f:
+            f.write(data)
+
+        with pytest.raises(MOFormatError, match="not sorted"):
+            validate_mo(mo)
@@ -1,15 +1,20 @@
 import os
+import subprocess
+import sys
 from tempfile import TemporaryDirectory
-from typing import NoReturn
+from typing import Iterator, List, NoReturn, Optional, Set
 
 import pytest
 from setuptools import Distribution
-from setuptools.errors import OptionError
+from setuptools.errors import ExecError, OptionError
 
 import setuptools_gettext
+import setuptools_gettext.cache
 import setuptools_gettext.install_layout
+import setuptools_gettext.watch
 from setuptools_gettext import (
     build_mo,
+    clean_mo,
     discover_catalogs,
     find_source_files,
     gather_built_files,
@@ -17,8 +22,15 @@ from setuptools_gettext import (
     load_pyproject_config,
     parse_lang,
     pyprojecttoml_config,
+    update_pot,
 )
-from setuptools_gettext.catalog import lang_from_dir
+from setuptools_gettext.catalog import (
+    Catalog,
+    catalog_index,
+    clear_catalog_index,
+    lang_from_dir,
+)
+from setuptools_gettext.mo import MOFile
 
 
 def write_file(path):
@@ -391,9 +403,15 @@ def test_package_layout_rejects_build_dir_on_different_mount(monkeypatch):
 
 
 def test_pyproject_config_registers_build_mo_before_build_py():
-    dist = Distribution()
-
-    pyprojecttoml_config(dist)
+    with TemporaryDirectory() as td:
+        os.mkdir(os.path.join(td, "po"))
+        old_cwd = os.getcwd()
+        os.chdir(td)
+        try:
+            dist = Distribution()
+            pyprojecttoml_config(dist)
+        finally:
+            os.chdir(old_cwd)
 
     sub_commands = [
         sub_command[0]
@@ -403,6 +421,65 @@ def test_pyproject_config_registers_build_mo_before_build_py():
     assert sub_commands.index("build_mo") < sub_commands.index("build_py")
 
 
+def test_pyproject_config_short_circuits_without_gettext(monkeypatch):
+    with TemporaryDirectory() as td:
+        old_cwd = os.getcwd()
+        os.chdir(td)
+        try:
+            dist = Distribution()
+            monkeypatch.setattr(dist, "get_command_class", None)
+            pyprojecttoml_config(dist)
+        finally:
+            os.chdir(old_cwd)
+
+    assert dist.gettext_source_dir == "po"
+
+
+def test_import_does_not_load_heavy_modules():
+    # Guards the import time of the plugin, which is loaded for every
+    # setuptools build in an environment where it is installed.
+    code = (
+        "import sys, time, setuptools\n"
+        "before = set(sys.modules)\n"
+        "start = time.perf_counter()\n"
+        "import setuptools_gettext\n"
+        "setuptools_gettext.pyprojecttoml_config(setuptools.Distribution())\n"
+        "print(time.perf_counter() - start)\n"
+        "print(' '.join(sorted(set(sys.modules) - before)))\n"
+    )
+    with TemporaryDirectory() as td:
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            check=True,
+            cwd=td,
+            env={
+                **os.environ,
+                "PYTHONPATH": os.pathsep.join(
+                    [os.path.dirname(os.path.dirname(__file__))] + sys.path
+                ),
+            },
+            text=True,
+        ).stdout.splitlines()
+
+    elapsed, loaded = float(output[0]), set(output[1].split())
+    heavy = {
+        "concurrent.futures",
+        "hashlib",
+        "json",
+        "setuptools.command.build",
+        "setuptools.command.install",
+        "setuptools.modified",
+        "setuptools_gettext.cache",
+        "setuptools_gettext.check",
+        "setuptools_gettext.mo",
+        "setuptools_gettext.po",
+        "tomli",
+        "tomllib",
+    }
+    assert not loaded & heavy, f"loaded in {elapsed:.4f}s"
+
+
 def test_duplicate_output_paths_are_rejected():
     with TemporaryDirectory() as td:
         locale = os.path.join(td, "locale")
@@ -450,3 +527,913 @@ def test_find_source_files_auto_detects_locale():
             os.path.join("locale", "de", "LC_MESSAGES", "django.po"),
             os.path.join("locale", "django.pot"),
         ]
+
+
+def make_build_cmd(td, languages, **cfg: object):
+    source = os.path.join(td, "po")
+    for lang in languages:
+        write_file(os.path.join(source, f"{lang}.po"))
+    dist = Distribution(attrs={"name": "demo"})
+    load_pyproject_config(
+        dist,
+        {"source_dir": source, "build_dir": os.path.join(td, "build"), **cfg},
+    )
+    cmd = build_mo(dist)
+    cmd.initialize_options()
+    cmd.finalize_options()
+    return cmd
+
+
+def test_build_parallel_keeps_output_order(monkeypatch):
+    languages = ["de", "fr", "nl", "pt-BR", "sv"]
+    with TemporaryDirectory() as td:
+        cmd = make_build_cmd(td, languages, jobs=4)
+
+        compiled = run_build(cmd, monkeypatch)
+
+        outputs = [
+            os.path.join(td, "build", lang, "LC_MESSAGES", "demo.mo")
+            for lang in sorted(languages)
+        ]
+        assert cmd.jobs == 4
+        assert sorted(mo for _po, mo in compiled) == outputs
+        assert cmd.get_outputs() == outputs
+
+
+def test_build_parallel_reports_all_failures(monkeypatch):
+    with TemporaryDirectory() as td:
+        cmd = make_build_cmd(td, ["de", "fr", "nl"], jobs=2)
+
+        def compile_mo(po, mo) -> None:
+            if not po.endswith("fr.po"):
+                raise OSError("broken catalog")
+            write_file(mo)
+
+        monkeypatch.setattr(setuptools_gettext, "has_msgfmt", lambda: True)
+        cmd.compile_mo = compile_mo
+
+        with pytest.raises(ExecError, match="2 gettext catalog") as excinfo:
+            cmd.run()
+
+        assert "de.po" in str(excinfo.value)
+        assert "nl.po" in str(excinfo.value)
+        assert cmd.get_outputs() == [
+            os.path.join(td, "build", "fr", "LC_MESSAGES", "demo.mo")
+        ]
+
+
+def test_build_rejects_invalid_jobs():
+    with TemporaryDirectory() as td:
+        dist = Distribution(attrs={"name": "demo"})
+        load_pyproject_config(dist, {"source_dir": os.path.join(td, "po")})
+        cmd = build_mo(dist)
+        cmd.initialize_options()
+        cmd.jobs = "many"
+
+        with pytest.raises(OptionError, match="jobs"):
+            cmd.finalize_options()
+
+
+def test_build_falls_back_to_builtin_compiler(monkeypatch):
+    with TemporaryDirectory() as td:
+        os.mkdir(os.path.join(td, "po"))
+        with open(os.path.join(td, "po", "de.po"), "w") as f:
+            f.write('msgid "Hello"\nmsgstr "Hallo"\n')
+        cmd = make_build_cmd(td, [])
+        monkeypatch.setattr(setuptools_gettext, "has_msgfmt", lambda: False)
+        monkeypatch.setattr(
+            setuptools_gettext, "has_translate_toolkit", lambda: False
+        )
+
+        cmd.run()
+
+        assert cmd.builtin is True
+        assert [os.path.exists(mo) for mo in cmd.get_outputs()] == [True]
+
+
+def test_build_validates_compiled_catalogs(monkeypatch):
+    with TemporaryDirectory() as td:
+        os.mkdir(os.path.join(td, "po"))
+        for lang in ["de", "fr"]:
+            with open(os.path.join(td, "po", f"{lang}.po"), "w") as f:
+                f.write('msgid "Hello"\nmsgstr "Hallo"\n')
+        cmd = make_build_cmd(td, [], compiler="builtin", validate=True)
+        compile_builtin = cmd.compile_mo
+
+        def compile_mo(po, mo) -> None:
+            compile_builtin(po, mo)
+            if po.endswith("fr.po"):
+                with open(mo, "r+b") as f:
+                    f.truncate(40)
+
+        cmd.compile_mo = compile_mo
+
+        with pytest.raises(ExecError, match="1 gettext catalog") as excinfo:
+            cmd.run()
+
+        assert "fr.po: invalid output" in str(excinfo.value)
+        assert cmd.validate is True
+        [de_mo] = cmd.get_outputs()
+        assert de_mo.endswith(os.path.join("de", "LC_MESSAGES", "demo.mo"))
+        fr_mo = os.path.join(td, "build", "fr", "LC_MESSAGES", "demo.mo")
+        assert not os.path.exists(fr_mo)
+
+
+def test_build_optimize_uses_builtin_compiler(monkeypatch):
+    with TemporaryDirectory() as td:
+        os.mkdir(os.path.join(td, "po"))
+        with open(os.path.join(td, "po", "en.po"), "w") as f:
+            f.write(
+                'msgid "Open"\nmsgstr "Open"\n\n'
+                'msgid "Open file"\nmsgstr "Open"\n\n'
+                '#, fuzzy\nmsgid "Close"\nmsgstr "Close"\n'
+            )
+        cmd = make_build_cmd(td, [], optimize=True, use_fuzzy=True)
+        monkeypatch.setattr(setuptools_gettext, "has_msgfmt", lambda: True)
+
+        cmd.run()
+
+        assert cmd.builtin is True
+        assert cmd._compile_options() == {"use_fuzzy": True, "optimize": True}
+        [mo] = cmd.get_outputs()
+        with MOFile.open(mo) as f:
+            assert len(f) == 3
+            assert bytes(f.lookup(b"Close")) == b"Close"
+            assert bytes(f.lookup(b"Open file")) == b"Open"
+
+
+CHECKED_HEADER = r"""msgid ""
+msgstr ""
+"Project-Id-Version: demo 1.0\n"
+"PO-Revision-Date: 2026-01-01 00:00+0000\n"
+"Last-Translator: Jan <jan@example.com>\n"
+"Language-Team: Dutch <nl@example.com>\n"
+"MIME-Version: 1.0\n"
+"Content-Type: text/plain; charset=UTF-8\n"
+"Content-Transfer-Encoding: 8bit\n"
+
+"""
+
+
+def test_build_check_reports_problems_and_stops_compiling():
+    with TemporaryDirectory() as td:
+        os.mkdir(os.path.join(td, "po"))
+        for lang, msgstr in [("de", "%d"), ("fr", "%s"), ("nl", "%s")]:
+            with open(os.path.join(td, "po", f"{lang}.po"), "w") as f:
+                f.write(
+                    CHECKED_HEADER + '#, python-format\nmsgid "%s"\n'
+                    f'msgstr "{msgstr}"\n'
+                )
+        with open(os.path.join(td, "po", "sv.po"), "w") as f:
+            f.write('msgid "a"\nmsgstr "b"\n')
+        cmd = make_build_cmd(td, [], compiler="builtin", check=True)
+
+        with pytest.raises(ExecError, match="2 gettext catalog") as excinfo:
+            cmd.run()
+
+        lines = str(excinfo.value).splitlines()[1:]
+        assert [line[len(td) + 1 :] for line in lines] == [
+            "po/de.po:12: python-format: msgstr: format specifications in "
+            "msgid and msgstr are not the same",
+            "po/sv.po: header entry missing",
+        ]
+        assert cmd.get_outputs() == []
+        statuses = {
+            os.path.basename(str(entry["source"])): entry["status"]
+            for entry in cmd.report.files
+        }
+        assert statuses == {
+            "de.po": "check-failed",
+            "fr.po": "skipped",
+            "nl.po": "skipped",
+            "sv.po": "check-failed",
+        }
+
+
+def test_build_parallel_builtin_check_and_validate():
+    languages = ["de", "fr", "nl", "sv"]
+    with TemporaryDirectory() as td:
+        os.mkdir(os.path.join(td, "po"))
+        for lang in languages:
+            with open(os.path.join(td, "po", f"{lang}.po"), "w") as f:
+                f.write(
+                    CHECKED_HEADER + '#, python-format\nmsgid "%s"\n'
+                    f'msgstr "{lang} %s"\n'
+                )
+        cmd = make_build_cmd(
+            td, [], compiler="builtin", check=True, validate=True, jobs=2
+        )
+
+        cmd.run()
+
+        assert cmd._processes is None
+        for lang, mo in zip(languages, cmd.get_outputs()):
+            with MOFile.open(mo) as f:
+                assert bytes(f.lookup(b"%s")) == f"{lang} %s".encode()
+
+
+def test_build_check_includes_up_to_date_catalogs(monkeypatch):
+    with TemporaryDirectory() as td:
+        cmd = make_build_cmd(td, ["de"])
+        run_build(cmd, monkeypatch)
+        cmd = make_build_cmd(td, [], check=True)
+
+        with pytest.raises(ExecError, match="de.po:1: expected quoted"):
+            run_build(cmd, monkeypatch)
+
+        assert [entry["status"] for entry in cmd.report.files] == [
+            "up-to-date",
+            "check-failed",
+        ]
+
+
+def test_build_watch_recompiles_changed_catalogs(monkeypatch):
+    with TemporaryDirectory() as td:
+        cmd = make_build_cmd(td, ["de", "fr"])
+        cmd.watch = True
+        de_po = os.path.join(td, "po", "de.po")
+        nl_po = os.path.join(td, "po", "nl.po")
+
+        def changes(watcher) -> Iterator[Set[str]]:
+            with open(de_po, "a") as f:
+                f.write("more")
+            write_file(nl_po)
+            # The real watcher notices the new directory entry.
+            clear_catalog_index(os.path.join(td, "po"))
+            yield {os.path.abspath(de_po), os.path.abspath(nl_po)}
+            with open(de_po, "w") as f:
+                f.write("broken")
+            yield {os.path.abspath(de_po)}
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr(
+            setuptools_gettext.watch.CatalogWatcher, "__iter__", changes
+        )
+        compiled = []
+
+        def compile_mo(po, mo) -> None:
+            compiled.append(os.path.basename(po))
+            if po.endswith("de.po") and open(po).read() == "broken":
+                raise OSError("broken catalog")
+            write_file(mo)
+
+        monkeypatch.setattr(setuptools_gettext, "has_msgfmt", lambda: True)
+        cmd.compile_mo = compile_mo
+
+        cmd.run()
+
+        assert compiled == ["de.po", "fr.po", "de.po", "nl.po", "de.po"]
+        assert [catalog.lang for catalog in cmd.catalogs] == ["de", "fr", "nl"]
+
+
+def rebuild(cmd, monkeypatch):
+    cmd.outfiles = []
+    return run_build(cmd, monkeypatch)
+
+
+def test_build_skips_unchanged_catalogs_with_fresh_mtimes(monkeypatch):
+    with TemporaryDirectory() as td:
+        cmd = make_build_cmd(td, ["de", "fr"])
+        assert len(run_build(cmd, monkeypatch)) == 2
+        de_po = os.path.join(td, "po", "de.po")
+        fr_po = os.path.join(td, "po", "fr.po")
+        # Simulate a fresh checkout, where all sources look newer.
+        for po in (de_po, fr_po):
+            os.utime(po, (2**31, 2**31))
+
+        assert rebuild(cmd, monkeypatch) == []
+
+        with open(fr_po, "w") as f:
+            f.write("changed")
+        os.unlink(os.path.join(td, "build", "de", "LC_MESSAGES", "demo.mo"))
+        assert sorted(po for po, _mo in rebuild(cmd, monkeypatch)) == [
+            de_po,
+            fr_po,
+        ]
+
+
+def test_build_manifest_tracks_compiler(monkeypatch):
+    with TemporaryDirectory() as td:
+        cmd = make_build_cmd(td, ["de"])
+        assert len(run_build(cmd, monkeypatch)) == 1
+        os.utime(os.path.join(td, "po", "de.po"), (2**31, 2**31))
+
+        cmd.msgfmt = None
+        cmd.builtin = True
+
+        assert len(rebuild(cmd, monkeypatch)) == 1
+        assert os.path.exists(
+            os.path.join(td, "build", setuptools_gettext.cache.MANIFEST_NAME)
+        )
+
+
+def test_build_shares_compiled_catalogs_between_projects(monkeypatch):
+    with TemporaryDirectory() as cache_dir:
+        monkeypatch.setenv("SETUPTOOLS_GETTEXT_CACHE_DIR", cache_dir)
+        with TemporaryDirectory() as td:
+            assert len(run_build(make_build_cmd(td, ["de"]), monkeypatch)) == 1
+        with TemporaryDirectory() as td:
+            cmd = make_build_cmd(td, ["de", "fr"])
+
+            compiled = run_build(cmd, monkeypatch)
+
+            de_mo = os.path.join(td, "build", "de", "LC_MESSAGES", "demo.mo")
+            assert compiled == []
+            assert cmd.get_outputs() == [
+                de_mo,
+                os.path.join(td, "build", "fr", "LC_MESSAGES", "demo.mo"),
+            ]
+            with open(de_mo) as f:
+                assert f.read() == "foo"
+
+
+def test_build_dry_run_writes_nothing(monkeypatch):
+    def make_cmd(td: str) -> build_mo:
+        os.mkdir(os.path.join(td, "po"))
+        for lang in ["de", "fr"]:
+            with open(os.path.join(td, "po", f"{lang}.po"), "w") as f:
+                f.write(f'msgid "Hello"\nmsgstr "{lang}"\n')
+        return make_build_cmd(td, [], compiler="builtin")
+
+    with TemporaryDirectory() as cache_dir:
+        monkeypatch.setenv("SETUPTOOLS_GETTEXT_CACHE_DIR", cache_dir)
+        with TemporaryDirectory() as td:
+            make_cmd(td).run()
+        cached = sorted(os.listdir(cache_dir))
+        with TemporaryDirectory() as td:
+            cmd = make_cmd(td)
+            cmd.dry_run = True
+
+            cmd.run()
+
+            assert len(cmd.get_outputs()) == 2
+            assert not os.path.exists(os.path.join(td, "build"))
+        assert sorted(os.listdir(cache_dir)) == cached
+
+
+def test_shared_cache_evicts_least_recently_used():
+    with TemporaryDirectory() as td:
+        cache = setuptools_gettext.cache.SharedCache(
+            os.path.join(td, "cache"), max_size=10
+        )
+        mo = os.path.join(td, "a.mo")
+        with open(mo, "w") as f:
+            f.write("12345")
+        for i, key in enumerate(["aa11", "bb22", "cc33"]):
+            cache.store(key, mo)
+            os.utime(cache._entry(key), (i, i))
+        assert cache.fetch("aa11", os.path.join(td, "b.mo"))
+
+        cache.evict()
+
+        assert os.path.exists(cache._entry("aa11"))
+        assert not os.path.exists(cache._entry("bb22"))
+        assert os.path.exists(cache._entry("cc33"))
+
+
+def make_clean_cmd(build_dir, dry_run=False):
+    dist = Distribution(attrs={"name": "demo"})
+    load_pyproject_config(dist, {"build_dir": build_dir})
+    cmd = clean_mo(dist)
+    cmd.initialize_options()
+    cmd.dry_run = dry_run
+    cmd.finalize_options()
+    return cmd
+
+
+def test_clean_mo_removes_only_manifest_outputs(monkeypatch):
+    with TemporaryDirectory() as td:
+        cmd = make_build_cmd(td, ["de", "fr"])
+        run_build(cmd, monkeypatch)
+        build_dir = os.path.join(td, "build")
+        foreign = os.path.join(build_dir, "de", "LC_MESSAGES", "other.mo")
+        write_file(foreign)
+
+        make_clean_cmd(build_dir, dry_run=True).run()
+
+        assert len(gather_built_files(build_dir)) == 3
+
+        make_clean_cmd(build_dir).run()
+
+        assert gather_built_files(build_dir) == [foreign]
+        assert os.listdir(build_dir) == ["de"]
+
+
+def test_clean_mo_without_manifest_removes_built_files():
+    with TemporaryDirectory() as td:
+        for lang in ["de", "fr"]:
+            write_file(os.path.join(td, lang, "LC_MESSAGES", "demo.mo"))
+        write_file(os.path.join(td, "README"))
+
+        make_clean_cmd(td).run()
+
+        assert os.listdir(td) == ["README"]
+
+
+def test_clean_mo_removes_outputs_current_before_manifest(monkeypatch):
+    with TemporaryDirectory() as td:
+        build_dir = os.path.join(td, "build")
+        cmd = make_build_cmd(td, ["de", "fr"])
+        for lang in ["de", "fr"]:
+            # Left behind by a build without a manifest; only fr changed.
+            mo = os.path.join(build_dir, lang, "LC_MESSAGES", "demo.mo")
+            write_file(mo)
+            os.utime(mo, (1000, 1000))
+        os.utime(os.path.join(td, "po", "de.po"), (0, 0))
+
+        compiled = run_build(cmd, monkeypatch)
+
+        assert [po for po, mo in compiled] == [os.path.join(td, "po", "fr.po")]
+
+        make_clean_cmd(build_dir).run()
+
+        assert os.listdir(build_dir) == []
+
+
+def test_catalog_index_is_reused_until_cleared():
+    with TemporaryDirectory() as td:
+        locale = os.path.join(td, "locale")
+        write_file(os.path.join(locale, "de.po"))
+        write_file(os.path.join(locale, "fr", "LC_MESSAGES", "django.po"))
+        write_file(os.path.join(locale, ".hidden", "LC_MESSAGES", "x.po"))
+        write_file(os.path.join(locale, "django.pot"))
+        write_file(os.path.join(locale, "build", "nl.po"))
+        write_file(os.path.join(locale, "fr", "LC_MESSAGES", "old", "a.po"))
+
+        index = catalog_index(locale)
+
+        assert catalog_index(locale) is index
+        assert index.exists
+        assert index.flat == {"de": os.path.join(locale, "de.po")}
+        assert list(index.standard) == ["fr"]
+        assert len(index.source_files) == 3
+        assert len(index.dirs) == 3
+
+        write_file(os.path.join(locale, "nl.po"))
+        assert "nl" not in lang_from_dir(locale)
+        clear_catalog_index()
+        assert "nl" in lang_from_dir(locale)
+
+
+def test_discover_catalogs_with_lang():
+    with TemporaryDirectory() as td:
+        source = os.path.join(td, "po")
+        write_file(os.path.join(source, "de.po"))
+        write_file(os.path.join(source, "de", "LC_MESSAGES", "b.po"))
+        write_file(os.path.join(source, "de", "LC_MESSAGES", "a.po"))
+
+        catalogs = discover_catalogs(source, ["fr", "de"])
+
+        assert [(c.lang, c.domain, c.po) for c in catalogs] == [
+            ("fr", "fr", os.path.join(source, "fr.po")),
+            ("de", "de", os.path.join(source, "de.po")),
+            ("de", "a", os.path.join(source, "de", "LC_MESSAGES", "a.po")),
+            ("de", "b", os.path.join(source, "de", "LC_MESSAGES", "b.po")),
+        ]
+
+
+def test_load_pyproject_toml_is_cached():
+    with TemporaryDirectory() as td:
+        path = os.path.join(td, "pyproject.toml")
+        with open(path, "w") as f:
+            f.write('[tool.setuptools-gettext]\nsource_dir = "po"\n')
+
+        cfg = setuptools_gettext._load_pyproject_toml(path)
+        assert setuptools_gettext._load_pyproject_toml(path) is cfg
+        assert cfg == {"source_dir": "po"}
+
+        with open(path, "w") as f:
+            f.write('[tool.setuptools-gettext]\nsource_dir = "locale"\n')
+        cfg = setuptools_gettext._load_pyproject_toml(path)
+        assert cfg == {"source_dir": "locale"}
+
+        setuptools_gettext.clear_pyproject_cache()
+        assert setuptools_gettext._load_pyproject_toml(path) is not cfg
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs a shell script")
+def test_build_msgfmt_launches_resolved_msgfmt(monkeypatch):
+    with TemporaryDirectory() as td:
+        bin_dir = os.path.join(td, "bin")
+        os.mkdir(bin_dir)
+        msgfmt = os.path.join(bin_dir, "msgfmt")
+        with open(msgfmt, "w") as f:
+            f.write(
+                "#!/bin/sh\n"
+                'case "$3" in *fr.po) echo "fr.po:1: bad" >&2; exit 1;; esac\n'
+                'cp "$3" "$2"\n'
+            )
+        os.chmod(msgfmt, 0o755)
+        monkeypatch.setenv("PATH", bin_dir + os.pathsep + os.environ["PATH"])
+        cmd = make_build_cmd(td, ["de", "fr"], compiler="msgfmt", jobs=2)
+
+        with pytest.raises(ExecError, match="fr.po"):
+            cmd.run()
+
+        assert cmd._msgfmt_path == msgfmt
+        assert cmd.get_outputs() == [
+            os.path.join(td, "build", "de", "LC_MESSAGES", "demo.mo")
+        ]
+
+
+def test_find_executable_is_cached(monkeypatch):
+    with TemporaryDirectory() as td:
+        tool = os.path.join(td, "sometool")
+        write_file(tool)
+        monkeypatch.setenv("PATH", os.pathsep.join([td + "-missing", td]))
+        setuptools_gettext.clear_executable_cache()
+        calls = []
+        isfile = os.path.isfile
+
+        def counting_isfile(path) -> bool:
+            calls.append(path)
+            return isfile(path)
+
+        monkeypatch.setattr(os.path, "isfile", counting_isfile)
+        if sys.platform == "win32":
+            tool += ".exe"
+            write_file(tool)
+
+        assert setuptools_gettext.find_executable("sometool") == tool
+        assert setuptools_gettext.find_executable("sometool") == tool
+        assert len(calls) == 3
+
+        monkeypatch.setenv("PATH", td + "-missing")
+        assert setuptools_gettext.find_executable("sometool") is None
+
+
+def test_pinned_tool_paths_skip_path_lookup(monkeypatch):
+    dist = Distribution(attrs={"name": "demo"})
+    load_pyproject_config(
+        dist, {"msgfmt_path": "/opt/gettext/bin/msgfmt", "source_dir": "po"}
+    )
+
+    def fail(executable) -> NoReturn:
+        raise AssertionError(f"looked up {executable}")
+
+    monkeypatch.setattr(setuptools_gettext, "find_executable", fail)
+
+    assert dist.gettext_tool_paths == {"msgfmt": "/opt/gettext/bin/msgfmt"}
+    assert (
+        setuptools_gettext._tool_path(dist, "msgfmt")
+        == "/opt/gettext/bin/msgfmt"
+    )
+    cmd = build_mo(dist)
+    assert cmd._has_msgfmt()
+
+
+@pytest.mark.parametrize(
+    "install_mode", ["copy", "hardlink", "symlink", "reflink"]
+)
+def test_install_mo_install_modes(install_mode):
+    if install_mode == "symlink" and sys.platform == "win32":
+        pytest.skip("symlinks need extra privileges on Windows")
+    with TemporaryDirectory() as td:
+        build_dir = os.path.join(td, "build")
+        mo = os.path.join(build_dir, "de", "LC_MESSAGES", "django.mo")
+        write_file(mo)
+        dist = Distribution(attrs={"name": "demo"})
+        load_pyproject_config(
+            dist, {"build_dir": build_dir, "install_mode": install_mode}
+        )
+        cmd = install_mo(dist)
+        cmd.initialize_options()
+        cmd.install_dir = os.path.join(td, "install")
+        cmd.finalize_options()
+
+        cmd.run()
+
+        [installed] = cmd.get_outputs()
+        with open(installed) as f:
+            assert f.read() == "foo"
+        assert os.path.islink(installed) == (install_mode == "symlink")
+        if install_mode in ("hardlink", "symlink"):
+            assert os.path.samefile(installed, mo)
+        else:
+            assert not os.path.samefile(installed, mo)
+
+
+@pytest.mark.parametrize("previous_mode", ["hardlink", "symlink"])
+@pytest.mark.parametrize("install_mode", ["copy", "reflink"])
+def test_install_mo_switch_mode_keeps_build_output(
+    previous_mode, install_mode
+):
+    if previous_mode == "symlink" and sys.platform == "win32":
+        pytest.skip("symlinks need extra privileges on Windows")
+    with TemporaryDirectory() as td:
+        build_dir = os.path.join(td, "build")
+        mo = os.path.join(build_dir, "de", "LC_MESSAGES", "django.mo")
+        write_file(mo)
+        dist = Distribution(attrs={"name": "demo"})
+
+        def install(mode: str) -> str:
+            load_pyproject_config(
+                dist, {"build_dir": build_dir, "install_mode": mode}
+            )
+            cmd = install_mo(dist)
+            cmd.initialize_options()
+            cmd.install_dir = os.path.join(td, "install")
+            cmd.force = True
+            cmd.finalize_options()
+            cmd.run()
+            [installed] = cmd.get_outputs()
+            return installed
+
+        install(previous_mode)
+        installed = install(install_mode)
+
+        with open(mo) as f:
+            assert f.read() == "foo"
+        with open(installed) as f:
+            assert f.read() == "foo"
+        assert not os.path.islink(installed)
+        assert not os.path.samefile(installed, mo)
+
+
+def test_install_mo_rejects_invalid_install_mode():
+    dist = Distribution(attrs={"name": "demo"})
+    load_pyproject_config(dist, {})
+    cmd = install_mo(dist)
+    cmd.initialize_options()
+    cmd.install_dir = "install"
+    cmd.install_mode = "teleport"
+
+    with pytest.raises(OptionError, match="install_mode"):
+        cmd.finalize_options()
+
+
+def test_install_mo_sync_skips_identical_and_removes_stale():
+    with TemporaryDirectory() as td:
+        build_dir = os.path.join(td, "build")
+        de_mo = os.path.join(build_dir, "de", "LC_MESSAGES", "django.mo")
+        fr_mo = os.path.join(build_dir, "fr", "LC_MESSAGES", "django.mo")
+        write_file(de_mo)
+        write_file(fr_mo)
+        install_dir = os.path.join(td, "install")
+        dist = Distribution(attrs={"name": "demo"})
+        load_pyproject_config(
+            dist, {"build_dir": build_dir, "install_sync": True}
+        )
+
+        def install() -> list:
+            cmd = install_mo(dist)
+            cmd.initialize_options()
+            cmd.install_dir = install_dir
+            cmd.finalize_options()
+            cmd.run()
+            return cmd.get_outputs()
+
+        de_installed, fr_installed = sorted(install())
+        os.utime(de_installed, (0, 0))
+        os.utime(fr_installed, (0, 0))
+        with open(fr_mo, "w") as f:
+            f.write("bar")
+        os.utime(fr_mo, (0, 0))
+
+        assert sorted(install()) == [de_installed, fr_installed]
+        assert os.path.getmtime(de_installed) == 0
+        with open(fr_installed) as f:
+            assert f.read() == "bar"
+
+        os.unlink(fr_mo)
+        assert install() == [de_installed]
+        assert not os.path.exists(fr_installed)
+        assert os.path.exists(de_installed)
+
+
+def test_commands_share_gettext_state(monkeypatch):
+    calls: List[str] = []
+    real_discover = setuptools_gettext.discover_catalogs
+    real_gather = setuptools_gettext.gather_built_files
+
+    def discover_catalogs(
+        source_dir: str, lang: Optional[List[str]] = None
+    ) -> List[Catalog]:
+        calls.append("discover_catalogs")
+        return real_discover(source_dir, lang)
+
+    def gather_built_files(build_dir: str) -> List[str]:
+        calls.append("gather_built_files")
+        return real_gather(build_dir)
+
+    monkeypatch.setattr(
+        setuptools_gettext, "discover_catalogs", discover_catalogs
+    )
+    monkeypatch.setattr(
+        setuptools_gettext, "gather_built_files", gather_built_files
+    )
+    with TemporaryDirectory() as td:
+        dist = Distribution(attrs={"name": "demo"})
+        load_pyproject_config(
+            dist,
+            {
+                "source_dir": os.path.join(td, "po"),
+                "build_dir": os.path.join(td, "build"),
+            },
+        )
+        write_file(os.path.join(td, "po", "de.po"))
+        build = build_mo(dist)
+        build.initialize_options()
+        assert setuptools_gettext.has_gettext(build)
+        build.finalize_options()
+        run_build(build, monkeypatch)
+        # A second build command for the same distribution reuses the
+        # discovered catalogs.
+        build = build_mo(dist)
+        build.initialize_options()
+        build.finalize_options()
+        install = install_mo(dist)
+        install.initialize_options()
+        install.install_dir = os.path.join(td, "install")
+        install.finalize_options()
+        inputs = install.get_inputs()
+        install.run()
+
+        assert calls == ["discover_catalogs", "gather_built_files"]
+        assert inputs == [
+            os.path.join(td, "build", "de", "LC_MESSAGES", "demo.mo")
+        ]
+        assert len(install.get_outputs()) == 1
+
+        load_pyproject_config(dist, {"source_dir": os.path.join(td, "po")})
+        assert setuptools_gettext.gettext_state(dist).catalogs == {}
+
+
+def test_build_writes_report(monkeypatch):
+    import json
+
+    with TemporaryDirectory() as td:
+        report = os.path.join(td, "report.json")
+        monkeypatch.setenv("SETUPTOOLS_GETTEXT_REPORT", report)
+        cmd = make_build_cmd(td, ["de", "fr"])
+        run_build(cmd, monkeypatch)
+        run_build(make_build_cmd(td, ["de", "fr"]), monkeypatch)
+
+        with open(report) as f:
+            data = json.load(f)
+
+    assert [run["command"] for run in data] == ["build_mo", "build_mo"]
+    assert data[0]["counts"] == {"compiled": 2}
+    assert data[1]["counts"] == {"up-to-date": 2}
+    assert {"discover", "check", "compile"} <= set(data[0]["phases"])
+    entry = data[0]["files"][0]
+    assert entry["status"] == "compiled"
+    assert entry["bytes_in"] == entry["bytes_out"] == 3
+    assert entry["seconds"] >= 0
+
+
+def test_build_without_report_writes_nothing(monkeypatch):
+    monkeypatch.delenv("SETUPTOOLS_GETTEXT_REPORT", raising=False)
+    with TemporaryDirectory() as td:
+        cmd = make_build_cmd(td, ["de"])
+        run_build(cmd, monkeypatch)
+
+        assert cmd.report.path is None
+        assert cmd.report.as_dict()["counts"] == {"compiled": 1}
+
+
+FAKE_XGETTEXT = """#!/bin/sh
+if [ "$1" = --version ]; then echo "xgettext (fake) 1.0"; exit 0; fi
+while [ "$1" != -o ]; do shift; done
+out="$2"
+shift 2
+echo "$*" >> "$XGETTEXT_LOG"
+for f in "$@"; do
+    case "$f" in *broken*) echo "$f:1: syntax error" >&2; exit 1;; esac
+    grep -q . "$f" || continue
+    [ -f "$out" ] || printf 'msgid ""\\nmsgstr ""\\n' > "$out"
+    msgid="$(head -n1 "$f")"
+    printf '\\n#: %s:1\\nmsgid "%s"\\nmsgstr ""\\n' "$f" "$msgid" >> "$out"
+done
+"""
+
+
+def make_update_pot_cmd(td, monkeypatch):
+    bin_dir = os.path.join(td, "bin")
+    os.mkdir(bin_dir)
+    xgettext = os.path.join(bin_dir, "xgettext")
+    with open(xgettext, "w") as f:
+        f.write(FAKE_XGETTEXT)
+    os.chmod(xgettext, 0o755)
+    monkeypatch.setenv("XGETTEXT_LOG", os.path.join(td, "log"))
+    project = os.path.join(td, "project")
+    os.mkdir(project)
+    monkeypatch.chdir(project)
+    dist = Distribution(attrs={"name": "demo"})
+    load_pyproject_config(
+        dist, {"source_dir": "po", "xgettext_path": xgettext}
+    )
+    cmd = update_pot(dist)
+    cmd.initialize_options()
+    cmd.finalize_options()
+    return cmd
+
+
+def read_log(td):
+    with open(os.path.join(td, "log")) as f:
+        return f.read().splitlines()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs a shell script")
+def test_update_pot_only_extracts_changed_files(monkeypatch):
+    with TemporaryDirectory() as td:
+        cmd = make_update_pot_cmd(td, monkeypatch)
+        for name, message in [("a", "Hello"), ("b", "World"), ("c", "")]:
+            with open(f"{name}.py", "w") as f:
+                f.write(f"{message}\n")
+
+        cmd.run()
+        with open(os.path.join("po", "demo.pot")) as f:
+            pot = f.read()
+        assert read_log(td) == ["./a.py ./b.py ./c.py"]
+        assert '#: ./a.py:1\nmsgid "Hello"' in pot
+        assert '#: ./b.py:1\nmsgid "World"' in pot
+        assert "Project-Id-Version: demo" in pot
+
+        with open("b.py", "w") as f:
+            f.write("Other\n")
+        cmd.run()
+        with open(os.path.join("po", "demo.pot")) as f:
+            pot = f.read()
+        assert read_log(td) == ["./a.py ./b.py ./c.py", "./b.py"]
+        assert '#: ./a.py:1\nmsgid "Hello"' in pot
+        assert '#: ./b.py:1\nmsgid "Other"' in pot
+        assert "World" not in pot
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs a shell script")
+def test_update_pot_merges_duplicates_and_keeps_unchanged_pot(monkeypatch):
+    with TemporaryDirectory() as td:
+        cmd = make_update_pot_cmd(td, monkeypatch)
+        for name in ["a", "b"]:
+            with open(f"{name}.py", "w") as f:
+                f.write("Hello\n")
+        pot = os.path.join("po", "demo.pot")
+
+        cmd.run()
+        os.utime(pot, (0, 0))
+        cmd.force = True
+        cmd.run()
+
+        assert os.path.getmtime(pot) == 0
+        with open(pot) as f:
+            assert '#: ./a.py:1 ./b.py:1\nmsgid "Hello"' in f.read()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs a shell script")
+def test_update_pot_merges_in_path_byte_order(monkeypatch):
+    with TemporaryDirectory() as td:
+        cmd = make_update_pot_cmd(td, monkeypatch)
+        os.mkdir("foo")
+        for name, message in [
+            ("foo/x.py", "X"),
+            ("foo-bar.py", "Bar"),
+            ("foo.py", "Foo"),
+        ]:
+            with open(name, "w") as f:
+                f.write(f"{message}\n")
+
+        cmd.run()
+
+        with open(os.path.join("po", "demo.pot")) as f:
+            pot = f.read()
+        assert [
+            line for line in pot.splitlines() if line.startswith("#: ")
+        ] == ["#: ./foo-bar.py:1", "#: ./foo.py:1", "#: ./foo/x.py:1"]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs a shell script")
+def test_update_pot_shards_and_isolates_failures(monkeypatch):
+    with TemporaryDirectory() as td:
+        cmd = make_update_pot_cmd(td, monkeypatch)
+        cmd.jobs = 2
+        names = ["a", "b", "broken", "c", "d", "e", "f", "g", "h", "i"]
+        for name in names:
+            with open(f"{name}.py", "w") as f:
+                f.write(f"{name.upper()}\n")
+
+        with pytest.raises(ExecError, match="1 file") as excinfo:
+            cmd.run()
+
+        assert "./broken.py: command" in str(excinfo.value)
+        log = read_log(td)
+        assert sorted(log[:5]) == [
+            "./a.py ./b.py",
+            "./broken.py ./c.py",
+            "./d.py ./e.py",
+            "./f.py ./g.py",
+            "./h.py ./i.py",
+        ]
+        assert sorted(log[5:]) == ["./broken.py", "./c.py"]
+
+        os.unlink("broken.py")
+        cmd.run()
+
+        assert read_log(td)[7:] == []
+        with open(os.path.join("po", "demo.pot")) as f:
+            pot = f.read()
+        assert [
+            line for line in pot.splitlines() if line.startswith("msgid ")
+        ] == ['msgid ""'] + [
+            f'msgid "{n.upper()}"' for n in names if n != "broken"
+        ]
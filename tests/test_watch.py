@@ -0,0 +1,74 @@
+import os
+from tempfile import TemporaryDirectory
+
+from setuptools_gettext.catalog import clear_catalog_index
+from setuptools_gettext.watch import CatalogWatcher
+
+
+def write(path, content="x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def test_catalog_watcher_poll():
+    with TemporaryDirectory() as td:
+        de = os.path.join(td, "de.po")
+        fr = os.path.join(td, "fr.po")
+        write(de)
+        write(fr)
+        clear_catalog_index()
+        watcher = CatalogWatcher(td)
+
+        assert watcher.poll() == set()
+
+        write(de, "changed")
+        assert watcher.poll() == {de}
+        assert watcher.poll() == set()
+
+        nl = os.path.join(td, "nl", "LC_MESSAGES", "app.po")
+        write(nl)
+        os.unlink(fr)
+        assert watcher.poll() == {nl, fr}
+
+        write(nl, "changed")
+        assert watcher.poll() == {nl}
+
+
+def test_catalog_watcher_debounces_changes():
+    with TemporaryDirectory() as td:
+        paths = [os.path.join(td, f"{lang}.po") for lang in ["de", "fr"]]
+        for path in paths:
+            write(path)
+        clear_catalog_index()
+        edits = [
+            lambda: None,
+            lambda: write(paths[0], "edit 1"),
+            lambda: write(paths[1], "edit 2"),
+            lambda: None,
+        ]
+        sleeps = []
+
+        def sleep(seconds) -> None:
+            sleeps.append(seconds)
+            edits.pop(0)()
+
+        watcher = CatalogWatcher(td, interval=1.0, debounce=0.1, sleep=sleep)
+
+        assert next(iter(watcher)) == set(paths)
+        assert sleeps == [1.0, 1.0, 0.1, 0.1]
+
+
+def test_catalog_watcher_sees_catalogs_in_new_directories():
+    with TemporaryDirectory() as td:
+        write(os.path.join(td, "fr.po"))
+        clear_catalog_index()
+        watcher = CatalogWatcher(td)
+        messages = os.path.join(td, "de", "LC_MESSAGES")
+        os.makedirs(messages)
+
+        assert watcher.poll() == set()
+
+        de = os.path.join(messages, "demo.po")
+        write(de)
+        assert watcher.poll() == {de}